@@ -1,13 +1,32 @@
 import streamlit as st
-import folium
+import numpy as np
+import pandas as pd
+from navigator.filtering import KalmanFilter
+from navigator.geodesy import haversine
+from navigator.gps_stream import gps_stream
+from navigator.i18n import CATALOG
+from navigator.mapview import base_map, live_layer, map_center
+from navigator.navigation import SEARCH_SELECTORS, build_route, fetch_nearby_places, places_matrix, render_route_steps
+from navigator.overpass import OverpassError
+from navigator.poi_cache import default_cache
+from navigator.prefetch import default_prefetcher
+from navigator.region_pack import default_pack
+from navigator.route_cache import default_route_cache
+from navigator.routing import STOP, default_graph
+from navigator.spatial_index import PlaceIndex
+from navigator.tour import plan_tour, tour_route
+from navigator.perf_panel import perf_panel
+from navigator.tracing import finish_run, span, start_run
+from navigator.tracking import RouteTracker
+from navigator.upstream import ip_location as shared_ip_location
+from navigator.voice_player import announce, voice_player
 from streamlit_folium import st_folium
-import math
-import requests
 from streamlit_geolocation import streamlit_geolocation  # Run: py -m pip install streamlit-geolocation
-import streamlit.components.v1 as components
 
 # Page config & CSS
 st.set_page_config(page_title="Smart Multi-Language GPS Navigator", layout="wide", page_icon="🧭")
+# Per-run tracing while the sidebar performance panel is open (or NAVIGATOR_TRACING=1)
+trace = start_run("1.py", enabled=st.session_state.get("perf_panel", False))
 st.markdown("""
 <style>
     .main-header {font-size: 2.8rem; color: #00D4FF; text-align: center; margin: 1rem 0;}
@@ -16,40 +35,12 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 st.markdown('<h1 class="main-header">🧭 Smart Multi-Language GPS Navigator</h1>', unsafe_allow_html=True)
+# Fixed slot for the voice player, filled at the end of each run, so its iframe is never remounted
+voice_slot = st.empty()
 
 # ==================== MULTI-LANGUAGE SUPPORT ====================
-LANGUAGES = {
-    "English 🇬🇧": {
-        "lang_code": "en-US",
-        "straight": "Go straight",
-        "right": "Turn right",
-        "sharp_right": "Turn sharply right",
-        "left": "Turn left",
-        "sharp_left": "Turn sharply left",
-        "arrived": "You have arrived at your destination!",
-        "meters": "meters"
-    },
-    "Hindi हिन्दी 🇮🇳": {
-        "lang_code": "hi-IN",
-        "straight": "सीधे चलें",
-        "right": "दाएँ मुड़ें",
-        "sharp_right": "तेज दाएँ मुड़ें",
-        "left": "बाएँ मुड़ें",
-        "sharp_left": "तेज बाएँ मुड़ें",
-        "arrived": "आप अपने गंतव्य पर पहुँच गए हैं!",
-        "meters": "मीटर"
-    },
-    "Telugu తెలుగు 🇮🇳": {
-        "lang_code": "te-IN",
-        "straight": "నేరుగా వెళ్ళండి",
-        "right": "కుడి వైపు తిరగండి",
-        "sharp_right": "తీవ్రంగా కుడి మలుపు",
-        "left": "ఎడమ వైపు తిరగండి",
-        "sharp_left": "తీవ్రంగా ఎడమ మలుపు",
-        "arrived": "మీరు మీ గమ్యానికి చేరుకున్నారు!",
-        "meters": "మీటర్లు"
-    }
-}
+# Compiled once per process in navigator.i18n and shared by every session
+LANGUAGES = {locale.label: locale for locale in CATALOG.values()}
 
 # Language selection at top
 st.sidebar.header("🌐 Select Language")
@@ -60,117 +51,83 @@ selected_lang = LANGUAGES[selected_lang_name]
 for key, default in {
     'user_location': None,
     'nearby_places': {},
+    'place_index': None,
     'destination': None,
+    'route': None,
     'route_steps': [],
-    'current_step_index': 0
+    'current_step_index': 0,
+    'map_view': None,
+    'last_fix_seq': None,
+    'fix_accuracy': None,
+    'gps_filter': None,
+    'tracker': None,
+    'track_state': None
 }.items():
     if key not in st.session_state:
         st.session_state[key] = default
+if st.session_state.place_index is None:
+    st.session_state.place_index = PlaceIndex()
 
 # ==================== NAVIGATION FUNCTIONS (MULTI-LANGUAGE) ====================
-def haversine(lat1, lon1, lat2, lon2):
-    R = 6371000
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lon2 - lon1)
-    a = math.sin(delta_phi / 2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
+# Routing, instructions and place search live in navigator.navigation (shared with
+# the bulk API and CLI); the app only picks the phrase set for the selected language
 
-def get_bearing(lat1, lon1, lat2, lon2):
-    lat1 = math.radians(lat1)
-    lon1 = math.radians(lon1)
-    lat2 = math.radians(lat2)
-    lon2 = math.radians(lon2)
-    dlon = lon2 - lon1
-    y = math.sin(dlon) * math.cos(lat2)
-    x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(dlon)
-    bearing = math.degrees(math.atan2(y, x))
-    return (bearing + 360) % 360
+# IP-based location; one rate-limited lookup per hour shared by every session
+def ip_location():
+    data = shared_ip_location(timeout=10)
+    return data if data["status"] == "success" else None
 
-def get_direction_text(prev_bearing, curr_bearing, distance, lang):
-    diff = (curr_bearing - prev_bearing + 360) % 360
-    if diff < 20 or diff > 340:
-        direction = lang["straight"]
-    elif 20 <= diff < 80:
-        direction = lang["right"]
-    elif 80 <= diff < 160:
-        direction = lang["sharp_right"]
-    elif 160 <= diff <= 200:
-        direction = lang["left"]
-    elif 200 <= diff < 340:
-        direction = lang["sharp_left"]
-    else:
-        direction = lang["straight"]
-    return f"{direction} ({int(distance)} {lang['meters']})"
-
-def generate_route_steps(start, end, lang):
-    steps = []
-    total_dist = haversine(*start, *end)
-    if total_dist < 20:
-        return [lang["arrived"]]
+# One route through several stops, each leg shared through the route cache
+def errand_route(start, stops):
+    points = [start] + [coords for _, coords in stops]
+    legs = [default_route_cache().get(a, b, build_route, namespace="gps") for a, b in zip(points, points[1:])]
+    return tour_route(legs, [name for name, _ in stops])
 
-    num_steps = max(5, min(12, int(total_dist // 40)))
-    waypoints = [start]
-    for i in range(1, num_steps):
-        ratio = i / num_steps
-        offset_lat = 0.00008 * math.sin(i * 1.5)
-        offset_lon = 0.00006 * math.cos(i * 1.8)
-        lat = start[0] + ratio * (end[0] - start[0]) + offset_lat
-        lon = start[1] + ratio * (end[1] - start[1]) + offset_lon
-        waypoints.append([lat, lon])
-    waypoints.append(end)
+# Distances among the user and the found places (road distances when a network is
+# loaded); cached because the network matrix runs one Dijkstra per place
+@st.cache_data(max_entries=32, show_spinner="Computing distance matrix...")
+def distance_table(user, places):
+    names, matrix = places_matrix(user, dict(places), network=default_graph() is not None)
+    return pd.DataFrame(np.round(matrix), index=names, columns=names)
 
-    prev_bearing = get_bearing(*waypoints[0], *waypoints[1])
-    for i in range(1, len(waypoints)-1):
-        curr_bearing = get_bearing(*waypoints[i], *waypoints[i+1])
-        dist = haversine(*waypoints[i-1], *waypoints[i])
-        steps.append(get_direction_text(prev_bearing, curr_bearing, dist, lang))
-        prev_bearing = curr_bearing
-    steps.append(lang["arrived"])
-    return steps
-
-# Text-to-Speech Function
-def speak_instruction(text, lang_code):
-    escaped_text = text.replace('"', '\\"')
-    js = f"""
-    <script>
-    if ('speechSynthesis' in window) {{
-        window.speechSynthesis.cancel();
-        const utterance = new SpeechSynthesisUtterance("{escaped_text}");
-        utterance.lang = "{lang_code}";
-        utterance.rate = 0.9;
-        utterance.pitch = 1.0;
-        utterance.volume = 1.0;
-        window.speechSynthesis.speak(utterance);
-    }} else {{
-        alert("Text-to-speech not supported in your browser");
-    }}
-    </script>
-    """
-    components.html(js, height=0)
+MAP_ZOOM = 16
 
 # ==================== LOCATION DETECTION ====================
 st.subheader("📍 Get Your Precise Current Location")
 
-location = streamlit_geolocation()
-
-if location and location.get("latitude") and location.get("longitude"):
-    lat = location["latitude"]
-    lon = location["longitude"]
-    accuracy = location.get("accuracy", "Unknown")
-    st.session_state.user_location = [lat, lon]
-    st.success(f"✅ Precise GPS Location Detected!\nLat: {lat:.6f} | Lon: {lon:.6f}\nAccuracy: ~{accuracy}m")
+tracking = st.toggle("📡 Live tracking (follow GPS continuously)")
+new_fix = False
+if tracking:
+    # Every fix from the browser reruns the app; only act on fixes not seen yet,
+    # smoothed by the Kalman filter so GPS jitter cannot trigger turns or arrival
+    if st.session_state.gps_filter is None:
+        st.session_state.gps_filter = KalmanFilter()
+    fix = gps_stream()
+    if fix and fix.get("seq") != st.session_state.last_fix_seq:
+        st.session_state.last_fix_seq = fix["seq"]
+        smoothed = st.session_state.gps_filter.update(fix)
+        if not smoothed.rejected:
+            st.session_state.user_location = [smoothed.latitude, smoothed.longitude]
+            st.session_state.fix_accuracy = smoothed.accuracy
+            new_fix = True
 else:
-    st.info("👆 Click the 'Get Location' button below → Allow permission.\nBest on mobile with GPS enabled.")
+    location = streamlit_geolocation()
+
+    if location and location.get("latitude") and location.get("longitude"):
+        lat = location["latitude"]
+        lon = location["longitude"]
+        accuracy = location.get("accuracy", "Unknown")
+        st.session_state.user_location = [lat, lon]
+        st.success(f"✅ Precise GPS Location Detected!\nLat: {lat:.6f} | Lon: {lon:.6f}\nAccuracy: ~{accuracy}m")
+    else:
+        st.info("👆 Click the 'Get Location' button below → Allow permission.\nBest on mobile with GPS enabled.")
 
 if not st.session_state.user_location:
     st.info("🔄 GPS not available → using approximate IP location...")
     try:
-        resp = requests.get("http://ip-api.com/json/", timeout=10)
-        data = resp.json()
-        if data["status"] == "success":
+        with span("ip_lookup"):
+            data = ip_location()
+        if data:
             st.session_state.user_location = [data["lat"], data["lon"]]
             st.warning(f"IP Location: {data.get('city', 'Unknown')}, {data.get('regionName', '')}")
     except:
@@ -180,66 +137,112 @@ user_location = st.session_state.user_location
 
 # ==================== NEARBY PLACES (WIDER SEARCH) ====================
 if user_location:
+    # Warm POI tiles around the user and along the active route in the background
+    prefetcher = default_prefetcher()
+    prefetcher.warm_around(user_location[0], user_location[1], 2000, SEARCH_SELECTORS)
+    if st.session_state.route:
+        prefetcher.warm_route(st.session_state.route.path, 2000, SEARCH_SELECTORS)
+
     st.subheader("🔍 Nearby Places (within ~2km)")
 
     if st.button("Search Nearby Places"):
         with st.spinner("Fetching places..."):
-            overpass_url = "https://overpass-api.de/api/interpreter"
-            query = f"""
-            [out:json][timeout:30];
-            (
-              node["amenity"~"restaurant|cafe|hospital|bank|school|college|fuel|pharmacy|police|post_office"](around:2000,{user_location[0]},{user_location[1]});
-              node["shop"~"supermarket|convenience|clothes|bakery"](around:2000,{user_location[0]},{user_location[1]});
-              node["tourism"~"hotel|attraction"](around:2000,{user_location[0]},{user_location[1]});
-              node["highway"="bus_stop"](around:2000,{user_location[0]},{user_location[1]});
-            );
-            out center 30;
-            """
             try:
-                response = requests.get(overpass_url, params={'data': query}, timeout=20)
-                data = response.json()
-                places = {}
-                for elem in data.get('elements', [])[:30]:
-                    tags = elem.get('tags', {})
-                    name = tags.get('name') or tags.get('amenity') or tags.get('shop') or tags.get('highway') or 'Nearby Place'
-                    if name:
-                        lat_c = elem.get('lat') or elem.get('center', {}).get('lat')
-                        lon_c = elem.get('lon') or elem.get('center', {}).get('lon')
-                        if lat_c and lon_c:
-                            places[name] = [float(lat_c), float(lon_c)]
+                # Usually already fetched by the prefetcher; otherwise waits on the in-flight fetch.
+                # New POIs are appended to the session's spatial index; keep the 30 closest
+                rows = fetch_nearby_places(user_location[0], user_location[1], radius=2000, limit=30,
+                                           index=st.session_state.place_index)
+                places = {name: [lat, lon] for name, lat, lon, _ in rows}
+                st.session_state.nearby_places = places
                 if places:
-                    st.session_state.nearby_places = places
                     st.success(f"Found {len(places)} nearby places!")
-                else:
-                    fallback = [user_location[0] + 0.002, user_location[1] + 0.002]
-                    st.session_state.nearby_places = {"Nearby Spot": fallback}
-                    st.info("No places found. Try in a bigger city.")
-                st.rerun()
-            except Exception as e:
-                st.error(f"Error: {e}")
+                    st.rerun()
+                st.info("No places found. Try in a bigger city.")
+            except OverpassError as e:
+                st.error(f"Could not fetch nearby places: {e}")
 
     if st.session_state.nearby_places:
         st.write("### 📍 Found Nearby Places:")
-        for name, coords in st.session_state.nearby_places.items():
-            st.write(f"**• {name}**")
+        pack = default_pack()
+        offline = f" · offline pack {pack.name} ({pack.version})" if pack and pack.covers(*user_location) else ""
+        st.caption(f"POI tile cache hit ratio: {default_cache().hit_ratio:.0%}{offline}")
+        # One markdown element instead of one st.write per place keeps reruns light
+        st.markdown("\n".join(
+            f"- **{name}** — {int(haversine(*user_location, *coords))} m"
+            for name, coords in st.session_state.nearby_places.items()
+        ))
+
+        if st.checkbox("📏 Show distance matrix (meters)"):
+            st.dataframe(distance_table(
+                tuple(user_location), tuple((name, tuple(c)) for name, c in st.session_state.nearby_places.items())))
 
         selected = st.selectbox("Select Destination", options=list(st.session_state.nearby_places.keys()))
         if st.button("🚀 Start Navigation"):
             coords = st.session_state.nearby_places[selected]
             st.session_state.destination = {"name": selected, "coords": coords}
-            st.session_state.route_steps = generate_route_steps(user_location, coords, selected_lang)
+            st.session_state.route = default_route_cache().get(user_location, coords, build_route, namespace="gps")
             st.session_state.current_step_index = 0
+            st.session_state.tracker = st.session_state.track_state = None
             st.success(f"Navigation started to **{selected}**!")
 
+        # Errand run: visiting order from the distance matrix, navigated as one route
+        errand = st.multiselect("🧺 Or pick several stops for an errand run",
+                                options=list(st.session_state.nearby_places.keys()))
+        if len(errand) >= 2 and st.button("🗺️ Plan Errand Route"):
+            places = {name: st.session_state.nearby_places[name] for name in errand}
+            with span("errand.order"):
+                _, matrix = places_matrix(user_location, places, network=default_graph() is not None)
+                order, _ = plan_tour(matrix)
+            stops = [(errand[i - 1], places[errand[i - 1]]) for i in order[1:]]
+            route = st.session_state.route = errand_route(user_location, stops)
+            st.session_state.destination = {"name": stops[-1][0], "coords": stops[-1][1], "stops": stops}
+            st.session_state.current_step_index = 0
+            st.session_state.tracker = st.session_state.track_state = None
+            st.success("Errand route: " + " → ".join(name for name, _ in stops) + f" ({route.distance / 1000:.1f} km)")
+
+    # ==================== LIVE TRACKING ====================
+    # Snap each new fix to the route, advance the instruction and reroute when off course
+    route = st.session_state.route
+    advanced = False
+    if tracking and route and new_fix:
+        tracker = st.session_state.tracker
+        if tracker is None or tracker.route is not route:
+            tracker = st.session_state.tracker = RouteTracker(route)
+        tracker.step = max(tracker.step, st.session_state.current_step_index)
+        with span("tracking.update"):
+            state = tracker.update(*user_location, accuracy=st.session_state.fix_accuracy)
+        if state.off_route:
+            st.toast("Off route — recalculating…")
+            destination = st.session_state.destination
+            if "stops" in destination:
+                # Keep the stops not reached yet, in the planned order
+                passed = sum(1 for m in route.maneuvers[:state.step] if m.kind == STOP)
+                destination["stops"] = destination["stops"][passed:]
+                route = errand_route(user_location, destination["stops"])
+            else:
+                route = default_route_cache().get(user_location, destination["coords"], build_route, namespace="gps")
+            st.session_state.route = route
+            st.session_state.tracker = st.session_state.track_state = None
+            st.session_state.current_step_index = 0
+        else:
+            advanced = state.step != st.session_state.current_step_index
+            st.session_state.current_step_index = state.step
+            st.session_state.track_state = state
+    track_state = st.session_state.track_state if tracking and route else None
+
     # ==================== STEP-BY-STEP DIRECTIONS WITH SPEECH ====================
+    # Steps are rendered from the cached route in the current language, so a
+    # language switch never recomputes the route
+    with span("render_steps"):
+        st.session_state.route_steps = render_route_steps(route, selected_lang) if route else []
     if st.session_state.route_steps and st.session_state.current_step_index < len(st.session_state.route_steps):
         current = st.session_state.route_steps[st.session_state.current_step_index]
         st.subheader("🚶 Current Instruction")
         st.markdown(f'<div class="direction-box">{current}</div>', unsafe_allow_html=True)
 
-        # Speak button
-        if st.button("🔊 Speak Instruction"):
-            speak_instruction(current, selected_lang["lang_code"])
+        # Speak button; live tracking announces each new instruction by itself
+        if st.button("🔊 Speak Instruction") or advanced:
+            announce(current, selected_lang.code)
 
         col1, col2 = st.columns(2)
         with col1:
@@ -248,32 +251,51 @@ if user_location:
                 st.rerun()
         with col2:
             if st.button("🔄 Reset Navigation"):
+                st.session_state.route = None
                 st.session_state.route_steps = []
                 st.session_state.destination = None
                 st.session_state.current_step_index = 0
+                st.session_state.tracker = st.session_state.track_state = None
                 st.rerun()
 
         progress = (st.session_state.current_step_index + 1) / len(st.session_state.route_steps)
         st.progress(progress)
         st.caption(f"Step {st.session_state.current_step_index + 1} of {len(st.session_state.route_steps)}")
+        if track_state:
+            st.caption(f"📡 {selected_lang.remaining(route.distance - track_state.along)} "
+                       f"· {int(track_state.offset)} m from route")
 
     elif st.session_state.route_steps:
         st.success("🎉 " + selected_lang["arrived"])
         st.balloons()
-        speak_instruction(selected_lang["arrived"], selected_lang["lang_code"])
+        announce(selected_lang["arrived"], selected_lang.code, once="arrived", route=route.key)
 
     # ==================== MAP VIEW ====================
     st.subheader("🗺️ Map View")
-    m = folium.Map(location=user_location, zoom_start=16)
-    folium.Marker(user_location, popup="You are here", icon=folium.Icon(color="green", icon="user", prefix="fa")).add_to(m)
-
-    if st.session_state.destination:
-        dest = st.session_state.destination["coords"]
-        folium.Marker(dest, popup=st.session_state.destination["name"], icon=folium.Icon(color="red", icon="flag-checkered", prefix="fa")).add_to(m)
-        folium.PolyLine([user_location, dest], color="#00D4FF", weight=8, opacity=0.8).add_to(m)
-
-    st_folium(m, width=700, height=500)
+    destination = st.session_state.destination
+    route = st.session_state.route
+    dest = destination["coords"] if destination else None
+    center = map_center(st.session_state, (tuple(dest) if dest else None, route.key if route else None),
+                        user_location)
+    # While tracking, the marker sits on the route and the map follows it
+    position = track_state.position if track_state else user_location
+    # Base map is only (re)loaded when the view changes; each rerun just swaps the live layer
+    with span("map.build"):
+        nav_map = base_map(center, MAP_ZOOM, dest, destination["name"] if destination else None,
+                           route, dest_icon="flag-checkered", stops=destination.get("stops", []) if destination else [])
+        live = live_layer(position, MAP_ZOOM, route, st.session_state.current_step_index)
+    with span("map.st_folium"):
+        st_folium(nav_map, key="nav_map", width=700, height=500, returned_objects=[],
+                  center=position if tracking else None, feature_group_to_add=live)
 else:
     st.info("Waiting for location...")
 
+# Speak what this run announced; the next instruction is prepared ahead
+step = st.session_state.current_step_index
+with voice_slot:
+    voice_player(upcoming=[(text, selected_lang.code) for text in st.session_state.route_steps[step + 1:step + 2]],
+                 rate=0.9)
+
 st.caption("Multi-Language Voice Navigation • Precise GPS • Dynamic Places • Worldwide")
+perf_panel(trace)
+finish_run()
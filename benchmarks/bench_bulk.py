@@ -0,0 +1,51 @@
+"""Throughput of the bulk OD planner as the process pool grows.
+
+Generates a synthetic road network (sample_city.py) and random OD pairs
+inside it, then plans them with 1, 2, 4, ... workers up to the core count.
+Scaling efficiency is throughput / (workers x single-worker throughput).
+
+    python benchmarks/bench_bulk.py [--pairs 4000] [--size 150]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from sample_city import write_sample_city  # noqa: E402
+from navigator.bulk import plan_pairs  # noqa: E402
+from navigator.routing import RoadGraph  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=4000)
+    parser.add_argument("--size", type=int, default=150)
+    args = parser.parse_args()
+
+    roads = os.path.join(tempfile.mkdtemp(), "city.osm.gz")
+    write_sample_city(roads, size=args.size)
+    graph = RoadGraph.from_file(roads)
+    rng = random.Random(3)
+    nodes = [rng.randrange(len(graph)) for _ in range(2 * args.pairs)]
+    pairs = [(str(i), graph.lat[a], graph.lon[a], graph.lat[b], graph.lon[b])
+             for i, (a, b) in enumerate(zip(nodes[::2], nodes[1::2]))]
+
+    cores = os.cpu_count() or 1
+    counts = sorted({1, cores} | {w for w in (2, 4, 8, 16, 32) if w < cores})
+    print(f"{args.pairs} pairs on {len(graph)} nodes, {cores} cores")
+    base = None
+    for workers in counts:
+        t0 = time.perf_counter()
+        n = sum(1 for _ in plan_pairs(pairs, workers=workers, roads=roads))
+        rate = n / (time.perf_counter() - t0)
+        base = base or rate
+        print(f"workers {workers:>3}: {rate:8.0f} pairs/s  speedup {rate / base:5.2f}x  "
+              f"efficiency {rate / base / workers:5.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Replay a GPX track through the Kalman filter stage.
+
+Without --gpx a 100k-fix track is synthesized (1 Hz, street-like path,
+accuracy-weighted noise and occasional multipath jumps) so the error of raw
+vs. filtered positions can be measured against the true path.
+
+    python benchmarks/bench_filtering.py [--fixes 100000] [--gpx track.gpx]
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bench_geometry import sample_route  # noqa: E402
+from navigator.filtering import read_gpx, smooth_fixes  # noqa: E402
+
+M_PER_DEG = 111_195.0
+
+
+# Writes a synthetic 1 Hz GPX track; returns the true positions
+def write_track(path, count, seed=11):
+    rng = np.random.default_rng(seed)
+    truth = np.asarray(sample_route(count * 2, seed=seed))[::2]   # ~2 m per second
+    hdop = rng.uniform(0.8, 3.0, count)
+    noise = rng.normal(0, 1, (count, 2)) * (hdop * 5 / M_PER_DEG)[:, None]
+    jumps = rng.random(count) < 0.01
+    noise[jumps] += rng.normal(0, 80 / M_PER_DEG, (int(jumps.sum()), 2))
+    raw = truth + noise
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0"?>\n<gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1">'
+                "<trk><trkseg>\n")
+        for i, (lat, lon) in enumerate(raw):
+            stamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(1_700_000_000 + i))
+            f.write(f'<trkpt lat="{lat:.7f}" lon="{lon:.7f}"><time>{stamp}</time><hdop>{hdop[i]:.1f}</hdop></trkpt>\n')
+        f.write("</trkseg></trk></gpx>\n")
+    return truth
+
+
+def error_m(points, truth):
+    d = np.asarray(points) - truth
+    d[:, 1] *= math.cos(math.radians(truth[0, 0]))
+    return np.hypot(d[:, 0], d[:, 1]) * M_PER_DEG
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixes", type=int, default=100_000)
+    parser.add_argument("--gpx", help="recorded track to replay instead of the synthetic one")
+    args = parser.parse_args()
+
+    truth = None
+    path = args.gpx
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "track.gpx")
+        truth = write_track(path, args.fixes)
+
+    fixes = list(read_gpx(path))
+    t0 = time.perf_counter()
+    out = list(smooth_fixes(fixes))
+    elapsed = time.perf_counter() - t0
+    rejected = sum(s.rejected for s in out)
+    print(f"{len(out)} fixes in {elapsed * 1e3:.0f} ms: {elapsed / len(out) * 1e6:.2f} us/fix, "
+          f"{rejected} rejected as outliers")
+
+    # Streaming end to end (file -> parser -> filter) must not grow with the track
+    tracemalloc.start()
+    for _ in smooth_fixes(read_gpx(path)):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"streaming replay peak memory: {peak / 1024:.0f} KiB")
+
+    if truth is not None:
+        raw = error_m([[f["latitude"], f["longitude"]] for f in fixes], truth)
+        smooth = error_m([[s.latitude, s.longitude] for s in out], truth)
+        for name, err in (("raw", raw), ("filtered", smooth)):
+            print(f"{name:<9} error: median {np.median(err):5.1f} m, p95 {np.percentile(err, 95):6.1f} m, "
+                  f"max {err.max():6.1f} m")
+
+
+if __name__ == "__main__":
+    main()
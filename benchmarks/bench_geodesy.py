@@ -0,0 +1,50 @@
+"""Scalar vs. vectorized geodesy at 10, 10k and 1M points.
+
+    python benchmarks/bench_geodesy.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from navigator.geodesy import haversine, get_bearing, distances_from, bearings_along  # noqa: E402
+
+SIZES = (10, 10_000, 1_000_000)
+
+
+def best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    rng = np.random.default_rng(42)
+    origin = (17.385, 78.4867)
+    print(f"{'kernel':<22}{'points':>10}{'scalar ms':>12}{'numpy ms':>12}{'speedup':>10}")
+    for n in SIZES:
+        pts = np.column_stack([origin[0] + rng.uniform(-0.05, 0.05, n), origin[1] + rng.uniform(-0.05, 0.05, n)])
+        rows = pts.tolist()
+        cases = {
+            "distances_from": (
+                lambda: [haversine(origin[0], origin[1], lat, lon) for lat, lon in rows],
+                lambda: distances_from(origin, pts),
+            ),
+            "bearings_along": (
+                lambda: [get_bearing(*rows[i], *rows[i + 1]) for i in range(n - 1)],
+                lambda: bearings_along(pts),
+            ),
+        }
+        for name, (scalar, vector) in cases.items():
+            repeat = 1 if n >= 1_000_000 else 3
+            ts, tv = best_of(scalar, repeat), best_of(vector, repeat)
+            print(f"{name:<22}{n:>10}{ts * 1e3:>12.3f}{tv * 1e3:>12.3f}{ts / tv:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Route line payload and render time for a 10k-vertex route, per zoom level.
+
+Compares the raw folium.PolyLine (every vertex as JSON floats) with the
+simplified, encoded line the map view now sends.
+
+    python benchmarks/bench_geometry.py [--vertices 10000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import folium
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from navigator.geometry import dp_importance, vw_importance, encode_polyline, decode_polyline  # noqa: E402
+from navigator.mapview import route_line  # noqa: E402
+from navigator.routing import Route  # noqa: E402
+
+ZOOMS = (12, 14, 16, 18)
+
+
+# Street-like route: straight runs with right-angle turns, densified to ~1 m
+# spacing with a little GPS-style noise, the way recorded or map-matched paths look
+def sample_route(n, seed=3):
+    rng = np.random.default_rng(seed)
+    heading = np.repeat(rng.integers(0, 4, n // 200 + 1), 200)[:n] * (np.pi / 2)
+    step = 1.0 / 111_000   # ~1 m in degrees
+    lat = 15.8285 + np.cumsum(np.cos(heading) * step) + rng.normal(0, 0.3 * step, n)
+    lon = 78.0371 + np.cumsum(np.sin(heading) * step) + rng.normal(0, 0.3 * step, n)
+    return np.column_stack([lat, lon]).tolist()
+
+
+def timed(fn, repeat=3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def render(line):
+    m = folium.Map(location=[15.8285, 78.0371], zoom_start=16)
+    line.add_to(m)
+    return m.get_root().render()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vertices", type=int, default=10_000)
+    args = parser.parse_args()
+
+    path = sample_route(args.vertices)
+    dp_time, _ = timed(lambda: dp_importance(path))
+    vw_time, _ = timed(lambda: vw_importance(path))
+    enc_time, encoded = timed(lambda: encode_polyline(path))
+    dec_time, _ = timed(lambda: decode_polyline(encoded))
+    print(f"{len(path)} vertices: dp_importance {dp_time * 1e3:.1f} ms, vw_importance {vw_time * 1e3:.1f} ms, "
+          f"encode {enc_time * 1e3:.1f} ms, decode {dec_time * 1e3:.1f} ms")
+
+    raw_time, raw_html = timed(lambda: render(folium.PolyLine(path)))
+    print(f"{'raw PolyLine':<16}{len(path):>9} pts {len(json.dumps(path)) / 1024:9.1f} KiB coords "
+          f"{len(raw_html) / 1024:9.1f} KiB page {raw_time * 1e3:8.1f} ms render")
+    route = Route(path, 0.0, [])
+    route.simplified(ZOOMS[0])   # rank vertices once, as a cached route would
+    for zoom in ZOOMS:
+        simplify_time, points = timed(lambda: route.simplified(zoom))
+        line_time, html = timed(lambda: render(route_line(route, zoom)))
+        print(f"{'zoom ' + str(zoom):<16}{len(points):>9} pts {len(encode_polyline(points)) / 1024:9.1f} KiB encoded"
+              f"{len(html) / 1024:9.1f} KiB page {line_time * 1e3:8.1f} ms render "
+              f"(simplify {simplify_time * 1e3:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
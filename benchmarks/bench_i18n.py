@@ -0,0 +1,61 @@
+"""Instruction rendering through the compiled message catalog: re-rendering
+a route (every rerun / language switch) against per-call f-string building,
+and the per-render cost as the number of catalog languages grows.
+
+    python benchmarks/bench_i18n.py [--maneuvers 2000] [--repeat 50]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from navigator.i18n import MESSAGES, Locale  # noqa: E402
+from navigator.navigation import render_route_steps, turn_kind  # noqa: E402
+from navigator.routing import TURN, Maneuver, Route  # noqa: E402
+
+
+# The previous renderer: phrase lookup plus an f-string per maneuver
+def fstring_steps(route, phrases):
+    steps = [f"{phrases[turn_kind(m.bearing_in, m.bearing_out)]} ({int(m.distance)} {phrases['meters']})"
+             for m in route.maneuvers]
+    return steps + [phrases["arrived"]]
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--maneuvers", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    rng = random.Random(18)
+    maneuvers = [Maneuver(TURN, rng.uniform(0, 360), rng.uniform(0, 360), rng.expovariate(1 / 150))
+                 for _ in range(args.maneuvers)]
+    route = Route([[0.0, 0.0], [0.0, 0.0]], 0.0, maneuvers)
+
+    for code, messages in MESSAGES.items():
+        phrases = {k: v for k, v in messages.items() if isinstance(v, str)}
+        phrases["meters"] = messages["meter"]["other"]
+        locale = Locale(code, messages)
+        cold = timed(lambda: render_route_steps(route, locale), 1)
+        warm = timed(lambda: render_route_steps(route, locale), args.repeat)
+        old = timed(lambda: fstring_steps(route, phrases), args.repeat)
+        print(f"{code}: catalog first render {cold:.2f} ms, re-render {warm:.2f} ms; f-string {old:.2f} ms "
+              f"({args.maneuvers} maneuvers)")
+
+    for count in (3, 30, 300):
+        catalog = {f"{code}-{n}": Locale(code, messages) for n in range(count // 3) for code, messages in MESSAGES.items()}
+        locale = catalog[next(iter(catalog))]
+        render_route_steps(route, locale)
+        print(f"{count:>3} languages loaded: re-render {timed(lambda: render_route_steps(route, locale), args.repeat):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
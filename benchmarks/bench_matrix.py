@@ -0,0 +1,78 @@
+"""Distance matrices: vectorized great-circle at N=10k and network matrices
+via one-to-many Dijkstra vs. a point-to-point search per pair.
+
+    python benchmarks/bench_matrix.py [--n 10000] [--network-n 100] [--size 150]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from sample_city import write_sample_city  # noqa: E402
+from navigator.geodesy import haversine  # noqa: E402
+from navigator.navigation import distance_matrix, great_circle_blocks  # noqa: E402
+from navigator.routing import RoadGraph  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=10_000)
+    parser.add_argument("--network-n", type=int, default=100)
+    parser.add_argument("--size", type=int, default=150)
+    args = parser.parse_args()
+    rng = np.random.default_rng(9)
+
+    # Great-circle: stream blocks (nearest neighbour per row) so the N x N matrix never exists
+    pts = np.column_stack([17.385 + rng.uniform(-0.05, 0.05, args.n), 78.4867 + rng.uniform(-0.05, 0.05, args.n)])
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    nearest = np.empty(args.n, dtype=np.float32)
+    for start, block in great_circle_blocks(pts):
+        block[np.arange(len(block)), start + np.arange(len(block))] = np.inf
+        nearest[start:start + len(block)] = block.min(axis=1)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    sample = min(args.n, 300)
+    t0 = time.perf_counter()
+    rows = pts[:sample].tolist()
+    for lat1, lon1 in rows:
+        for lat2, lon2 in rows:
+            haversine(lat1, lon1, lat2, lon2)
+    scalar = (time.perf_counter() - t0) * (args.n / sample) ** 2
+    print(f"great-circle {args.n}x{args.n}: {elapsed:.2f} s blocked numpy, peak {peak / 2**20:.0f} MiB "
+          f"(full float32 matrix would be {args.n * args.n * 4 / 2**20:.0f} MiB); "
+          f"scalar haversine est. {scalar:.0f} s")
+
+    # Network: one-to-many Dijkstra per origin vs. one A* per pair
+    roads = os.path.join(tempfile.mkdtemp(), "city.osm.gz")
+    write_sample_city(roads, size=args.size)
+    graph = RoadGraph.from_file(roads)
+    graph.prepare_landmarks()
+    n = args.network_n
+    idx = rng.integers(0, len(graph), n)
+    net_pts = np.column_stack([graph.lat[idx], graph.lon[idx]])
+    t0 = time.perf_counter()
+    matrix = distance_matrix(net_pts, network=True, graph=graph)
+    one_to_many = time.perf_counter() - t0
+    pairs = [(i, j) for i in range(min(n, 10)) for j in range(n) if i != j]
+    t0 = time.perf_counter()
+    worst = 0.0
+    for i, j in pairs:
+        path = graph.astar(int(idx[i]), int(idx[j]))
+        d = sum(haversine(graph.lat[u], graph.lon[u], graph.lat[v], graph.lon[v]) for u, v in zip(path, path[1:]))
+        worst = max(worst, abs(d - float(matrix[i, j])))
+    point_to_point = (time.perf_counter() - t0) / len(pairs) * n * (n - 1)
+    print(f"network {n}x{n} on {len(graph)} nodes: one-to-many {one_to_many:.2f} s, "
+          f"per-pair A* est. {point_to_point:.2f} s ({point_to_point / one_to_many:.1f}x), "
+          f"max diff vs A* {worst:.2f} m")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Nearby search as the radius grows: peak Python heap and wall time of a cold
+search through the streaming parser and the bounded top-k heap, against
+reading the whole response with response.json() and keeping every element
+in range. Each search starts from an empty tile cache against the local
+Overpass stand-in, run in its own process with realistic tag loads.
+
+    python benchmarks/bench_nearby.py [--radii 600 2000 5000 10000] [--limit 30]
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+from navigator import overpass  # noqa: E402
+from navigator.navigation import SEARCH_SELECTORS  # noqa: E402
+from navigator.poi_cache import PoiCache  # noqa: E402
+from navigator.spatial_index import PlaceIndex  # noqa: E402
+
+LOCATION = (15.8285, 78.0371)
+
+
+# The stand-in runs as a separate process so its memory and CPU are not measured
+def start_mock():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "tools", "mock_overpass.py"), "--port", str(port),
+                             "--rich"], stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return proc, f"http://127.0.0.1:{port}/api/interpreter"
+
+
+# The previous fetch: whole body in memory, then the full parse tree
+def whole_body_fetch(url):
+    def fetch(selectors, bboxes):
+        response = requests.post(url, data={"data": overpass.build_query(selectors, bboxes)}, timeout=60)
+        return response.json().get("elements", [])
+    return fetch
+
+
+def search(cache, radius, limit, streaming):
+    if streaming:
+        elements = cache.nearest(*LOCATION, radius, SEARCH_SELECTORS, 4 * limit)
+    else:
+        elements = cache.query(*LOCATION, radius, SEARCH_SELECTORS)
+    index = PlaceIndex()
+    index.add_elements(elements)
+    return index.places(*LOCATION, limit, radius=radius)
+
+
+def measure(fetch, radius, limit, streaming):
+    cache = PoiCache(":memory:", fetch=fetch)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    places = search(cache, radius, limit, streaming)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, places
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--radii", type=int, nargs="+", default=[600, 2000, 5000, 10000])
+    parser.add_argument("--limit", type=int, default=30)
+    args = parser.parse_args()
+
+    proc, url = start_mock()
+    client = overpass.OverpassClient(endpoints=(url,), timeout=60)
+    fetches = {False: whole_body_fetch(url),
+               True: lambda selectors, bboxes: overpass.stream_boxes(selectors, bboxes, client)}
+    print(f"{'radius m':>9} {'whole body':>22} {'streaming + top-k':>24}")
+    for radius in args.radii:
+        row = {}
+        for streaming, fetch in fetches.items():
+            elapsed, peak, places = measure(fetch, radius, args.limit, streaming)
+            row[streaming] = (elapsed, peak, places)
+        assert list(row[True][2]) == list(row[False][2]), "streaming changed the results"
+        print(f"{radius:>9} " + " ".join(f"{row[s][0] * 1e3:9.0f} ms {row[s][1] / 2**20:7.1f} MiB  " for s in (False, True)))
+    proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Offline region packs: build time and size, cold start (open + first
+nearby search + first route) against parsing the OSM extract, and nearby
+search latency against the in-memory PlaceIndex.
+
+    python benchmarks/bench_pack.py [--size 150] [--pois 20000] [--queries 2000]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from sample_city import ORIGIN, SPACING, write_sample_city  # noqa: E402
+from navigator.navigation import SEARCH_SELECTORS  # noqa: E402
+from navigator.region_pack import RegionPack, build_pack  # noqa: E402
+from navigator.spatial_index import PlaceIndex  # noqa: E402
+
+# Run in a fresh interpreter so nothing is warm; prints seconds to first answers
+COLD = """
+import sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+from navigator.routing import RoadGraph
+from navigator.region_pack import RegionPack
+from navigator.spatial_index import PlaceIndex
+if {pack!r}:
+    pack = RegionPack({path!r})
+    graph = pack.graph
+    pack.places({lat}, {lon}, 30, 2000)
+else:
+    from navigator.routing import read_osm_xml
+    places = []
+    coords, ways = read_osm_xml({path!r}, places=places)
+    graph = RoadGraph.from_ways(coords, ways)
+    graph.prepare_landmarks()
+    index = PlaceIndex()
+    for node, tags in places:
+        index.add(node, tags.get("name", "Place"), *coords[node], tags)
+    index.places({lat}, {lon}, 30, radius=2000)
+graph.route([{lat}, {lon}], [{lat2}, {lon2}])
+print(time.perf_counter() - t0)
+"""
+
+
+def cold_start(pack, path, a, b):
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    code = COLD.format(root=root, pack=pack, path=path, lat=a[0], lon=a[1], lat2=b[0], lon2=b[1])
+    return float(subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=150)
+    parser.add_argument("--pois", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    tmp = tempfile.mkdtemp()
+    extract, path = os.path.join(tmp, "city.osm.gz"), os.path.join(tmp, "city.navpack")
+    write_sample_city(extract, size=args.size, pois=args.pois)
+
+    t0 = time.perf_counter()
+    header = build_pack(extract, path)
+    print(f"build: {time.perf_counter() - t0:.2f} s, {os.path.getsize(path) / 2**20:.1f} MiB "
+          f"(extract {os.path.getsize(extract) / 2**20:.1f} MiB gzipped), {header['counts']}")
+
+    half = args.size / 2 * SPACING * 0.8
+    a = (ORIGIN[0] - half / 2, ORIGIN[1] - half / 2)
+    b = (ORIGIN[0] + half / 2, ORIGIN[1] + half / 2)
+    packed = min(cold_start(True, path, a, b) for _ in range(3))
+    parsed = cold_start(False, extract, a, b)
+    print(f"cold start to first search + route: pack {packed * 1000:.0f} ms, extract {parsed * 1000:.0f} ms "
+          f"({parsed / packed:.0f}x)")
+
+    pack = RegionPack(path)
+    index = PlaceIndex()
+    for row in range(len(pack)):
+        index.add(row, pack.tags(row).get("name", "Place"), *pack.coords(row), pack.tags(row))
+    rng = np.random.default_rng(16)
+    points = np.column_stack([ORIGIN[0] + rng.uniform(-half, half, args.queries),
+                              ORIGIN[1] + rng.uniform(-half, half, args.queries)]).tolist()
+    for label, search in (("pack", lambda lat, lon: pack.places(lat, lon, 30, 2000, SEARCH_SELECTORS)),
+                          ("PlaceIndex", lambda lat, lon: index.places(lat, lon, 30, radius=2000))):
+        t0 = time.perf_counter()
+        for lat, lon in points:
+            search(lat, lon)
+        print(f"nearby (2 km, 30 closest) {label}: {(time.perf_counter() - t0) / len(points) * 1000:.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Wall time of Streamlit reruns ("Next Step" clicks) for voice.py and 1.py.
+
+Runs the apps headless with streamlit.testing against a local Overpass
+stand-in, starts a navigation and times repeated "Next Step" reruns. Also
+reports the map component payload per rerun, how much of it is the live
+layer delta, and how often the browser would have to reload the map (the
+st_folium element id changes whenever the base map script does).
+
+    python benchmarks/bench_rerun.py [--clicks 20]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+from mock_overpass import serve_in_background  # noqa: E402
+
+LOCATION = [15.8285, 78.0371]
+
+
+def click(at, label):
+    for button in at.button:
+        if label in button.label:
+            button.click()
+            return at.run()
+    raise LookupError(f"no button {label!r}")
+
+
+def map_payload(at):
+    element = at.get("component_instance")[-1].proto
+    args = json.loads(element.json_args)
+    return element.id, len(element.json_args), len(args.get("feature_group") or "")
+
+
+def time_app(script, clicks):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, script), default_timeout=60)
+    at.session_state["user_location"] = list(LOCATION)
+    t0 = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - t0
+    click(at, "Search Nearby Places")
+    at.selectbox[0].select([o for o in at.selectbox[0].options if o][-1])
+    at.run()
+    click(at, "Start Navigation")
+    times, payloads, reloads = [], [], 0
+    map_id = map_payload(at)[0]
+    for _ in range(clicks):
+        if not any("Next Step" in b.label for b in at.button):
+            click(at, "Start Navigation")
+            map_id = map_payload(at)[0]
+        t0 = time.perf_counter()
+        click(at, "Next Step")
+        times.append(time.perf_counter() - t0)
+        element_id, total, delta = map_payload(at)
+        reloads += element_id != map_id
+        map_id = element_id
+        payloads.append((total, delta))
+    return first, times, payloads, reloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clicks", type=int, default=20)
+    parser.add_argument("apps", nargs="*", default=["voice.py", "1.py"])
+    args = parser.parse_args()
+
+    server = serve_in_background()
+    os.environ["OVERPASS_URL"] = server.url
+    os.environ["NAVIGATOR_CACHE"] = os.path.join(tempfile.mkdtemp(), "poi.sqlite3")
+    for script in args.apps:
+        first, times, payloads, reloads = time_app(script, args.clicks)
+        print(f"{script:<10} first run {first * 1e3:7.1f} ms | 'Next Step' rerun: "
+              f"median {statistics.median(times) * 1e3:6.1f} ms, max {max(times) * 1e3:6.1f} ms")
+        print(f"{'':<10} map payload {statistics.median(p[0] for p in payloads) / 1024:5.1f} KiB, "
+              f"live layer {statistics.median(p[1] for p in payloads) / 1024:5.1f} KiB, "
+              f"map reloads {reloads}/{len(payloads)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""A* query latency on the sample city extract (target: < 50 ms per query).
+
+    python benchmarks/bench_routing.py [--size 150] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from navigator.routing import RoadGraph  # noqa: E402
+from sample_city import write_sample_city  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=150)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--oneway", action="store_true", help="honour oneway tags (driving)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sample_city.osm.gz")
+        write_sample_city(path, args.size)
+        t0 = time.perf_counter()
+        graph = RoadGraph.from_file(path, oneway=args.oneway)
+        load = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    graph.prepare_landmarks()
+    prep = time.perf_counter() - t0
+
+    print(f"graph: {len(graph)} nodes, {len(graph.indices)} arcs, "
+          f"loaded in {load * 1e3:.0f} ms, landmarks in {prep * 1e3:.0f} ms")
+    rng = random.Random(1)
+    south, north = graph.lat.min(), graph.lat.max()
+    west, east = graph.lon.min(), graph.lon.max()
+    times, found = [], 0
+    for _ in range(args.queries):
+        start = [rng.uniform(south, north), rng.uniform(west, east)]
+        end = [rng.uniform(south, north), rng.uniform(west, east)]
+        t0 = time.perf_counter()
+        route = graph.route(start, end)
+        times.append(time.perf_counter() - t0)
+        found += route is not None
+    times.sort()
+    print(f"{args.queries} random queries ({found} routed): "
+          f"median {statistics.median(times) * 1e3:.1f} ms, "
+          f"p95 {times[int(0.95 * len(times)) - 1] * 1e3:.1f} ms, max {times[-1] * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
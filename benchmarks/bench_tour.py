@@ -0,0 +1,51 @@
+"""Errand ordering: plan_tour on random stops against the 1 s budget, the
+gain of local search / ILS over nearest neighbour, and the optimality gap
+against brute force on small instances.
+
+    python benchmarks/bench_tour.py [--stops 50] [--small 8] [--trials 30]
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from navigator.navigation import distance_matrix  # noqa: E402
+from navigator.tour import nearest_neighbour, path_cost, plan_tour  # noqa: E402
+
+
+def random_matrix(rng, n):
+    pts = np.column_stack([17.385 + rng.uniform(-0.03, 0.03, n), 78.4867 + rng.uniform(-0.03, 0.03, n)])
+    return distance_matrix(pts).astype(np.float64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stops", type=int, default=50)
+    parser.add_argument("--small", type=int, default=8)
+    parser.add_argument("--trials", type=int, default=30)
+    args = parser.parse_args()
+    rng = np.random.default_rng(15)
+
+    m = random_matrix(rng, args.stops + 1)
+    nn = path_cost(m, nearest_neighbour(m))
+    t0 = time.perf_counter()
+    order, cost = plan_tour(m)
+    elapsed = time.perf_counter() - t0
+    print(f"{args.stops} stops: {elapsed * 1000:.0f} ms (target 1000 ms), nearest neighbour {nn / 1000:.2f} km "
+          f"-> {cost / 1000:.2f} km ({1 - cost / nn:.1%} shorter)")
+
+    gaps = []
+    for _ in range(args.trials):
+        m = random_matrix(rng, args.small)
+        best = min(path_cost(m, [0, *p]) for p in itertools.permutations(range(1, args.small)))
+        gaps.append(plan_tour(m, time_budget=0.05)[1] / best - 1)
+    print(f"{args.small - 1} stops vs brute force over {args.trials} trials: optimal in "
+          f"{sum(g < 1e-9 for g in gaps)}, worst gap {max(gaps):.2%}, mean gap {np.mean(gaps):.3%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Cost of the tracing spans: per-span overhead with tracing off and on, the
+"Next Step" rerun time of an app untraced vs traced, and the per-stage
+breakdown the traced reruns recorded (what the performance panel shows).
+
+    python benchmarks/bench_tracing.py [--clicks 20] [--app 1.py]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+from mock_overpass import serve_in_background  # noqa: E402
+
+# The apps read the Overpass endpoint and cache path when navigator is imported
+SERVER = serve_in_background()
+os.environ["OVERPASS_URL"] = SERVER.url
+os.environ["NAVIGATOR_CACHE"] = os.path.join(tempfile.mkdtemp(), "poi.sqlite3")
+from navigator import tracing  # noqa: E402
+
+LOCATION = [15.8285, 78.0371]
+
+
+def span_cost(n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with tracing.span("bench"):
+            pass
+    return (time.perf_counter() - t0) / n * 1e9
+
+
+def click(at, label):
+    for button in at.button:
+        if label in button.label:
+            button.click()
+            return at.run()
+    raise LookupError(f"no button {label!r}")
+
+
+# Median "Next Step" rerun of `script`, alternating untraced and traced clicks
+# on one session so both see the same routes and caches
+def rerun_times(script, clicks):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, script), default_timeout=60)
+    at.session_state["user_location"] = list(LOCATION)
+    at.run()
+    click(at, "Search Nearby Places")
+    at.selectbox[0].select([o for o in at.selectbox[0].options if o][-1])
+    at.run()
+    click(at, "Start Navigation")
+    times = {False: [], True: []}
+    for i in range(2 * clicks):
+        if not any("Next Step" in b.label for b in at.button):
+            click(at, "Start Navigation")
+        traced = bool(i % 2)
+        tracing.enable(traced)
+        t0 = time.perf_counter()
+        click(at, "Next Step")
+        times[traced].append(time.perf_counter() - t0)
+    tracing.enable(False)
+    return statistics.median(times[False]), statistics.median(times[True])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clicks", type=int, default=20)
+    parser.add_argument("--app", default="1.py")
+    args = parser.parse_args()
+
+    n = 200_000
+    tracing.enable(False)
+    off = span_cost(n)
+    tracing.enable(True)
+    on = span_cost(n)
+    tracing.enable(False)
+    print(f"span enter/exit: {off:6.0f} ns untraced, {on:6.0f} ns traced")
+
+    plain, traced = rerun_times(args.app, args.clicks)
+    print(f"{args.app} 'Next Step' rerun: untraced {plain * 1e3:6.1f} ms, traced {traced * 1e3:6.1f} ms "
+          f"({(traced - plain) / plain:+.1%}, mostly rerun noise)")
+    runs = dict((name, (count, mean)) for name, count, mean, _ in tracing.metrics.summary()).get("run")
+    if runs:
+        spans = sum(count for name, count, _, _ in tracing.metrics.summary() if name not in ("run", "bench")) / runs[0]
+        print(f"estimated overhead: {spans:.1f} spans/run x {on:.0f} ns = {spans * on / 1e3:.1f} us "
+              f"({spans * on / 1e6 / runs[1]:.3%} of a {runs[1]:.1f} ms traced run)")
+
+    print(f"{'stage':<20} {'count':>6} {'mean ms':>9} {'total ms':>10}")
+    for name, count, mean, total in tracing.metrics.summary():
+        if name != "bench":
+            print(f"{name:<20} {count:>6} {mean:>9.2f} {total:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
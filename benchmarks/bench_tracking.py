@@ -0,0 +1,65 @@
+"""Per-fix cost of RouteTracker for routes from 100 to 1M vertices.
+
+Replays noisy fixes along each route (plus a detour that must trigger the
+off-route flag) and reports microseconds per fix; the cost should stay flat
+as the route grows.
+
+    python benchmarks/bench_tracking.py [--fixes 5000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bench_geometry import sample_route  # noqa: E402
+from navigator.geodesy import segment_lengths  # noqa: E402
+from navigator.routing import TURN, Maneuver, Route  # noqa: E402
+from navigator.tracking import RouteTracker  # noqa: E402
+
+SIZES = (100, 10_000, 100_000, 1_000_000)
+
+
+# Fixes every `spacing` meters along the path with `noise` meters of GPS scatter
+def replay_fixes(path, count, spacing=1.5, noise=4.0, seed=5):
+    rng = np.random.default_rng(seed)
+    pts = np.asarray(path)
+    cum = np.concatenate([[0.0], np.cumsum(segment_lengths(pts))])
+    along = np.minimum(np.arange(count) * spacing, cum[-1])
+    lat = np.interp(along, cum, pts[:, 0]) + rng.normal(0, noise / 111_000, count)
+    lon = np.interp(along, cum, pts[:, 1]) + rng.normal(0, noise / 111_000, count)
+    return np.column_stack([lat, lon]).tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixes", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'vertices':>10}{'fixes':>8}{'us/fix':>10}{'max us':>10}{'steps':>8}{'offroute':>10}")
+    for n in SIZES:
+        path = sample_route(n)
+        turns = list(range(200, n - 1, 200))   # sample_route turns every 200 vertices
+        route = Route(path, float(segment_lengths(path).sum()), [Maneuver(TURN, 0.0, 90.0, 0.0)] * len(turns), turns)
+        fixes = replay_fixes(path, args.fixes)
+        tracker = RouteTracker(route)
+        worst, steps, flagged = 0.0, 0, 0
+        t0 = time.perf_counter()
+        for lat, lon in fixes:
+            t = time.perf_counter()
+            state = tracker.update(lat, lon, accuracy=5.0)
+            worst = max(worst, time.perf_counter() - t)
+            steps = state.step
+        total = time.perf_counter() - t0
+        # Walk 100 m off to the side: needs OFF_ROUTE_FIXES fixes to flag
+        lat, lon = fixes[-1]
+        for _ in range(5):
+            flagged += tracker.update(lat + 0.0009, lon, accuracy=5.0).off_route
+        print(f"{n:>10}{len(fixes):>8}{total / len(fixes) * 1e6:>10.1f}{worst * 1e6:>10.1f}{steps:>8}{flagged:>10}")
+
+
+if __name__ == "__main__":
+    main()
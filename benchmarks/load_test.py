@@ -0,0 +1,114 @@
+"""Many concurrent sessions against a rate-limited Overpass: each simulated
+user lands near one of a few hotspots, the app prefetches the area in the
+background, and after some think time the user searches nearby places.
+Compares the client without a local limit (every session fires as soon as
+it can and the mirror answers 429) with the shared token bucket, where
+searches queue ahead of prefetch and requests stay under the mirror's rate.
+
+    python benchmarks/load_test.py [--sessions 200] [--mirror-rate 2] [--rate 1.5] [--latency 0.3]
+"""
+import argparse
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from navigator import overpass  # noqa: E402
+from navigator.navigation import SEARCH_SELECTORS  # noqa: E402
+from navigator.poi_cache import PoiCache  # noqa: E402
+from navigator.prefetch import Prefetcher  # noqa: E402
+from navigator.upstream import INTERACTIVE, priority  # noqa: E402
+
+HOTSPOTS = [(15.8285, 78.0371), (15.8012, 78.0520), (15.8480, 78.0110), (15.7800, 78.0700)]
+RADIUS = 2000
+LIMIT = 4 * 30
+
+
+def start_mock(latency, rate_limit):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "tools", "mock_overpass.py"), "--port", str(port),
+                             "--latency", str(latency), "--rate-limit", str(rate_limit)], stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return proc, f"http://127.0.0.1:{port}/api/interpreter"
+
+
+# One user: arrive, prefetch in the background, think, then search
+def session(prefetcher, rng, args, latencies, failures):
+    time.sleep(rng.uniform(0, args.arrivals))
+    lat, lon = rng.choice(HOTSPOTS)
+    lat += rng.uniform(-args.jitter, args.jitter)
+    lon += rng.uniform(-args.jitter, args.jitter)
+    try:
+        prefetcher.warm_around(lat, lon, RADIUS, SEARCH_SELECTORS)
+        time.sleep(rng.uniform(0, args.think))
+        t0 = time.perf_counter()
+        with priority(INTERACTIVE):
+            prefetcher.fetch_around(lat, lon, RADIUS, SEARCH_SELECTORS, limit=LIMIT)
+        latencies.append(time.perf_counter() - t0)
+    except overpass.OverpassError:
+        failures.append(1)
+
+
+def run(url, rate, args):
+    client = overpass.OverpassClient(endpoints=(url,), timeout=30, rate=rate, burst=2, pool_size=16)
+    cache = PoiCache(":memory:", fetch=lambda selectors, bboxes: overpass.fetch_boxes(selectors, bboxes, client))
+    prefetcher = Prefetcher(cache, max_workers=8)
+    latencies, failures = [], []
+    rng = random.Random(args.seed)
+    threads = [threading.Thread(target=session, args=(prefetcher, random.Random(rng.random()), args, latencies,
+                                                      failures)) for _ in range(args.sessions)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    latencies.sort()
+    p95 = latencies[int(0.95 * (len(latencies) - 1))] if latencies else float("nan")
+    return {"requests": client.requests_sent, "429s": client.throttled, "coalesced": client.coalesced,
+            "failed": len(failures), "p50": statistics.median(latencies) if latencies else float("nan"),
+            "p95": p95, "max": latencies[-1] if latencies else float("nan"), "wall": wall}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--mirror-rate", type=float, default=2.0, help="requests/second the mock allows")
+    parser.add_argument("--rate", type=float, default=1.5, help="the client's shared limit (requests/second)")
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds per mock response")
+    parser.add_argument("--arrivals", type=float, default=10.0, help="sessions arrive over this many seconds")
+    parser.add_argument("--think", type=float, default=3.0, help="max seconds between prefetch and search")
+    parser.add_argument("--jitter", type=float, default=0.01, help="degrees around each hotspot")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions over {args.arrivals:.0f} s, mirror allows {args.mirror_rate}/s, "
+          f"{args.latency * 1e3:.0f} ms per response")
+    print(f"{'client':<16} {'requests':>8} {'429s':>6} {'coalesced':>9} {'failed':>6} "
+          f"{'p50 s':>7} {'p95 s':>7} {'max s':>7} {'wall s':>7}")
+    for label, rate in (("no local limit", 0), (f"shared {args.rate}/s", args.rate)):
+        # Fresh mirror per mode so its bucket and counters start full
+        proc, url = start_mock(args.latency, args.mirror_rate)
+        try:
+            r = run(url, rate, args)
+        finally:
+            proc.terminate()
+        print(f"{label:<16} {r['requests']:>8} {r['429s']:>6} {r['coalesced']:>9} {r['failed']:>6} "
+              f"{r['p50']:>7.2f} {r['p95']:>7.2f} {r['max']:>7.2f} {r['wall']:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
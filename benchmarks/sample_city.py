@@ -0,0 +1,76 @@
+"""Deterministic synthetic city road network written as an OSM XML extract.
+
+A jittered street grid with missing blocks, diagonal avenues and some
+one-way streets, roughly the size of a mid-sized city's walkable network,
+optionally with tagged POI nodes scattered over it.
+
+    python benchmarks/sample_city.py sample_city.osm.gz --size 150 [--pois 5000]
+"""
+import argparse
+import gzip
+import random
+
+ORIGIN = (15.8285, 78.0371)   # same default location as voice.py
+SPACING = 0.0009              # ~100 m blocks
+POI_KINDS = ("amenity=restaurant", "amenity=cafe", "amenity=pharmacy", "amenity=bank",
+             "shop=supermarket", "shop=bakery", "tourism=hotel", "highway=bus_stop")
+
+
+def write_sample_city(path, size=150, seed=7, pois=0):
+    rng = random.Random(seed)
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<osm version="0.6" generator="sample_city">']
+
+    def node_id(i, j):
+        return i * size + j + 1
+
+    for i in range(size):
+        for j in range(size):
+            lat = ORIGIN[0] + (i - size / 2) * SPACING + rng.uniform(-0.15, 0.15) * SPACING
+            lon = ORIGIN[1] + (j - size / 2) * SPACING + rng.uniform(-0.15, 0.15) * SPACING
+            lines.append(f'<node id="{node_id(i, j)}" lat="{lat:.7f}" lon="{lon:.7f}"/>')
+
+    way_id = 1
+
+    def way(refs, **tags):
+        nonlocal way_id
+        lines.append(f'<way id="{way_id}">')
+        lines.extend(f'<nd ref="{r}"/>' for r in refs)
+        lines.extend(f'<tag k="{k}" v="{v}"/>' for k, v in tags.items())
+        lines.append('</way>')
+        way_id += 1
+
+    for i in range(size):
+        for horizontal in (True, False):
+            kind = "secondary" if i % 10 == 0 else "residential"
+            extra = {"oneway": "yes"} if i % 7 == 3 else {}
+            run = []
+            for j in range(size):
+                run.append(node_id(i, j) if horizontal else node_id(j, i))
+                # Break streets at random to leave dead ends and missing blocks
+                if rng.random() < 0.06 or j == size - 1:
+                    if len(run) > 1:
+                        way(run, highway=kind, **extra)
+                    run = [run[-1]] if rng.random() < 0.5 else []
+    for d in range(0, size, 25):
+        way([node_id(k, k + d) for k in range(size - d)], highway="primary")
+
+    half = size / 2 * SPACING
+    for n in range(pois):
+        key, value = POI_KINDS[n % len(POI_KINDS)].split("=")
+        lat = ORIGIN[0] + rng.uniform(-half, half)
+        lon = ORIGIN[1] + rng.uniform(-half, half)
+        lines.append(f'<node id="{size * size + n + 1}" lat="{lat:.7f}" lon="{lon:.7f}">'
+                     f'<tag k="{key}" v="{value}"/><tag k="name" v="{value.title()} {n}"/></node>')
+
+    lines.append('</osm>')
+    with gzip.open(path, "wt", encoding="utf-8") as fh:
+        fh.write("\n".join(lines))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--size", type=int, default=150)
+    parser.add_argument("--pois", type=int, default=0)
+    args = parser.parse_args()
+    write_sample_city(args.path, args.size, pois=args.pois)
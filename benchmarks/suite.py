@@ -0,0 +1,278 @@
+"""Benchmark suite for the navigation core, run with pytest-benchmark.
+
+Times haversine / get_bearing, instruction rendering, route step
+generation, parsing of a recorded Overpass response and map construction,
+each at several input scales, fully offline. benchmarks/baseline.json is a
+pytest-benchmark report holding each case's median fastest time over
+SAVE_RUNS runs. --check fails when a case stays more than THRESHOLD percent
+slower than that after CONFIRM re-runs; single runs on a shared machine
+differ by well over that. Timings only compare on one machine, so save the
+baseline where the check runs.
+
+    python benchmarks/suite.py [--check] [--save] [-k substring] [--threshold 50]
+    python benchmarks/suite.py --record   # re-record the Overpass fixture from the mock
+    python -m pytest benchmarks/suite.py --benchmark-compare=benchmarks/baseline.json   # one plain run
+"""
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+OVERPASS_FIXTURE = os.path.join(FIXTURES, "overpass_pois.json")
+SUITE = os.path.abspath(__file__)
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Fully offline: no road network, region pack or reachable Overpass mirror
+for var in ("NAVIGATOR_ROADS", "NAVIGATOR_PACK", "NAVIGATOR_TRACING"):
+    os.environ.pop(var, None)
+os.environ["OVERPASS_URL"] = "http://127.0.0.1:9/api/interpreter"
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+from navigator.geodesy import bearings_along, get_bearing, haversine, segment_lengths  # noqa: E402
+from navigator.i18n import CATALOG  # noqa: E402
+from navigator.mapview import base_map, live_layer  # noqa: E402
+from navigator.navigation import build_route, generate_route_steps, get_direction_text  # noqa: E402
+from navigator.overpass import CHUNK_SIZE, iter_elements, slim_element  # noqa: E402
+from navigator.routing import TURN, Maneuver, Route  # noqa: E402
+from navigator.spatial_index import PlaceIndex  # noqa: E402
+
+LOCATION = (15.8285, 78.0371)
+THRESHOLD = 50        # percent slowdown of a case's fastest time that fails --check
+SAVE_RUNS = 3         # runs the baseline takes each case's median from
+CONFIRM = 2           # re-runs of a case over the threshold before it counts as a regression
+CASES = []
+
+
+def case(name, scales):
+    """Register `setup(scale) -> fn`; fn() is the timed call."""
+    def register(setup):
+        CASES.append((name, scales, setup))
+        return setup
+    return register
+
+
+def random_pairs(n, seed=0, spread=0.05):
+    rng = random.Random(seed)
+    return [(LOCATION[0] + rng.uniform(-spread, spread), LOCATION[1] + rng.uniform(-spread, spread),
+             LOCATION[0] + rng.uniform(-spread, spread), LOCATION[1] + rng.uniform(-spread, spread))
+            for _ in range(n)]
+
+
+# A wiggling polyline of `n` vertices heading north-east from LOCATION
+def polyline_route(n, step=0.0001):
+    path = [[LOCATION[0] + i * step + 0.00004 * math.sin(i * 0.7),
+             LOCATION[1] + i * step * 0.6 + 0.00004 * math.cos(i * 1.3)] for i in range(n)]
+    bearings = bearings_along(path)
+    dists = segment_lengths(path)
+    maneuvers = [Maneuver(TURN, float(bearings[i - 1]), float(bearings[i]), float(dists[i - 1]))
+                 for i in range(1, n - 1)]
+    return Route(path, float(dists.sum()), maneuvers, range(1, n - 1))
+
+
+# ==================== CASES ====================
+@case("geodesy.haversine", (1_000, 10_000, 100_000))
+def _haversine(n):
+    pairs = random_pairs(n)
+    return lambda: [haversine(*p) for p in pairs]
+
+
+@case("geodesy.get_bearing", (1_000, 10_000, 100_000))
+def _get_bearing(n):
+    pairs = random_pairs(n)
+    return lambda: [get_bearing(*p) for p in pairs]
+
+
+@case("navigation.get_direction_text", (1_000, 10_000, 100_000))
+def _get_direction_text(n):
+    rng = random.Random(1)
+    locales = list(CATALOG.values())
+    rows = [(rng.uniform(0, 360), rng.uniform(0, 360), rng.uniform(5, 3000), locales[i % len(locales)])
+            for i in range(n)]
+    return lambda: [get_direction_text(b_in, b_out, dist, lang) for b_in, b_out, dist, lang in rows]
+
+
+# Uncached route construction (simulated: no road network offline) ...
+@case("navigation.build_route", (10, 100, 1_000))
+def _build_route(n):
+    pairs = random_pairs(n, seed=2, spread=0.01)
+    return lambda: [build_route([a, b], [c, d]) for a, b, c, d in pairs]
+
+
+# ... and the per-rerun path: route cache hit plus localized rendering
+@case("navigation.generate_route_steps", (10, 100, 1_000))
+def _generate_route_steps(n):
+    pairs = random_pairs(n, seed=3, spread=0.01)
+    lang = CATALOG["hi-IN"]
+    return lambda: [generate_route_steps([a, b], [c, d], lang, namespace="bench") for a, b, c, d in pairs]
+
+
+# Recorded response replicated `copies` times (shifted north, fresh ids)
+def recorded_body(copies):
+    with open(OVERPASS_FIXTURE, encoding="utf-8") as f:
+        recorded = json.load(f)
+    elements = []
+    for k in range(copies):
+        for elem in recorded["elements"]:
+            elements.append(dict(elem, id=elem["id"] + k * 10**12, lat=elem["lat"] + k * 0.05))
+    return json.dumps(dict(recorded, elements=elements)).encode("utf-8")
+
+
+# Decode, index and query the 30 closest places
+@case("overpass.parse", (1, 10, 50))
+def _overpass_parse(copies):
+    raw = recorded_body(copies)
+
+    def parse():
+        index = PlaceIndex()
+        index.add_elements(json.loads(raw)["elements"])
+        return index.places(*LOCATION, 30, radius=2000)
+    return parse
+
+
+# The client's path: elements decoded from response-sized chunks and slimmed
+@case("overpass.stream", (1, 10, 50))
+def _overpass_stream(copies):
+    raw = recorded_body(copies)
+    chunks = [raw[i:i + CHUNK_SIZE] for i in range(0, len(raw), CHUNK_SIZE)]
+    return lambda: [slim_element(elem) for elem in iter_elements(chunks)]
+
+
+# Base map and live layer for a route of `n` vertices, rendered to the
+# Leaflet script st_folium ships
+@case("mapview.build", (100, 1_000, 10_000))
+def _map_build(n):
+    route = polyline_route(n)
+    dest = route.path[-1]
+
+    def build():
+        m = base_map(list(LOCATION), 18, dest, "Destination", route)
+        live_layer(list(LOCATION), 18, route, len(route.maneuvers) // 2).add_to(m)
+        return m.get_root().render()
+    return build
+
+
+# ==================== RUNNER ====================
+# The fastest round is what --check compares: scheduler and cache noise only
+# ever add time, so it is the most reproducible statistic on a shared machine
+@pytest.mark.parametrize("name, scale", [(name, scale) for name, scales, _ in CASES for scale in scales],
+                         ids=lambda value: str(value))
+def test_case(benchmark, name, scale):
+    setup = next(setup for case_name, _, setup in CASES if case_name == name)
+    benchmark.group = name
+    benchmark(setup(scale))
+
+
+def record_fixture():
+    from mock_overpass import serve_in_background
+
+    from navigator.navigation import SEARCH_SELECTORS
+    from navigator.overpass import OverpassClient, build_query
+
+    url = os.environ.get("RECORD_URL") or serve_in_background().url
+    lat, lon = LOCATION
+    box = (lat - 0.02, lon - 0.02, lat + 0.02, lon + 0.02)
+    data = OverpassClient(endpoints=(url,)).query(build_query(SEARCH_SELECTORS, [box]))
+    os.makedirs(FIXTURES, exist_ok=True)
+    with open(OVERPASS_FIXTURE, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    print(f"recorded {len(data.get('elements', []))} elements from {url} to {OVERPASS_FIXTURE}")
+
+
+# One pytest-benchmark run of the named tests (e.g. "test_case[geodesy.haversine-1000]");
+# {test name: benchmark entry}
+def run_cases(names, compare=False):
+    with tempfile.TemporaryDirectory() as tmp:
+        report = os.path.join(tmp, "run.json")
+        command = [sys.executable, "-m", "pytest", *(f"{SUITE}::{name}" for name in names), "--rootdir", ROOT,
+                   "-p", "no:cacheprovider", "-q", "--benchmark-sort=fullname", "--benchmark-columns=min,median,rounds",
+                   f"--benchmark-json={report}"]
+        if compare and os.path.exists(BASELINE):
+            command.append(f"--benchmark-compare={BASELINE}")
+        if subprocess.run(command).returncode != 0:
+            sys.exit("benchmark run failed")
+        with open(report, encoding="utf-8") as f:
+            run = json.load(f)
+    for bench in run["benchmarks"]:
+        bench["stats"].pop("data", None)   # --check only reads the summary statistics
+    return run, {bench["name"]: bench for bench in run["benchmarks"]}
+
+
+def save(names):
+    runs = [run_cases(names) for _ in range(SAVE_RUNS)]
+    report = runs[-1][0]
+    kept = {bench["name"]: bench for bench in load_baseline()[1].values()} if len(names) < len(all_cases()) else {}
+    for name in names:
+        entries = sorted((benches[name] for _, benches in runs), key=lambda bench: bench["stats"]["min"])
+        kept[name] = entries[len(entries) // 2]
+    report["benchmarks"] = [kept[name] for name in sorted(kept)]
+    with open(BASELINE, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+        f.write("\n")
+    print(f"saved {len(names)} cases to {BASELINE}")
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE):
+        return None, {}
+    with open(BASELINE, encoding="utf-8") as f:
+        report = json.load(f)
+    return report, {bench["name"]: bench for bench in report["benchmarks"]}
+
+
+# Regressions as {test name: slowdown ratio}; a case over the threshold is
+# timed again up to CONFIRM times, since a busy neighbour only ever adds time
+def check(names, threshold):
+    base = {name: bench["stats"]["min"] for name, bench in load_baseline()[1].items()}
+    if not base:
+        sys.exit(f"no baseline at {BASELINE}; run with --save first")
+    best = {name: bench["stats"]["min"] for name, bench in run_cases(names, compare=True)[1].items()}
+
+    def slow():
+        return {name: best[name] / base[name] for name in best
+                if name in base and best[name] > base[name] * (1 + threshold / 100)}
+    for _ in range(CONFIRM):
+        if not slow():
+            break
+        for name, bench in run_cases(sorted(slow()))[1].items():
+            best[name] = min(best[name], bench["stats"]["min"])
+    return slow()
+
+
+def all_cases():
+    return [f"test_case[{name}-{scale}]" for name, scales, _ in CASES for scale in scales]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help=f"exit 1 when a case regressed against {BASELINE}")
+    parser.add_argument("--save", action="store_true", help=f"write the results as the new baseline ({BASELINE})")
+    parser.add_argument("-k", dest="keyword", default="", help="only cases whose name contains this")
+    parser.add_argument("--threshold", type=int, default=THRESHOLD, help="percent slowdown that fails --check")
+    parser.add_argument("--record", action="store_true", help="re-record the Overpass fixture (RECORD_URL or the mock)")
+    args = parser.parse_args()
+    if args.record:
+        return record_fixture()
+
+    names = [name for name in all_cases() if args.keyword in name]
+    if args.save:
+        return save(names)
+    if not args.check:
+        run_cases(names, compare=True)
+        return
+    regressions = check(names, args.threshold)
+    if regressions:
+        print("regressions: " + ", ".join(f"{name} {ratio:.2f}x" for name, ratio in sorted(regressions.items())))
+        sys.exit(1)
+    print(f"no case more than {args.threshold}% slower than {BASELINE}")
+
+
+if __name__ == "__main__":
+    main()
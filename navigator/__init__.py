@@ -0,0 +1,9 @@
+# Shared navigation core used by both Streamlit entry points (1.py, voice.py),
+# importable on its own for batch work (navigator.bulk, `python -m navigator`)
+from .geodesy import haversine, get_bearing
+from .i18n import CATALOG, Locale
+from .navigation import (
+    ENGLISH, get_direction_text, render_route_steps, build_route, generate_route_steps, fetch_nearby_places,
+)
+from .bulk import read_pairs, plan_pairs, write_results
+from .region_pack import RegionPack, build_pack
@@ -0,0 +1,80 @@
+"""Command line for the navigation core.
+
+    python -m navigator plan pairs.csv -o routes.csv [--workers 8] [--steps] [--lang hi-IN] [--roads city.osm.gz]
+    python -m navigator nearby 17.385 78.4867 [--radius 2000] [--limit 30]
+    python -m navigator pack city.osm.gz -o city.navpack [--name city] [--version 2026.10]
+
+Set NAVIGATOR_PACK=city.navpack to search and route from the pack without network.
+"""
+import argparse
+import sys
+import time
+
+from .bulk import plan_pairs, read_pairs, write_results
+from .i18n import CATALOG
+from .navigation import fetch_nearby_places
+from .overpass import OverpassError
+from .region_pack import build_pack
+
+
+def cmd_plan(args):
+    t0 = time.perf_counter()
+    results = plan_pairs(read_pairs(args.pairs), workers=args.workers, lang=CATALOG[args.lang], steps=args.steps,
+                         chunk_size=args.chunk_size, roads=args.roads)
+    count = write_results(results, args.output)
+    elapsed = time.perf_counter() - t0
+    print(f"planned {count} pairs in {elapsed:.1f} s ({count / max(elapsed, 1e-9):.0f} pairs/s)", file=sys.stderr)
+
+
+def cmd_nearby(args):
+    try:
+        places = fetch_nearby_places(args.lat, args.lon, args.radius, args.limit)
+    except OverpassError as e:
+        sys.exit(f"Could not fetch nearby places: {e}")
+    for name, lat, lon, dist in places:
+        print(f"{int(dist):>6} m  {lat:.6f},{lon:.6f}  {name}")
+
+
+def cmd_pack(args):
+    t0 = time.perf_counter()
+    header = build_pack(args.extract, args.output, name=args.name, version=args.version, oneway=args.oneway)
+    counts = header["counts"]
+    print(f"{header['name']} {header['version']}: {counts['pois']} places, {counts['nodes']} road nodes, "
+          f"{counts['arcs']} arcs -> {args.output} in {time.perf_counter() - t0:.1f} s", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m navigator", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan = commands.add_parser("plan", help="route origin-destination pairs from CSV/Parquet")
+    plan.add_argument("pairs", help="file with origin_lat, origin_lon, dest_lat, dest_lon (and optional id) columns")
+    plan.add_argument("-o", "--output", default="-", help="CSV, .jsonl or .parquet; '-' for CSV on stdout")
+    plan.add_argument("--workers", type=int, default=None, help="processes (default: one per core)")
+    plan.add_argument("--chunk-size", type=int, default=256)
+    plan.add_argument("--steps", action="store_true", help="include the turn-by-turn instructions")
+    plan.add_argument("--lang", default="en-US", choices=sorted(CATALOG), help="language of --steps")
+    plan.add_argument("--roads", help="OSM extract to route on (default: $NAVIGATOR_ROADS)")
+    plan.set_defaults(func=cmd_plan)
+
+    nearby = commands.add_parser("nearby", help="named places around a point")
+    nearby.add_argument("lat", type=float)
+    nearby.add_argument("lon", type=float)
+    nearby.add_argument("--radius", type=int, default=2000)
+    nearby.add_argument("--limit", type=int, default=30)
+    nearby.set_defaults(func=cmd_nearby)
+
+    pack = commands.add_parser("pack", help="build an offline region pack from an OSM extract")
+    pack.add_argument("extract", help="OSM XML (.osm[.gz|.bz2]) or Overpass JSON (.json[.gz])")
+    pack.add_argument("-o", "--output", required=True)
+    pack.add_argument("--name", help="region name (default: extract file name)")
+    pack.add_argument("--version", help="data version (default: today, YYYYMMDD)")
+    pack.add_argument("--oneway", action="store_true", help="honour oneway tags (driving) instead of walking")
+    pack.set_defaults(func=cmd_pack)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import csv
+import json
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from .geodesy import haversine
+from .navigation import ARRIVE_WITHIN, ENGLISH, render_route_steps, simulated_route
+from .routing import Route, default_graph, plan_route
+
+CHUNK_SIZE = 256      # OD pairs per task; large enough to amortize pickling
+INFLIGHT_PER_WORKER = 4
+PAIR_COLUMNS = ("origin_lat", "origin_lon", "dest_lat", "dest_lon")
+RESULT_COLUMNS = ("id", "origin_lat", "origin_lon", "dest_lat", "dest_lon", "straight_m", "route_m",
+                  "maneuvers", "source", "steps")
+
+
+# ==================== INPUT ====================
+def _pair(row, n):
+    return (row.get("id") or str(n), float(row["origin_lat"]), float(row["origin_lon"]),
+            float(row["dest_lat"]), float(row["dest_lon"]))
+
+
+# OD pairs as (id, origin_lat, origin_lon, dest_lat, dest_lon), streamed from a CSV
+# or Parquet file with those column names (`id` optional, defaults to the row number)
+def read_pairs(path):
+    if path.endswith(".parquet"):
+        yield from _read_parquet(path)
+        return
+    with open(path, newline="", encoding="utf-8") as f:
+        for n, row in enumerate(csv.DictReader(f)):
+            yield _pair(row, n)
+
+
+def _read_parquet(path):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("reading Parquet needs pyarrow (pip install pyarrow)") from exc
+    parquet = pq.ParquetFile(path)
+    columns = [c for c in ("id",) + PAIR_COLUMNS if c in parquet.schema_arrow.names]
+    n = 0
+    for batch in parquet.iter_batches(batch_size=65_536, columns=columns):
+        for row in batch.to_pylist():
+            yield _pair(row, n)
+            n += 1
+
+
+# ==================== PLANNING ====================
+# Same decisions as navigation.build_route, but records where the route came from
+def plan_pair(pair, lang=ENGLISH, steps=False):
+    pid, o_lat, o_lon, d_lat, d_lon = pair
+    start, end = [o_lat, o_lon], [d_lat, d_lon]
+    straight = haversine(o_lat, o_lon, d_lat, d_lon)
+    if straight < ARRIVE_WITHIN:
+        route, source = Route([start, end], straight, []), "arrived"
+    else:
+        route, source = plan_route(start, end), "network"
+        if route is None:
+            route, source = simulated_route(start, end, straight), "simulated"
+    return {
+        "id": pid, "origin_lat": o_lat, "origin_lon": o_lon, "dest_lat": d_lat, "dest_lon": d_lon,
+        "straight_m": round(straight, 1),
+        "route_m": round(route.distance, 1),
+        "maneuvers": len(route.maneuvers),
+        "source": source,
+        "steps": " | ".join(render_route_steps(route, lang)) if steps else "",
+    }
+
+
+def _plan_chunk(chunk, lang, steps):
+    return [plan_pair(pair, lang, steps) for pair in chunk]
+
+
+# Runs in each worker: point it at the road extract and load the graph once
+def _init_worker(roads):
+    if roads:
+        os.environ["NAVIGATOR_ROADS"] = roads
+    default_graph()
+
+
+def _chunks(pairs, size):
+    it = iter(pairs)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def plan_pairs(pairs, workers=None, lang=ENGLISH, steps=False, chunk_size=CHUNK_SIZE, roads=None):
+    """Plan every OD pair, yielding result dicts in input order.
+
+    Pairs are cut into chunks and fanned out over a process pool (each worker
+    loads the road graph once); only a few chunks per worker are in flight,
+    so input and output are streamed and memory stays flat however many
+    pairs there are. workers=1 plans in this process.
+    """
+    roads = roads or os.environ.get("NAVIGATOR_ROADS")
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(roads)
+        for chunk in _chunks(pairs, chunk_size):
+            yield from _plan_chunk(chunk, lang, steps)
+        return
+    if multiprocessing.get_start_method() == "fork":
+        _init_worker(roads)   # forked workers inherit the loaded graph instead of parsing it again
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(roads,)) as pool:
+        pending = deque()
+        for chunk in _chunks(pairs, chunk_size):
+            pending.append(pool.submit(_plan_chunk, chunk, lang, steps))
+            if len(pending) >= workers * INFLIGHT_PER_WORKER:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+# ==================== OUTPUT ====================
+# Streams results to CSV, JSON lines or Parquet (by extension; "-" is CSV on stdout);
+# returns the row count
+def write_results(results, path, batch_size=65_536):
+    if path.endswith(".parquet"):
+        return _write_parquet(results, path, batch_size)
+    if path == "-":
+        return _write_text(results, sys.stdout, jsonl=False)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        return _write_text(results, f, jsonl=path.endswith(".jsonl"))
+
+
+def _write_text(results, f, jsonl):
+    count = 0
+    if jsonl:
+        for row in results:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+        return count
+    writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+    writer.writeheader()
+    for row in results:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def _write_parquet(results, path, batch_size):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("writing Parquet needs pyarrow (pip install pyarrow)") from exc
+    writer, count = None, 0
+    for batch in _chunks(results, batch_size):
+        table = pa.Table.from_pylist(batch)
+        if writer is None:
+            writer = pq.ParquetWriter(path, table.schema)
+        writer.write_table(table)
+        count += len(batch)
+    if writer is not None:
+        writer.close()
+    return count
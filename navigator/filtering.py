@@ -0,0 +1,132 @@
+import math
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from datetime import datetime
+
+from .geometry import M_PER_DEG
+
+ACCELERATION_NOISE = 1.5   # m/s² of unmodelled acceleration (walking / city driving)
+MIN_ACCURACY = 3.0         # meters; receivers sometimes report optimistic values
+DEFAULT_ACCURACY = 10.0    # meters, for fixes that report none (GPX tracks)
+GATE = 13.8                # chi-square, 2 dof, 99.9%: innovations beyond this are outliers
+MAX_REJECTS = 5            # consecutive outliers before trusting the fixes again (tunnel exit, jump)
+HEADING_MIN_SPEED = 0.5    # m/s; below this the heading is held
+
+# One filtered fix: position, speed (m/s), heading (degrees from north),
+# 1-sigma position accuracy (m), the input timestamp (ms) and whether the
+# raw fix was rejected as an outlier (the position is then the prediction)
+SmoothedFix = namedtuple("SmoothedFix", "latitude longitude speed heading accuracy timestamp rejected")
+
+
+class KalmanFilter:
+    """Constant-velocity Kalman filter for position fixes, weighted by their accuracy.
+
+    State is position and velocity in a local metric frame anchored at the
+    first fix. Measurement noise is isotropic, so the east and north axes share
+    one 2x2 covariance and every update is a handful of float operations: no
+    arrays and constant memory per fix.
+    """
+
+    def __init__(self, acceleration_noise=ACCELERATION_NOISE, gate=GATE, max_rejects=MAX_REJECTS):
+        self.q = acceleration_noise ** 2
+        self.gate = gate
+        self.max_rejects = max_rejects
+        self.lat0 = None
+        self.rejects = 0
+        self.heading = 0.0
+
+    def _reset(self, fix, variance):
+        lat, lon = fix["latitude"], fix["longitude"]
+        self.lat0, self.lon0 = lat, lon
+        self.kx = M_PER_DEG * math.cos(math.radians(lat))
+        self.x = self.y = self.vx = self.vy = 0.0
+        # Shared covariance [[p00, p01], [p01, p11]] of (position, velocity) per axis
+        self.p00, self.p01, self.p11 = variance, 0.0, 100.0
+        self.t = fix.get("timestamp")
+        self.rejects = 0
+
+    def _output(self, fix, rejected):
+        speed = math.hypot(self.vx, self.vy)
+        if speed >= HEADING_MIN_SPEED:
+            self.heading = math.degrees(math.atan2(self.vx, self.vy)) % 360
+        return SmoothedFix(self.lat0 + self.y / M_PER_DEG, self.lon0 + self.x / self.kx, speed,
+                           self.heading, math.sqrt(self.p00), fix.get("timestamp"), rejected)
+
+    def update(self, fix):
+        """Filter one raw fix (dict with latitude, longitude and optionally
+        accuracy in meters and timestamp in milliseconds)."""
+        # Only a missing accuracy gets the default; a reported 0 is floored like any optimistic value
+        accuracy = fix.get("accuracy")
+        sigma = max(DEFAULT_ACCURACY if accuracy is None else accuracy, MIN_ACCURACY)
+        r = sigma * sigma
+        if self.lat0 is None:
+            self._reset(fix, r)
+            return self._output(fix, False)
+
+        # Predict
+        t = fix.get("timestamp")
+        dt = (t - self.t) / 1000.0 if t is not None and self.t is not None else 1.0
+        if dt > 0:
+            self.x += self.vx * dt
+            self.y += self.vy * dt
+            q = self.q
+            p00 = self.p00 + dt * (2 * self.p01 + dt * self.p11) + q * dt ** 3 / 3
+            p01 = self.p01 + dt * self.p11 + q * dt * dt / 2
+            self.p00, self.p01, self.p11 = p00, p01, self.p11 + q * dt
+            self.t = t
+
+        # Gate on the Mahalanobis distance of the innovation
+        ix = (fix["longitude"] - self.lon0) * self.kx - self.x
+        iy = (fix["latitude"] - self.lat0) * M_PER_DEG - self.y
+        s = self.p00 + r
+        if (ix * ix + iy * iy) / s > self.gate:
+            self.rejects += 1
+            if self.rejects <= self.max_rejects:
+                return self._output(fix, True)
+            self._reset(fix, r)
+            return self._output(fix, False)
+        self.rejects = 0
+
+        # Correct
+        k0, k1 = self.p00 / s, self.p01 / s
+        self.x += k0 * ix
+        self.y += k0 * iy
+        self.vx += k1 * ix
+        self.vy += k1 * iy
+        self.p00, self.p01, self.p11 = (1 - k0) * self.p00, (1 - k0) * self.p01, self.p11 - k1 * self.p01
+        return self._output(fix, False)
+
+
+# Streaming stage: raw fixes in, SmoothedFix out, one for one, in constant memory
+def smooth_fixes(fixes, **options):
+    kalman = KalmanFilter(**options)
+    for fix in fixes:
+        yield kalman.update(fix)
+
+
+# ==================== GPX ====================
+def _gpx_time(text):
+    return datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp() * 1000.0
+
+
+# Track points of a GPX file as fix dicts, streamed with iterparse. GPX has no
+# accuracy field; hdop (when present) is scaled to meters with a nominal UERE.
+def read_gpx(path, uere=5.0):
+    segment = None
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            if elem.tag.endswith("trkseg"):
+                segment = elem
+            continue
+        if not elem.tag.endswith("trkpt"):
+            continue
+        fix = {"latitude": float(elem.get("lat")), "longitude": float(elem.get("lon")), "accuracy": None, "timestamp": None}
+        for child in elem:
+            tag = child.tag.rsplit("}", 1)[-1]
+            if tag == "time":
+                fix["timestamp"] = _gpx_time(child.text)
+            elif tag == "hdop":
+                fix["accuracy"] = float(child.text) * uere
+        if segment is not None:
+            segment.clear()   # drop parsed points so memory stays flat on long tracks
+        yield fix
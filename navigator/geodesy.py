@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+
+R = 6371000
+
+
+# Haversine distance in meters (scalar fast path for a single pair)
+def haversine(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    delta_phi = math.radians(lat2 - lat1)
+    delta_lambda = math.radians(lon2 - lon1)
+    a = math.sin(delta_phi / 2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return R * c
+
+
+# Initial bearing in degrees [0, 360) from point 1 to point 2
+def get_bearing(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+    dlon = lon2 - lon1
+    y = math.sin(dlon) * math.cos(lat2)
+    x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(dlon)
+    bearing = math.degrees(math.atan2(y, x))
+    return (bearing + 360) % 360
+
+
+# ==================== BATCHED (NUMPY) VERSIONS ====================
+# All array functions take degrees and broadcast like ordinary NumPy ufuncs.
+
+def haversine_np(lat1, lon1, lat2, lon2):
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = np.radians(np.subtract(lon2, lon1))
+    a = np.sin(dphi * 0.5)**2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb * 0.5)**2
+    return 2 * R * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bearing_np(lat1, lon1, lat2, lon2):
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dlmb = np.radians(np.subtract(lon2, lon1))
+    cos_phi2 = np.cos(phi2)
+    y = np.sin(dlmb) * cos_phi2
+    x = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * cos_phi2 * np.cos(dlmb)
+    return np.degrees(np.arctan2(y, x)) % 360
+
+
+# (N, 2) float array of [lat, lon] rows
+def as_points(points):
+    return np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+
+# Distances in meters from one point to many
+def distances_from(point, points):
+    pts = as_points(points)
+    return haversine_np(point[0], point[1], pts[:, 0], pts[:, 1])
+
+
+# Full (N, M) distance matrix between two point sets
+def pairwise_distances(points_a, points_b=None):
+    a = as_points(points_a)
+    b = a if points_b is None else as_points(points_b)
+    return haversine_np(a[:, 0, None], a[:, 1, None], b[None, :, 0], b[None, :, 1])
+
+
+# Length of each segment of a polyline (N points -> N-1 lengths)
+def segment_lengths(polyline):
+    pts = as_points(polyline)
+    return haversine_np(pts[:-1, 0], pts[:-1, 1], pts[1:, 0], pts[1:, 1])
+
+
+# Bearing of each segment of a polyline (N points -> N-1 bearings)
+def bearings_along(polyline):
+    pts = as_points(polyline)
+    return bearing_np(pts[:-1, 0], pts[:-1, 1], pts[1:, 0], pts[1:, 1])
@@ -0,0 +1,180 @@
+import heapq
+import math
+
+import numpy as np
+
+from .geodesy import R, as_points
+
+M_PER_DEG = math.pi * R / 180
+EQUATOR_M_PER_PX = 2 * math.pi * R / 256   # Web Mercator ground resolution at zoom 0
+PIXEL_TOLERANCE = 0.5                       # simplify to half a screen pixel
+
+
+# ==================== PROJECTION ====================
+# Local equirectangular projection to meters around `lat0` (default: the polyline's
+# mean latitude); accurate to well under a meter over the few kilometers a route covers
+def project(points, lat0=None):
+    pts = as_points(points)
+    if not len(pts):
+        return np.empty((0, 2))
+    if lat0 is None:
+        lat0 = float(pts[:, 0].mean())
+    kx = M_PER_DEG * math.cos(math.radians(lat0))
+    return np.column_stack([pts[:, 1] * kx, pts[:, 0] * M_PER_DEG])
+
+
+SMALL_SPAN = 32   # below this many vertices a plain loop beats NumPy call overhead
+
+
+# Distance in meters from each row of xy to the segment a-b
+def _segment_distances(xy, a, b):
+    ab = b - a
+    denom = float(ab @ ab)
+    if denom == 0.0:
+        return np.hypot(xy[:, 0] - a[0], xy[:, 1] - a[1])
+    t = np.clip(((xy - a) @ ab) / denom, 0.0, 1.0)
+    return np.hypot(xy[:, 0] - a[0] - t * ab[0], xy[:, 1] - a[1] - t * ab[1])
+
+
+# ==================== DOUGLAS-PEUCKER ====================
+def dp_importance(points):
+    """Douglas-Peucker tolerance (meters) at which each vertex would be dropped.
+
+    A vertex survives simplification at tolerance t iff its value is > t, so
+    one O(n log n) pass (typical case) serves every tolerance. Each value is
+    capped by its parent split, which makes the levels nest.
+    """
+    xy = project(points)
+    n = len(xy)
+    importance = [math.inf] * n
+    if n < 3:
+        return np.asarray(importance)
+    xs, ys = xy[:, 0].tolist(), xy[:, 1].tolist()
+    stack = [(0, n - 1, math.inf)]
+    while stack:
+        a, b, cap = stack.pop()
+        if b - a < 2:
+            continue
+        if b - a > SMALL_SPAN:
+            d = _segment_distances(xy[a + 1:b], xy[a], xy[b])
+            k = int(np.argmax(d))
+            i, dist = a + 1 + k, float(d[k])
+        else:
+            i, dist = _farthest(xs, ys, a, b)
+        importance[i] = dist = min(dist, cap)
+        stack.append((a, i, dist))
+        stack.append((i, b, dist))
+    return np.asarray(importance)
+
+
+# Scalar twin of _segment_distances + argmax for short spans
+def _farthest(xs, ys, a, b):
+    ax, ay = xs[a], ys[a]
+    abx, aby = xs[b] - ax, ys[b] - ay
+    denom = abx * abx + aby * aby
+    best, best_i = -1.0, a + 1
+    for i in range(a + 1, b):
+        px, py = xs[i] - ax, ys[i] - ay
+        t = 0.0 if denom == 0.0 else min(1.0, max(0.0, (px * abx + py * aby) / denom))
+        dx, dy = px - t * abx, py - t * aby
+        d = dx * dx + dy * dy
+        if d > best:
+            best, best_i = d, i
+    return best_i, math.sqrt(best)
+
+
+def douglas_peucker(points, tolerance):
+    pts = as_points(points)
+    return pts[dp_importance(pts) > tolerance].tolist()
+
+
+# ==================== VISVALINGAM-WHYATT ====================
+def _triangle_area(xy, i, j, k):
+    return abs((xy[j, 0] - xy[i, 0]) * (xy[k, 1] - xy[i, 1]) - (xy[k, 0] - xy[i, 0]) * (xy[j, 1] - xy[i, 1])) * 0.5
+
+
+def vw_importance(points):
+    """Effective area (m²) at which Visvalingam-Whyatt removes each vertex.
+
+    Values never decrease in removal order, so keeping `area > threshold`
+    reproduces the algorithm for any threshold.
+    """
+    xy = project(points)
+    n = len(xy)
+    importance = np.full(n, np.inf)
+    if n < 3:
+        return importance
+    prev = list(range(-1, n - 1))
+    nxt = list(range(1, n + 1))
+    area = [math.inf] + [_triangle_area(xy, i - 1, i, i + 1) for i in range(1, n - 1)] + [math.inf]
+    heap = [(area[i], i) for i in range(1, n - 1)]
+    heapq.heapify(heap)
+    removed = [False] * n
+    floor = 0.0
+    while heap:
+        a, i = heapq.heappop(heap)
+        if removed[i] or a != area[i]:
+            continue   # stale entry
+        floor = max(floor, a)
+        importance[i] = floor
+        removed[i] = True
+        p, q = prev[i], nxt[i]
+        nxt[p], prev[q] = q, p
+        for j in (p, q):
+            if 0 < j < n - 1:
+                area[j] = _triangle_area(xy, prev[j], j, nxt[j])
+                heapq.heappush(heap, (area[j], j))
+    return importance
+
+
+def visvalingam(points, min_area):
+    pts = as_points(points)
+    return pts[vw_importance(pts) > min_area].tolist()
+
+
+# ==================== LEVELS OF DETAIL ====================
+# Ground size of one screen pixel at a zoom level (Web Mercator)
+def meters_per_pixel(lat, zoom):
+    return EQUATOR_M_PER_PX * math.cos(math.radians(lat)) / 2 ** zoom
+
+
+# Vertices of `points` worth drawing at `zoom`; pass a precomputed dp_importance
+# to make repeated calls (one per zoom) a single O(n) mask
+def simplify_for_zoom(points, zoom, importance=None, pixels=PIXEL_TOLERANCE):
+    pts = as_points(points)
+    if len(pts) < 3:
+        return pts.tolist()
+    if importance is None:
+        importance = dp_importance(pts)
+    tolerance = pixels * meters_per_pixel(float(pts[:, 0].mean()), zoom)
+    return pts[importance > tolerance].tolist()
+
+
+# ==================== ENCODED POLYLINE ====================
+# Google encoded polyline algorithm (precision 5 = ~1 m), as used by Leaflet.encoded
+def encode_polyline(points, precision=5):
+    pts = as_points(points)
+    if not len(pts):
+        return ""
+    ints = np.round(pts * 10 ** precision).astype(np.int64)
+    deltas = np.diff(ints, axis=0, prepend=[[0, 0]]).ravel()
+    chunks = []
+    for value in ((deltas << 1) ^ (deltas >> 63)).tolist():   # zigzag: sign into the low bit
+        while value >= 0x20:
+            chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+            value >>= 5
+        chunks.append(chr(value + 63))
+    return "".join(chunks)
+
+
+def decode_polyline(encoded, precision=5):
+    values, value, shift = [], 0, 0
+    for char in encoded:
+        b = ord(char) - 63
+        value |= (b & 0x1F) << shift
+        shift += 5
+        if b < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+    coords = np.cumsum(np.asarray(values, dtype=np.int64).reshape(-1, 2), axis=0) / 10 ** precision
+    return coords.tolist()
@@ -0,0 +1,13 @@
+import os
+
+import streamlit.components.v1 as components
+
+_FRONTEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "gps_stream")
+_gps_stream = components.declare_component("gps_stream", path=_FRONTEND)
+
+
+# Latest fix from the browser's watchPosition, or None before the first one.
+# Every new fix reruns the app; `seq` increases by one per fix so callers can
+# tell a new fix from a rerun caused by something else.
+def gps_stream(key="gps_stream", min_interval_ms=1000, min_move_m=2):
+    return _gps_stream(key=key, min_interval_ms=min_interval_ms, min_move_m=min_move_m, default=None)
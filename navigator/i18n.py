@@ -0,0 +1,179 @@
+# Message catalog shared by both apps, the bulk API and the CLI. The source
+# phrases below are compiled once at import into Locale objects; rendered
+# instructions are cached per (template, rounded distance), and distances are
+# quantized, so re-rendering a route is mostly dictionary lookups whatever
+# the number of languages.
+
+MESSAGES = {
+    "en-US": {
+        "label": "English 🇬🇧",
+        "plural": "en",
+        "grouping": "western",
+        "straight": "Go straight",
+        "right": "Turn right",
+        "sharp_right": "Turn sharply right",
+        "left": "Turn left",
+        "sharp_left": "Turn sharply left",
+        "arrived": "You have arrived at your destination!",
+        "go_straight": "{turn} for {distance}",
+        "turn": "{turn} in {distance}",
+        "stop": "Stop {n} in {distance}: {name}",
+        "remaining": "{distance} to go",
+        "meter": {"one": "meter", "other": "meters"},
+        "kilometer": {"one": "kilometer", "other": "kilometers"},
+    },
+    "hi-IN": {
+        "label": "Hindi हिन्दी 🇮🇳",
+        "plural": "hi",
+        "grouping": "indian",
+        "straight": "सीधे चलें",
+        "right": "दाएँ मुड़ें",
+        "sharp_right": "तेज दाएँ मुड़ें",
+        "left": "बाएँ मुड़ें",
+        "sharp_left": "तेज बाएँ मुड़ें",
+        "arrived": "आप अपने गंतव्य पर पहुँच गए हैं!",
+        "go_straight": "{distance} तक {turn}",
+        "turn": "{distance} बाद {turn}",
+        "stop": "{distance} बाद पड़ाव {n}: {name}",
+        "remaining": "{distance} बाकी",
+        "meter": {"one": "मीटर", "other": "मीटर"},
+        "kilometer": {"one": "किलोमीटर", "other": "किलोमीटर"},
+    },
+    "te-IN": {
+        "label": "Telugu తెలుగు 🇮🇳",
+        "plural": "te",
+        "grouping": "indian",
+        "straight": "నేరుగా వెళ్ళండి",
+        "right": "కుడి వైపు తిరగండి",
+        "sharp_right": "తీవ్రంగా కుడి మలుపు",
+        "left": "ఎడమ వైపు తిరగండి",
+        "sharp_left": "తీవ్రంగా ఎడమ మలుపు",
+        "arrived": "మీరు మీ గమ్యానికి చేరుకున్నారు!",
+        "go_straight": "{distance} వరకు {turn}",
+        "turn": "{distance} తర్వాత {turn}",
+        "stop": "{distance} తర్వాత స్టాప్ {n}: {name}",
+        "remaining": "{distance} మిగిలి ఉంది",
+        "meter": {"one": "మీటరు", "other": "మీటర్లు"},
+        "kilometer": {"one": "కిలోమీటరు", "other": "కిలోమీటర్లు"},
+    },
+}
+
+
+# CLDR cardinal rules: `i` is the integer part, `v` the number of visible decimals
+PLURAL_RULES = {
+    "en": lambda n, i, v: "one" if i == 1 and v == 0 else "other",
+    "hi": lambda n, i, v: "one" if i == 0 or n == 1 else "other",
+    "te": lambda n, i, v: "one" if n == 1 else "other",
+}
+MAX_CACHED = 16384   # rendered strings per locale
+
+
+# Distance as announced: (value, decimals, unit). Meters go to the nearest
+# 5 below 50 m, 10 below 200 m and 50 below 1 km; kilometers keep one
+# decimal below 10 km ("1.2 km") and none above.
+def round_distance(meters):
+    meters = max(float(meters), 0.0)
+    step = 5 if meters < 50 else 10 if meters < 200 else 50
+    rounded = max(step, int(round(meters / step)) * step)
+    if rounded < 1000:
+        return rounded, 0, "meter"
+    km = meters / 1000
+    if km < 9.95:
+        km = round(km, 1)
+        return (int(km), 0, "kilometer") if km == int(km) else (km, 1, "kilometer")
+    return int(round(km)), 0, "kilometer"
+
+
+def group_digits(digits, style):
+    if len(digits) <= 3:
+        return digits
+    head, tail = digits[:-3], digits[-3:]
+    size = 2 if style == "indian" else 3   # 12,34,567 vs 1,234,567
+    groups = []
+    while head:
+        groups.insert(0, head[-size:])
+        head = head[:-size]
+    return ",".join(groups + [tail])
+
+
+class Locale:
+    """One compiled language of the catalog.
+
+    Plain phrases are available as `locale["arrived"]`; the methods render
+    templated messages with the locale's plural rule, digit grouping and
+    distance rounding.
+    """
+
+    def __init__(self, code, messages):
+        self.code = code
+        self.label = messages["label"]
+        self.grouping = messages["grouping"]
+        self._plural = PLURAL_RULES[messages["plural"]]
+        self._phrases = {k: v for k, v in messages.items() if isinstance(v, str)}
+        self._units = {unit: messages[unit] for unit in ("meter", "kilometer")}
+        # Bound str.format methods: the template is parsed once, here
+        self._templates = {k: v.format for k, v in self._phrases.items() if "{" in v}
+        self._cache = {}
+
+    def __getitem__(self, key):
+        return self._phrases[key]
+
+    def __repr__(self):
+        return f"Locale({self.code!r})"
+
+    # Pickled by code (bulk workers), so the catalog is never copied
+    def __reduce__(self):
+        return get_locale, (self.code,)
+
+    def number(self, value, decimals=0):
+        text = f"{value:.{decimals}f}"
+        whole, _, frac = text.partition(".")
+        sign = "-" if whole.startswith("-") else ""
+        whole = group_digits(whole.lstrip("-"), self.grouping)
+        return sign + whole + ("." + frac if frac else "")
+
+    def plural(self, value, decimals=0):
+        return self._plural(value, int(value), decimals)
+
+    def distance(self, meters):
+        """Rounded distance with its unit, e.g. "200 meters" or "1.2 kilometers"."""
+        value, decimals, unit = round_distance(meters)
+        key = ("distance", value, decimals)
+        text = self._cache.get(key)
+        if text is None:
+            text = f"{self.number(value, decimals)} {self._units[unit][self.plural(value, decimals)]}"
+            self._remember(key, text)
+        return text
+
+    def turn(self, turn, meters):
+        """Instruction for `turn` (straight, right, sharp_right, left, sharp_left) after `meters`."""
+        # Below 1 km whole meters key the cache directly, so a hit skips the rounding
+        if meters < 999.5:
+            meters = int(meters + 0.5)
+            key = (turn, meters)
+        else:
+            key = (turn, round_distance(meters))
+        text = self._cache.get(key)
+        if text is None:
+            template = self._templates["go_straight" if turn == "straight" else "turn"]
+            text = template(turn=self._phrases[turn], distance=self.distance(meters))
+            self._remember(key, text)
+        return text
+
+    def stop(self, n, name, meters):
+        return self._templates["stop"](n=self.number(n), name=name, distance=self.distance(meters))
+
+    def remaining(self, meters):
+        return self._templates["remaining"](distance=self.distance(meters))
+
+    def _remember(self, key, text):
+        if len(self._cache) >= MAX_CACHED:
+            self._cache.clear()
+        self._cache[key] = text
+
+
+CATALOG = {code: Locale(code, messages) for code, messages in MESSAGES.items()}
+
+
+def get_locale(code):
+    return CATALOG[code]
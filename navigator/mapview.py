@@ -0,0 +1,55 @@
+import folium
+from folium.plugins import PolyLineFromEncoded
+
+from .geometry import encode_polyline
+
+ROUTE_STYLE = {"color": "#00D4FF", "weight": 8, "opacity": 0.8}
+PROGRESS_STYLE = {"color": "#2ECC71", "weight": 8, "opacity": 0.95}
+
+
+# Route line sized for the zoom: vertices below half a pixel are dropped and the
+# rest shipped as an encoded polyline (Leaflet.encoded, decoded in the browser)
+def route_line(route, zoom, end=None, **style):
+    return PolyLineFromEncoded(encode_polyline(route.simplified(zoom, end)), **style)
+
+
+# Static layers for one view: tiles, destination and the full route.
+# st_folium keys the browser map on a hash of this map's Leaflet script, so it must
+# render identically on every rerun of the same view: no popups (their Html gets a
+# random id each time), plain tooltips only, and a fixed center.
+def base_map(center, zoom, dest=None, dest_name=None, route=None, dest_icon="flag", stops=()):
+    m = folium.Map(location=center, zoom_start=zoom)
+    # Intermediate errand stops (the last one is `dest`)
+    for n, (name, coords) in enumerate(stops[:-1], 1):
+        folium.Marker(coords, tooltip=f"{n}. {name}", icon=folium.Icon(color="orange", icon="shopping-basket", prefix="fa")).add_to(m)
+    if dest:
+        folium.Marker(dest, tooltip=dest_name, icon=folium.Icon(color="red", icon=dest_icon, prefix="fa")).add_to(m)
+        if route is not None and len(route.path) > 1:
+            route_line(route, zoom, **ROUTE_STYLE).add_to(m)
+        else:
+            folium.PolyLine([center, dest], **ROUTE_STYLE).add_to(m)
+    return m
+
+
+# Map center for the current view (e.g. destination + route), kept in
+# `state["map_view"]` (the app's session state) and fixed until the view changes,
+# so base_map renders the same and the browser keeps the map loaded
+def map_center(state, view, location):
+    if state.get("map_view") is None or state["map_view"][0] != view:
+        state["map_view"] = (view, list(location))
+    return state["map_view"][1]
+
+
+# Per-rerun overlay pushed into the already loaded map: position marker,
+# travelled part of the route and the point of the current instruction.
+# The progress line relies on base_map having loaded Leaflet.encoded for the route.
+def live_layer(position, zoom, route=None, step_index=0):
+    layer = folium.FeatureGroup(name="live")
+    if route is not None and len(route.path) > 1:
+        passed, upcoming = route.step_vertices(step_index)
+        if passed > 0:
+            route_line(route, zoom, passed, **PROGRESS_STYLE).add_to(layer)
+        folium.CircleMarker(route.path[upcoming], radius=10, color="#FFD700", weight=3,
+                            fill=True, fill_opacity=0.6, tooltip="Next maneuver").add_to(layer)
+    folium.Marker(position, tooltip="You are here", icon=folium.Icon(color="green", icon="user", prefix="fa")).add_to(layer)
+    return layer
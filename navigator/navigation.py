@@ -0,0 +1,203 @@
+import math
+
+import numpy as np
+
+from .geodesy import as_points, haversine, pairwise_distances, segment_lengths, bearings_along
+from .i18n import CATALOG
+from .prefetch import default_prefetcher
+from .route_cache import default_route_cache
+from .routing import MAX_SNAP, STOP, TURN, Maneuver, Route, default_graph, plan_route
+from .spatial_index import PlaceIndex
+from .tracing import span
+
+# Locale used when no UI language is chosen (bulk API, CLI); the apps pass their own
+ENGLISH = CATALOG["en-US"]
+
+# Overpass selectors for the nearby search
+SEARCH_SELECTORS = (
+    'node["amenity"~"restaurant|cafe|hospital|bank|school|college|fuel|pharmacy|police|post_office"]',
+    'node["shop"~"supermarket|convenience|clothes|bakery"]',
+    'node["tourism"~"hotel|attraction"]',
+    'node["highway"="bus_stop"]',
+)
+
+ARRIVE_WITHIN = 20   # meters; closer than this the route is just "arrived"
+MATRIX_BLOCK_BYTES = 64 * 2**20   # working-set budget per block of matrix rows
+
+
+# ==================== INSTRUCTIONS ====================
+def turn_kind(prev_bearing, curr_bearing):
+    diff = (curr_bearing - prev_bearing + 360) % 360
+    if diff < 20 or diff >= 340:
+        return "straight"
+    if diff < 80:
+        return "right"
+    if diff < 160:
+        return "sharp_right"
+    if diff <= 200:
+        return "left"
+    return "sharp_left"
+
+
+# Instruction for one maneuver in a catalog locale (navigator.i18n)
+def get_direction_text(prev_bearing, curr_bearing, distance, lang=ENGLISH):
+    return lang.turn(turn_kind(prev_bearing, curr_bearing), distance)
+
+
+# Localized instructions for a route; cheap enough to redo on every rerun.
+# Intermediate stops of a multi-stop tour are announced in place of a turn.
+def render_route_steps(route, lang=ENGLISH):
+    steps, stops = [], 0
+    for m in route.maneuvers:
+        if m.kind == STOP:
+            stops += 1
+            steps.append(lang.stop(stops, m.name, m.distance))
+        else:
+            steps.append(get_direction_text(m.bearing_in, m.bearing_out, m.distance, lang))
+    return steps + [lang["arrived"]]
+
+
+# ==================== ROUTES ====================
+# Sideways (lat, lon) offset of simulated waypoint i
+def wiggle(i):
+    return 0.00008 * math.sin(i * 1.5), 0.00006 * math.cos(i * 1.8)
+
+
+# Simulated route for when no road network covers the endpoints: a gently
+# wiggling line with one maneuver per waypoint, one every `spacing` meters
+# (between `min_steps` and `max_steps` legs)
+def simulated_route(start, end, total_dist=None, min_steps=5, max_steps=12, spacing=40, offset=wiggle):
+    if total_dist is None:
+        total_dist = haversine(*start, *end)
+    num_steps = max(min_steps, min(max_steps, int(total_dist // spacing)))
+    waypoints = [start]
+    for i in range(1, num_steps):
+        ratio = i / num_steps
+        offset_lat, offset_lon = offset(i)
+        lat = start[0] + ratio * (end[0] - start[0]) + offset_lat
+        lon = start[1] + ratio * (end[1] - start[1]) + offset_lon
+        waypoints.append([lat, lon])
+    waypoints.append(end)
+
+    # One vectorized pass over the polyline instead of per-pair scalar calls
+    bearings = bearings_along(waypoints)
+    dists = segment_lengths(waypoints)
+    maneuvers = [Maneuver(TURN, float(bearings[i-1]), float(bearings[i]), float(dists[i-1]))
+                 for i in range(1, len(waypoints)-1)]
+    return Route(waypoints, float(dists.sum()), maneuvers, range(1, len(waypoints)-1))
+
+
+# Language-independent route: real road turns when a network is loaded, simulated
+# otherwise (`simulated` options go to simulated_route)
+def build_route(start, end, arrive_within=ARRIVE_WITHIN, **simulated):
+    total_dist = haversine(*start, *end)
+    if total_dist < arrive_within:
+        return Route([start, end], total_dist, [])
+    route = plan_route(start, end)
+    if route is not None:
+        return route
+    return simulated_route(start, end, total_dist, **simulated)
+
+
+# Instructions between two points; the route itself is shared through the route cache
+def generate_route_steps(start, end, lang=ENGLISH, build=build_route, namespace=""):
+    route = default_route_cache().get(start, end, build, namespace=namespace)
+    return render_route_steps(route, lang)
+
+
+# ==================== PLACES ====================
+# Named places around a point as (name, lat, lon, distance) rows, nearest first.
+# Served from the POI tile cache through the shared prefetcher, so a search waits
+# on an in-flight prefetch of the same tiles instead of fetching them again; raises
+# OverpassError when tiles are missing and no mirror can answer. Only the closest
+# elements are added to `index` (4x `limit`, as PlaceIndex.places does, to leave
+# room for repeated names).
+def fetch_nearby_places(lat, lon, radius=2000, limit=30, selectors=SEARCH_SELECTORS, index=None):
+    index = index if index is not None else PlaceIndex()
+    with span("nearby.fetch"):
+        elements = default_prefetcher().fetch_around(lat, lon, radius, selectors, limit=limit * 4)
+    with span("nearby.index"):
+        index.add_elements(elements)
+        places = index.places(lat, lon, limit, radius=radius)
+    return [(name, p_lat, p_lon, haversine(lat, lon, p_lat, p_lon)) for name, (p_lat, p_lon) in places.items()]
+
+
+# ==================== DISTANCE MATRICES ====================
+def great_circle_blocks(origins, destinations=None, block_bytes=MATRIX_BLOCK_BYTES, dtype=np.float32):
+    """Great-circle distance matrix in row blocks: yields (first_row, block).
+
+    Each block is computed in one vectorized haversine pass; its height is
+    chosen so the float64 temporaries stay within `block_bytes`, which bounds
+    memory for N=10k and beyond when the caller consumes blocks as they come.
+    """
+    a = as_points(origins)
+    b = a if destinations is None else as_points(destinations)
+    rows = max(1, block_bytes // max(1, len(b) * 8 * 8))
+    for start in range(0, len(a), rows):
+        yield start, pairwise_distances(a[start:start + rows], b).astype(dtype, copy=False)
+
+
+def network_blocks(origins, destinations=None, graph=None, rows=64, max_snap=MAX_SNAP, dtype=np.float32):
+    """Road-network distance matrix in row blocks: yields (first_row, block).
+
+    One Dijkstra per distinct origin node, stopped as soon as every
+    destination node is settled, instead of a point-to-point search per
+    pair. Snap distances to the network are added on both ends; points
+    farther than `max_snap` from any road, and unreachable pairs, are inf.
+    """
+    graph = graph if graph is not None else default_graph()
+    if graph is None or not len(graph):
+        raise RuntimeError("network matrix needs a road extract (set NAVIGATOR_ROADS)")
+    a = as_points(origins)
+    b = a if destinations is None else as_points(destinations)
+    a_nodes, a_snap = _snap_all(graph, a, max_snap)
+    b_nodes, b_snap = _snap_all(graph, b, max_snap)
+    targets = sorted(set(b_nodes[b_nodes >= 0].tolist()))
+    column = np.searchsorted(targets, np.maximum(b_nodes, 0))
+    for start in range(0, len(a), rows):
+        block = np.full((min(rows, len(a) - start), len(b)), np.inf)
+        by_source = {}   # origins sharing a node within the block share one search
+        for i, node in enumerate(a_nodes[start:start + rows].tolist()):
+            if node < 0 or not targets:
+                continue
+            if node not in by_source:
+                by_source[node] = graph.one_to_many(node, targets)
+            block[i] = a_snap[start + i] + by_source[node][column] + b_snap
+        block[:, b_nodes < 0] = np.inf
+        if destinations is None:
+            diag = np.arange(len(block))
+            block[diag, start + diag] = 0.0   # not twice the snap distance
+        yield start, block.astype(dtype, copy=False)
+
+
+# Nearest graph node and snap distance per point; node -1 when beyond max_snap
+def _snap_all(graph, pts, max_snap):
+    nodes = np.array([graph.nearest_node(lat, lon) for lat, lon in pts.tolist()], dtype=np.int64)
+    snap = np.array([haversine(lat, lon, graph.lat[n], graph.lon[n]) for (lat, lon), n in zip(pts.tolist(), nodes)])
+    nodes[snap > max_snap] = -1
+    return nodes, snap
+
+
+def distance_matrix(origins, destinations=None, network=False, out=None, **options):
+    """Full origin x destination matrix in meters (float32).
+
+    `network=False` gives great-circle distances, `network=True` road
+    distances over the loaded graph. Pass `out` (an array or np.memmap of the
+    right shape) to fill preallocated or disk-backed storage block by block.
+    """
+    a = as_points(origins)
+    n_cols = len(a) if destinations is None else len(as_points(destinations))
+    if out is None:
+        out = np.empty((len(a), n_cols), dtype=np.float32)
+    blocks = network_blocks if network else great_circle_blocks
+    for start, block in blocks(a, destinations, **options):
+        out[start:start + len(block)] = block
+    return out
+
+
+# Matrix among the user and a `name -> [lat, lon]` places dict (as kept in
+# nearby_places); row/column 0 is the user, then the places in dict order
+def places_matrix(user, places, network=False):
+    names = ["📍 You"] + list(places)
+    points = [list(user)] + [list(coords) for coords in places.values()]
+    return names, distance_matrix(points, network=network)
@@ -0,0 +1,481 @@
+import codecs
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .tracing import count, span
+from .upstream import RateLimiter, context_with, current_ticket, limiter_for
+
+# Public mirrors, tried in order; OVERPASS_URL may list several, comma-separated
+DEFAULT_ENDPOINTS = (
+    "https://overpass-api.de/api/interpreter",
+    "https://overpass.kumi.systems/api/interpreter",
+    "https://overpass.private.coffee/api/interpreter",
+)
+ENDPOINTS = tuple(u.strip() for u in os.environ.get("OVERPASS_URL", "").split(",") if u.strip()) or DEFAULT_ENDPOINTS
+OVERPASS_URL = ENDPOINTS[0]
+RETRY_AFTER = 5.0        # seconds a mirror is left alone after HTTP 429 without a Retry-After
+CHUNK_SIZE = 64 * 1024   # bytes read from the response stream at a time
+STREAM_BUFFER = 256      # parsed elements OverpassClient.stream holds before the reader waits
+# Tags kept on POI elements (same as the region packs): the name and the category keys
+KEEP_TAGS = ("name", "amenity", "shop", "tourism", "office", "highway")
+
+
+# ==================== ERRORS ====================
+class OverpassError(Exception):
+    """Base class for Overpass failures; `retryable` errors may succeed on another try."""
+    retryable = True
+
+    def __init__(self, message, endpoint=None):
+        super().__init__(message)
+        self.endpoint = endpoint
+
+
+class OverpassTimeout(OverpassError):
+    pass
+
+
+class OverpassRateLimited(OverpassError):
+    pass
+
+
+class OverpassUnavailable(OverpassError):
+    pass
+
+
+class OverpassBadResponse(OverpassError):
+    pass
+
+
+class OverpassQueryError(OverpassError):
+    """The server rejected the query itself (HTTP 400); retrying will not help."""
+    retryable = False
+
+
+# ==================== CIRCUIT BREAKER ====================
+class CircuitBreaker:
+    """Per-endpoint breaker: opens after `threshold` consecutive failures and
+    lets a single trial request through once `reset_after` seconds have passed."""
+
+    def __init__(self, threshold=3, reset_after=30.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.clock() - self.opened_at >= self.reset_after else "open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.clock() - self.opened_at < self.reset_after or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self.opened_at = self.clock()
+            self._trial = False
+
+    # A trial that never reached the mirror (no local request slot) proves
+    # nothing either way; let the next request try instead
+    def release_trial(self):
+        with self._lock:
+            self._trial = False
+
+
+# ==================== CLIENT ====================
+class OverpassClient:
+    """Pooled Overpass client shared by both apps.
+
+    - one keep-alive `requests.Session` (connection pool per mirror)
+    - identical concurrent queries are coalesced into a single request
+    - stream() hands elements over as they are parsed, for answers too big to hold
+    - a request still pending after `hedge_after` seconds is hedged on the
+      next mirror; the first good answer wins
+    - retryable failures back off exponentially with jitter
+    - mirrors that keep failing are skipped by their circuit breaker
+    - requests to each mirror go through a token bucket (navigator.upstream),
+      by default the process-wide one for its host, queued by priority;
+      pass `rate` (0 for none) for a private limit instead
+    """
+
+    def __init__(self, endpoints=ENDPOINTS, timeout=20, retries=2, backoff=0.5, hedge_after=3.0,
+                 pool_size=8, breaker_threshold=3, breaker_reset=30.0, rate=None, burst=4):
+        self.endpoints = list(endpoints)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge_after = hedge_after
+        self.breakers = {url: CircuitBreaker(breaker_threshold, breaker_reset) for url in self.endpoints}
+        self.limiters = {url: limiter_for(url) if rate is None else RateLimiter(rate, burst) for url in self.endpoints}
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.endpoints), pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="overpass")
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+        self.coalesced = 0
+        self.throttled = 0   # HTTP 429 answers
+
+    def query(self, ql, keep=None):
+        """`{"elements": [...]}` for an Overpass QL query; raises an OverpassError subclass.
+
+        The response is parsed as it streams in. `keep(elem)` may return a
+        smaller element or None to drop it, so only what it keeps is ever held.
+        Requests run at the caller's priority (navigator.upstream.priority); a
+        caller joining an in-flight query raises it to its own.
+        """
+        key = (ql, keep)
+        ticket = current_ticket()
+        with self._lock:
+            entry = self._inflight.get(key)
+            owner = entry is None
+            if owner:
+                future = Future()
+                self._inflight[key] = (future, ticket)
+            else:
+                future = entry[0]
+                entry[1].boost(ticket.level)
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+        try:
+            result = context_with(ticket).run(self._query_with_retries, ql, keep)
+            future.set_result(result)
+            return result
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stream(self, ql, keep=None):
+        """Elements of an Overpass QL query as they are parsed, through a
+        bounded queue, so memory stays flat however large the answer is.
+
+        Unlike query() this is not coalesced, and an element may come twice
+        when a hedge or retry reads it again, so callers dedupe. A failed query
+        raises its OverpassError after the elements already yielded.
+        """
+        buffer = queue.Queue(STREAM_BUFFER)
+        closed = threading.Event()
+        end = object()
+        error = []
+
+        # Gives up once the consumer has stopped, so a hedge that loses or
+        # outlives the generator never blocks on a full buffer
+        def put(item):
+            while not closed.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        def sink(elem):
+            elem = keep(elem) if keep is not None else elem
+            if elem is not None:
+                put(elem)
+            # nothing is returned, so the response reader collects nothing
+
+        def run():
+            try:
+                self._query_with_retries(ql, sink)
+            except BaseException as exc:
+                error.append(exc)
+            put(end)
+
+        threading.Thread(target=context_with(current_ticket()).run, args=(run,), daemon=True,
+                         name="overpass-stream").start()
+        try:
+            while True:
+                item = buffer.get()
+                if item is end:
+                    break
+                yield item
+        finally:
+            closed.set()
+        if error:
+            raise error[0]
+
+    def _query_with_retries(self, ql, keep):
+        for attempt in range(self.retries + 1):
+            try:
+                return self._hedged(ql, keep)
+            except OverpassError as exc:
+                if not exc.retryable or attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    def _hedged(self, ql, keep):
+        remaining = list(self.endpoints)
+        pending = set()
+        last_error = None
+
+        # A hedge only goes to a mirror with a free request slot; queueing it
+        # would add load exactly when the deployment is being throttled
+        def launch_next(hedge=False):
+            for url in list(remaining):
+                if hedge and not self.limiters[url].available():
+                    continue
+                remaining.remove(url)
+                if self.breakers[url].allow():
+                    pending.add(self._executor.submit(contextvars.copy_context().run, self._post, url, ql, keep))
+                    return True
+            return False
+
+        if not launch_next():
+            raise OverpassUnavailable("all Overpass mirrors are temporarily disabled (circuit open)")
+        while pending:
+            done, _ = wait(pending, timeout=self.hedge_after, return_when=FIRST_COMPLETED)
+            if not done:
+                launch_next(hedge=True)   # slow mirror: hedge on the next one
+                continue
+            for future in done:
+                pending.discard(future)
+                try:
+                    return future.result()
+                except OverpassError as exc:
+                    last_error = exc
+                    if not exc.retryable:
+                        raise
+            if not pending:
+                launch_next()
+        raise last_error
+
+    @span("overpass.request")
+    def _post(self, url, ql, keep=None):
+        breaker = self.breakers[url]
+        limiter = self.limiters[url]
+        if not limiter.acquire(timeout=self.timeout):
+            breaker.release_trial()
+            raise OverpassRateLimited(f"{url}: no request slot within {self.timeout}s (local rate limit)", url)
+        with self._lock:
+            self.requests_sent += 1
+        try:
+            response = self.session.post(url, data={"data": ql}, timeout=self.timeout, stream=True)
+        except requests.Timeout as exc:
+            breaker.record_failure()
+            raise OverpassTimeout(f"{url} timed out after {self.timeout}s", url) from exc
+        except requests.RequestException as exc:
+            breaker.record_failure()
+            raise OverpassUnavailable(f"{url} unreachable: {exc}", url) from exc
+        with response:
+            data = self._read(url, response, breaker, limiter, keep)
+        breaker.record_success()
+        return data
+
+    def _read(self, url, response, breaker, limiter, keep):
+        if response.status_code == 400:
+            breaker.record_success()
+            raise OverpassQueryError(f"{url} rejected the query: {response.text[:200]}", url)
+        if response.status_code == 429:
+            breaker.record_failure()
+            with self._lock:
+                self.throttled += 1
+            count("upstream_throttled", service="overpass")
+            try:
+                retry_after = float(response.headers.get("Retry-After", RETRY_AFTER))
+            except ValueError:
+                retry_after = RETRY_AFTER
+            limiter.pause(retry_after)
+            raise OverpassRateLimited(f"{url} is rate limiting (HTTP 429)", url)
+        if response.status_code >= 400:
+            breaker.record_failure()
+            raise OverpassUnavailable(f"{url} returned HTTP {response.status_code}", url)
+        received = 0
+
+        def chunks():
+            nonlocal received
+            for chunk in response.iter_content(CHUNK_SIZE):
+                received += len(chunk)
+                yield chunk
+
+        elements, tail = [], {}
+        try:
+            for elem in iter_elements(chunks(), tail):
+                if keep is not None:
+                    elem = keep(elem)
+                if elem is not None:
+                    elements.append(elem)
+        except requests.Timeout as exc:
+            breaker.record_failure()
+            raise OverpassTimeout(f"{url} timed out after {self.timeout}s", url) from exc
+        except requests.RequestException as exc:
+            breaker.record_failure()
+            raise OverpassUnavailable(f"{url} broke off the response: {exc}", url) from exc
+        except ValueError as exc:
+            breaker.record_failure()
+            raise OverpassBadResponse(f"{url} returned invalid JSON: {exc}", url) from exc
+        finally:
+            count("network_bytes", received, service="overpass")
+        # A query that hit the server's time or memory limit ends with a remark
+        # after a truncated element list; caching that would hide places for a day
+        if "error" in str(tail.get("remark", "")):
+            breaker.record_failure()
+            raise OverpassBadResponse(f"{url} cut the result short: {tail['remark']}", url)
+        return {"elements": elements}
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+# Process-wide client shared by every Streamlit session
+def default_client():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = OverpassClient()
+        return _default
+
+
+# ==================== QUERIES ====================
+# Overpass QL for every selector inside each (south, west, north, east) box
+def build_query(selectors, bboxes, timeout=25):
+    lines = []
+    for south, west, north, east in merge_boxes(bboxes):
+        box = f"({south:.7f},{west:.7f},{north:.7f},{east:.7f})"
+        lines.extend(f"  {sel}{box};" for sel in selectors)
+    body = "\n".join(lines)
+    return f"[out:json][timeout:{timeout}];\n(\n{body}\n);\nout center;"
+
+
+# The same area in fewer boxes: boxes sharing a whole edge (neighbouring map
+# tiles) are merged, rows first, so a block of tiles is queried as one box
+def merge_boxes(bboxes):
+    rows = {}
+    for south, west, north, east in sorted(set(bboxes), key=lambda box: (box[0], box[2], box[1])):
+        row = rows.setdefault((south, north), [])
+        if row and row[-1][1] == west:
+            row[-1][1] = east
+        else:
+            row.append([west, east])
+    columns = {}
+    for (south, north), row in sorted(rows.items()):
+        for west, east in row:
+            column = columns.setdefault((west, east), [])
+            if column and column[-1][1] == south:
+                column[-1][1] = north
+            else:
+                column.append([south, north])
+    return [(south, west, north, east) for (west, east), column in columns.items() for south, north in column]
+
+
+# POI elements (slimmed, see slim_element) for a set of bounding boxes; raises OverpassError
+def fetch_boxes(selectors, bboxes, client=None):
+    return (client or default_client()).query(build_query(selectors, bboxes), keep=slim_element)['elements']
+
+
+# Same as fetch_boxes, yielding each element as it is parsed (OverpassClient.stream)
+def stream_boxes(selectors, bboxes, client=None):
+    return (client or default_client()).stream(build_query(selectors, bboxes), keep=slim_element)
+
+
+# ==================== STREAMING ====================
+_decoder = json.JSONDecoder()
+_SEPARATORS = " \t\r\n,"
+
+
+def iter_elements(chunks, tail=None):
+    """Elements of an Overpass JSON response, decoded one at a time from an
+    iterable of byte chunks, so neither the body nor the full parse tree is
+    ever held. Keys after the element list (e.g. a "remark") are stored in
+    the `tail` dict when one is given. Raises ValueError on malformed JSON."""
+    text = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buf, pos, done = "", 0, False
+
+    def more():
+        nonlocal buf, pos, done
+        chunk = next(chunks, None)
+        if chunk is None:
+            done = True
+            buf = buf[pos:] + text.decode(b"", final=True)
+        else:
+            buf = buf[pos:] + text.decode(chunk)
+        pos = 0
+        return not done
+
+    # Header: everything up to the opening bracket of "elements"
+    while True:
+        start = buf.find('"elements"', pos)
+        if start >= 0:
+            bracket = buf.find("[", start)
+            if bracket >= 0:
+                pos = bracket + 1
+                break
+        if not more():
+            raise ValueError("no element list in the response")
+    while True:
+        while pos < len(buf) and buf[pos] in _SEPARATORS:
+            pos += 1
+        if pos == len(buf):
+            if not more():
+                raise ValueError("response ends inside the element list")
+            continue
+        if buf[pos] == "]":
+            break
+        try:
+            elem, end = _decoder.raw_decode(buf, pos)
+        except ValueError:
+            if not more():   # incomplete element: read on, unless the body is over
+                raise
+            continue
+        pos = end
+        yield elem
+    # The rest after the list is small: `, "remark": "..." }`
+    while more():
+        pass
+    rest = buf[pos + 1:].strip().lstrip(",").strip()
+    if tail is not None and rest.endswith("}") and len(rest) > 1:
+        tail.update(json.loads("{" + rest))
+
+
+# The part of a POI element the apps use: node or center coordinates, id and
+# the KEEP_TAGS; None for elements without a position
+def slim_element(elem):
+    coords = element_coords(elem)
+    if coords is None:
+        return None
+    tags = elem.get('tags') or {}
+    return {"type": elem.get('type'), "id": elem.get('id'), "lat": coords[0], "lon": coords[1],
+            "tags": {k: tags[k] for k in KEEP_TAGS if k in tags}}
+
+
+# Element coordinates, using the way/relation center when there is no node position
+def element_coords(elem):
+    lat = elem.get('lat') or elem.get('center', {}).get('lat')
+    lon = elem.get('lon') or elem.get('center', {}).get('lon')
+    if lat and lon:
+        return float(lat), float(lon)
+    return None
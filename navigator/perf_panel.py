@@ -0,0 +1,37 @@
+import time
+
+import streamlit as st
+
+from .tracing import metrics
+
+
+# Nesting depth per span from interval containment, spans sorted by start
+def _nested(spans):
+    rows, open_ends = [], []
+    for name, start, duration in sorted(spans, key=lambda s: (s[1], -s[2])):
+        while open_ends and start >= open_ends[-1]:
+            open_ends.pop()
+        rows.append((" " * len(open_ends) + name, start, duration))
+        open_ends.append(start + duration)
+    return rows
+
+
+# Optional sidebar panel with this run's spans and counters and the process-wide
+# aggregates. The checkbox (session_state[key]) decides whether runs are traced:
+# pass st.session_state.get(key) to tracing.start_run at the top of the script.
+def perf_panel(trace, key="perf_panel"):
+    if not st.sidebar.checkbox("🐞 Performance panel", key=key) or trace is None:
+        return
+    with st.sidebar:
+        st.caption(f"This run so far: {1000 * (time.perf_counter() - trace.t0):.0f} ms in {len(trace.spans)} spans")
+        st.dataframe([{"stage": name, "start ms": round(1000 * start, 1), "ms": round(1000 * duration, 2)}
+                      for name, start, duration in _nested(trace.spans)], hide_index=True)
+        if trace.counters:
+            st.markdown("\n".join(f"- `{name}` {dict(labels) or ''}: **{value:,}**"
+                                  for (name, labels), value in sorted(trace.counters.items())))
+        st.caption("All traced runs in this process")
+        st.dataframe([{"stage": name, "count": n, "mean ms": round(mean, 2), "total ms": round(total, 1)}
+                      for name, n, mean, total in metrics.summary()], hide_index=True)
+        col1, col2 = st.columns(2)
+        col1.download_button("JSONL", trace.to_json() + "\n", file_name="trace.jsonl", mime="application/jsonl")
+        col2.download_button("Prometheus", metrics.prometheus_text(), file_name="navigator.prom", mime="text/plain")
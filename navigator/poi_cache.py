@@ -0,0 +1,315 @@
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from . import overpass
+from .geodesy import haversine
+from .region_pack import default_pack, pack_fetch
+from .tracing import count
+
+TILE_ZOOM = 15                      # ~1.2 km tiles at the equator
+DEFAULT_TTL = 24 * 3600             # POIs change slowly; refresh once a day
+DEFAULT_MAX_TILES = 5000
+STAGE_BATCH = 512                   # fetched elements written to the staging table at a time
+DEFAULT_PATH = os.environ.get(
+    "NAVIGATOR_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "navigator", "poi.sqlite3")
+)
+
+
+# Slippy-map tile containing a point
+def tile_for(lat, lon, zoom=TILE_ZOOM):
+    n = 2 ** zoom
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+# (south, west, north, east) of a tile
+def tile_bbox(x, y, zoom=TILE_ZOOM):
+    n = 2 ** zoom
+
+    def lat_of(ty):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return lat_of(y + 1), x / n * 360.0 - 180.0, lat_of(y), (x + 1) / n * 360.0 - 180.0
+
+
+# All tiles intersecting the bounding box of an `around:` circle
+def tiles_covering(lat, lon, radius, zoom=TILE_ZOOM):
+    dlat = radius / 111320.0
+    dlon = radius / (111320.0 * max(math.cos(math.radians(lat)), 1e-6))
+    x0, y0 = tile_for(lat + dlat, lon - dlon, zoom)
+    x1, y1 = tile_for(lat - dlat, lon + dlon, zoom)
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+# Stable cache namespace for a set of Overpass selectors
+def layer_key(selectors):
+    return hashlib.sha1("\n".join(selectors).encode("utf-8")).hexdigest()[:16]
+
+
+class PoiCache:
+    """Tile-keyed Overpass cache in SQLite with TTL expiry and LRU eviction.
+
+    `fetch(selectors, bboxes)` is called once per query with the boxes of the
+    missing tiles and returns an iterable of elements; it defaults to the live
+    Overpass API, streamed (overpass.stream_boxes), so pass a stand-in to run
+    offline. Fetched elements are staged in SQLite as they arrive and become
+    tiles once the fetch has succeeded, so a large area is never held in memory.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_tiles=DEFAULT_MAX_TILES,
+                 zoom=TILE_ZOOM, fetch=overpass.stream_boxes, clock=time.time):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl = ttl
+        self.max_tiles = max_tiles
+        self.zoom = zoom
+        self.fetch = fetch
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._batches = itertools.count()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS tiles (
+                layer TEXT, z INTEGER, x INTEGER, y INTEGER,
+                fetched REAL, used REAL, elements TEXT,
+                PRIMARY KEY (layer, z, x, y)
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS tiles_used ON tiles (used)")
+        # Elements of fetches in progress, one batch per fetch
+        self._db.execute("""
+            CREATE TEMP TABLE staged (
+                batch INTEGER, x INTEGER, y INTEGER, type TEXT, id INTEGER, element TEXT,
+                PRIMARY KEY (batch, type, id)
+            )""")
+        self._db.execute("CREATE INDEX temp.staged_tile ON staged (batch, x, y)")
+        self._db.commit()
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "hit_ratio": self.hit_ratio, "tiles": len(self)}
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+
+    def get_tile(self, layer, x, y):
+        now = self.clock()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fetched, elements FROM tiles WHERE layer=? AND z=? AND x=? AND y=?",
+                (layer, self.zoom, x, y)).fetchone()
+            if row is None or now - row[0] > self.ttl:
+                return None
+            self._db.execute("UPDATE tiles SET used=? WHERE layer=? AND z=? AND x=? AND y=?",
+                             (now, layer, self.zoom, x, y))
+            self._db.commit()
+        return json.loads(row[1])
+
+    def get_tiles(self, layer, tiles):
+        """{(x, y): elements} for the fresh tiles among `tiles`, with one commit for the LRU stamps."""
+        return dict(self._read_tiles(layer, self._fresh(layer, tiles)))
+
+    # The fresh tiles among `tiles`, stamped as used
+    def _fresh(self, layer, tiles):
+        now = self.clock()
+        fresh = []
+        with self._lock:
+            for x, y in tiles:
+                row = self._db.execute(
+                    "SELECT fetched FROM tiles WHERE layer=? AND z=? AND x=? AND y=?",
+                    (layer, self.zoom, x, y)).fetchone()
+                if row is not None and now - row[0] <= self.ttl:
+                    fresh.append((x, y))
+            if fresh:
+                self._db.executemany("UPDATE tiles SET used=? WHERE layer=? AND z=? AND x=? AND y=?",
+                                     [(now, layer, self.zoom, x, y) for x, y in fresh])
+                self._db.commit()
+        return fresh
+
+    # (tile, elements), reading and decoding one tile at a time; a tile evicted
+    # in the meantime is skipped
+    def _read_tiles(self, layer, tiles):
+        for x, y in tiles:
+            with self._lock:
+                row = self._db.execute("SELECT elements FROM tiles WHERE layer=? AND z=? AND x=? AND y=?",
+                                       (layer, self.zoom, x, y)).fetchone()
+            if row is not None:
+                yield (x, y), json.loads(row[0])
+
+    def put_tile(self, layer, x, y, elements):
+        with self._lock:
+            self._put(layer, x, y, json.dumps(elements))
+            self._db.commit()
+
+    # Caller holds the lock and commits
+    def _put(self, layer, x, y, blob):
+        now = self.clock()
+        self._db.execute("INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (layer, self.zoom, x, y, now, now, blob))
+        count = self._db.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+        if count > self.max_tiles:
+            self._db.execute(
+                "DELETE FROM tiles WHERE rowid IN (SELECT rowid FROM tiles ORDER BY used LIMIT ?)",
+                (count - self.max_tiles,))
+
+    def purge_expired(self):
+        with self._lock:
+            self._db.execute("DELETE FROM tiles WHERE fetched < ?", (self.clock() - self.ttl,))
+            self._db.commit()
+
+    def missing_tiles(self, lat, lon, radius, selectors):
+        """Tiles of the query area that are not cached (or have expired)."""
+        layer = layer_key(selectors)
+        now = self.clock()
+        missing = []
+        with self._lock:
+            for x, y in tiles_covering(lat, lon, radius, self.zoom):
+                row = self._db.execute(
+                    "SELECT fetched FROM tiles WHERE layer=? AND z=? AND x=? AND y=?",
+                    (layer, self.zoom, x, y)).fetchone()
+                if row is None or now - row[0] > self.ttl:
+                    missing.append((x, y))
+        return missing
+
+    def query(self, lat, lon, radius, selectors, network=True):
+        """Elements matching `selectors` within `radius` meters, in no particular
+        order, fetching only uncached tiles.
+
+        With `network=False` missing tiles are skipped instead of fetched, so
+        the call never blocks on Overpass.
+        """
+        seen = set()
+        elements = []
+        for _, elem in self._within(lat, lon, radius, selectors, network):
+            key = (elem.get('type'), elem.get('id'))
+            if key not in seen:
+                seen.add(key)
+                elements.append(elem)
+        return elements
+
+    def nearest(self, lat, lon, radius, selectors, k, network=True):
+        """The `k` closest elements within `radius`, nearest first. Cached tiles
+        are decoded one at a time and fetched elements come straight off the
+        response, all through a bounded heap, so memory does not grow with the area."""
+        return k_nearest(self._within(lat, lon, radius, selectors, network), k)
+
+    def fill(self, lat, lon, radius, selectors):
+        """Fetch the uncached tiles of an area without reading anything back."""
+        layer = layer_key(selectors)
+        _, missing = self._split(layer, tiles_covering(lat, lon, radius, self.zoom), True)
+        if missing:
+            for _ in self._fetched(layer, selectors, missing):
+                pass
+
+    # (fresh, missing) tiles of `covering`, counted as cache hits and misses
+    def _split(self, layer, covering, network):
+        fresh = self._fresh(layer, covering)
+        cached = set(fresh)
+        missing = [tile for tile in covering if tile not in cached]
+        with self._lock:
+            self.hits += len(fresh)
+            if network:
+                self.misses += len(missing)
+        count("cache_hits", len(fresh), cache="poi_tile")
+        if network:
+            count("cache_misses", len(missing), cache="poi_tile")
+        return fresh, missing
+
+    # (distance, element) for the elements in range. An element can come twice
+    # (stored in two tiles, or read again by a hedge or retry); query and
+    # k_nearest drop the repeat.
+    def _within(self, lat, lon, radius, selectors, network):
+        layer = layer_key(selectors)
+        fresh, missing = self._split(layer, tiles_covering(lat, lon, radius, self.zoom), network)
+        elements = (elem for _, tile in self._read_tiles(layer, fresh) for elem in tile)
+        if missing and network:
+            elements = itertools.chain(elements, self._fetched(layer, selectors, missing))
+        for elem in elements:
+            distance = haversine(lat, lon, *overpass.element_coords(elem))
+            if distance <= radius:
+                yield distance, elem
+
+    # Elements of the missing tiles as `fetch` yields them; they are staged as
+    # they arrive and stored as tiles only once the fetch has completed
+    def _fetched(self, layer, selectors, missing):
+        batch = next(self._batches)
+        wanted = set(missing)
+        rows = []
+        try:
+            for elem in self.fetch(selectors, [tile_bbox(x, y, self.zoom) for x, y in missing]):
+                coords = overpass.element_coords(elem)
+                if coords is None:
+                    continue
+                tile = tile_for(*coords, self.zoom)
+                if tile not in wanted:
+                    continue
+                rows.append((batch, *tile, elem.get('type'), elem.get('id'), json.dumps(elem)))
+                if len(rows) >= STAGE_BATCH:
+                    self._stage(rows)
+                yield elem
+            self._stage(rows)
+            with self._lock:
+                for x, y in missing:
+                    staged = self._db.execute(
+                        "SELECT element FROM staged WHERE batch=? AND x=? AND y=? ORDER BY rowid", (batch, x, y))
+                    self._put(layer, x, y, "[" + ",".join(row[0] for row in staged) + "]")
+                self._db.commit()
+        finally:
+            with self._lock:
+                self._db.execute("DELETE FROM staged WHERE batch=?", (batch,))
+                self._db.commit()
+
+    # Empties `rows`; an element the batch already has (a hedge or retry read
+    # it again) is ignored
+    def _stage(self, rows):
+        with self._lock:
+            self._db.executemany("INSERT OR IGNORE INTO staged VALUES (?, ?, ?, ?, ?, ?)", rows)
+        rows.clear()
+
+
+# The `k` elements of (distance, element) hits with the smallest distance,
+# nearest first and each element once; ties keep their order. Holds only k hits.
+def k_nearest(hits, k):
+    heap = []   # (-distance, -order, key, element): the farthest hit is on top
+    keys = set()
+    for order, (distance, elem) in enumerate(hits):
+        key = (elem.get('type'), elem.get('id'))
+        if key in keys:
+            continue
+        if len(heap) < k:
+            heapq.heappush(heap, (-distance, -order, key, elem))
+            keys.add(key)
+        elif distance < -heap[0][0]:
+            keys.discard(heapq.heapreplace(heap, (-distance, -order, key, elem))[2])
+            keys.add(key)
+    return [elem for _, _, _, elem in sorted(heap, reverse=True)]
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+# Process-wide cache shared by every Streamlit session; tiles inside the region
+# pack named by NAVIGATOR_PACK are filled from the pack instead of Overpass
+def default_cache():
+    global _default
+    with _default_lock:
+        if _default is None:
+            pack = default_pack()
+            _default = PoiCache(fetch=pack_fetch(pack) if pack is not None else overpass.stream_boxes)
+        return _default
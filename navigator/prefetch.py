@@ -0,0 +1,89 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .geodesy import as_points, segment_lengths
+from .poi_cache import default_cache, layer_key
+from .upstream import INTERACTIVE, PREFETCH, Ticket, context_with
+
+
+class Prefetcher:
+    """Background POI tile prefetching on a thread pool shared by all sessions.
+
+    warm_* calls are cheap enough to make on every rerun: an area whose tiles
+    are all cached costs one indexed lookup per tile, and an area that is
+    already being fetched reuses the in-flight future, so a search button can
+    wait on the prefetch instead of starting a second download.
+    Prefetch downloads queue behind interactive ones for the upstream rate
+    limit; a search that ends up waiting on one raises it to interactive.
+    """
+
+    def __init__(self, cache=None, max_workers=4):
+        self.cache = cache if cache is not None else default_cache()   # an empty PoiCache is falsy
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="poi-prefetch")
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def warm_around(self, lat, lon, radius, selectors, level=PREFETCH):
+        """Start fetching the uncached tiles around a point; returns the fetch
+        future, or None when everything is already cached."""
+        missing = self.cache.missing_tiles(lat, lon, radius, selectors)
+        if not missing:
+            return None
+        key = (layer_key(selectors), frozenset(missing))
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                ticket = Ticket(level)
+                # Outside the caller's context: the fetch outlives its rerun
+                future = self._executor.submit(context_with(ticket, inherit=False).run,
+                                               self.cache.fill, lat, lon, radius, selectors)
+                self._pending[key] = (future, ticket)
+                future.add_done_callback(lambda _, key=key: self._forget(key))
+            else:
+                future, ticket = entry
+                ticket.boost(level)
+        return future
+
+    def fetch_around(self, lat, lon, radius, selectors, limit=None):
+        """Elements within `radius` of the point (only the `limit` closest when
+        given), waiting only for tiles not yet cached."""
+        future = self.warm_around(lat, lon, radius, selectors, level=INTERACTIVE)
+        if future is not None:
+            future.result()
+        if limit is not None:
+            return self.cache.nearest(lat, lon, radius, selectors, limit, network=False)
+        return self.cache.query(lat, lon, radius, selectors, network=False)
+
+    def warm_route(self, path, radius, selectors, ahead=3000):
+        """Queue the corridor along the first `ahead` meters of a route polyline."""
+        pts = as_points(path)
+        if len(pts) < 2:
+            return [self.warm_around(*pts[0], radius, selectors)] if len(pts) else []
+        along = np.concatenate([[0.0], np.cumsum(segment_lengths(pts))])
+        stops = np.arange(0.0, min(along[-1], ahead) + 1e-9, radius)
+        lats = np.interp(stops, along, pts[:, 0])
+        lons = np.interp(stops, along, pts[:, 1])
+        return [self.warm_around(float(a), float(b), radius, selectors) for a, b in zip(lats, lons)]
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _forget(self, key):
+        with self._lock:
+            self._pending.pop(key, None)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+# Process-wide prefetcher shared by every Streamlit session
+def default_prefetcher():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Prefetcher()
+        return _default
@@ -0,0 +1,321 @@
+import datetime
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+from functools import cached_property
+
+import numpy as np
+from numpy.lib.format import descr_to_dtype, dtype_to_descr
+
+from . import overpass
+from .geodesy import haversine_np
+from .routing import RoadGraph, read_osm_xml, read_overpass_json
+from .spatial_index import KIND_TAGS, M_PER_DEG, element_name
+
+MAGIC = b"NAVPACK\0"
+FORMAT_VERSION = 2              # 2: `kind` indexes a set of categories
+ALIGN = 64                      # section alignment in bytes
+CELL_DEG = 250 / M_PER_DEG      # POI grid cell, the same 250 m as PlaceIndex
+CELL_OFFSET = 1 << 20           # keeps cell numbers positive inside the int64 key
+E7 = 1e7                        # POI coordinates are int32 degrees x 1e7 (~1 cm)
+# One fixed-size record per POI; ways are stored with a negative OSM id and
+# `kind` indexes the header's "kinds", the key=value categories of the POI
+POI_DTYPE = np.dtype([("lat", "<i4"), ("lon", "<i4"), ("osm_id", "<i8"),
+                      ("name", "<u4"), ("name_len", "<u2"), ("kind", "<u2")])
+SELECTOR_RE = re.compile(r'^(node|way|nwr)\["([^"]+)"(?:(=|~)"([^"]*)")?\]$')
+
+
+def _cell_key(cy, cx):
+    return (np.asarray(cy, dtype=np.int64) + CELL_OFFSET) * (2 * CELL_OFFSET) + (np.asarray(cx, dtype=np.int64) + CELL_OFFSET)
+
+
+def _align(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+# (element type, tag key, operator, value) per Overpass selector of the forms
+# node["k"], way["k"="v"] and nwr["k"~"a|b"]
+def parse_selectors(selectors):
+    parsed = []
+    for selector in selectors:
+        match = SELECTOR_RE.match(selector)
+        if not match:
+            raise ValueError(f"region packs cannot answer the selector {selector!r}")
+        parsed.append(match.groups())
+    return parsed
+
+
+# Whether a "key=value" category passes one selector's tag test
+def _category_matches(category, key, op, value):
+    k, _, v = category.partition("=")
+    return k == key and (op is None or (op == "=" and v == value) or (op == "~" and re.search(value, v) is not None))
+
+
+# ==================== BUILDER ====================
+def build_pack(source, path, name=None, version=None, oneway=False, keys=KIND_TAGS):
+    """Convert an OSM XML (.osm[.gz|.bz2]) or Overpass JSON extract into a region pack.
+
+    The pack holds the routing graph (with its landmark tables, so nothing
+    is recomputed on load) and every node or non-road way tagged with one of
+    `keys`. Returns the pack header.
+    """
+    tagged, way_ids = [], []
+    reader = read_overpass_json if ".json" in os.path.basename(source) else read_osm_xml
+    coords, ways = reader(source, places=tagged, way_ids=way_ids)
+    graph = RoadGraph.from_ways(coords, ways, oneway=oneway)
+    graph.prepare_landmarks()
+
+    pois = [(node, coords[node], tags) for node, tags in tagged]
+    # Tagged buildings and areas (shops, schools, ...) sit at the mean of their nodes
+    for way_id, (refs, tags) in zip(way_ids, ways):
+        if "highway" in tags or not any(k in tags for k in keys):
+            continue
+        pts = [coords[r] for r in refs if r in coords]
+        if pts:
+            pois.append((-way_id, tuple(np.mean(pts, axis=0).tolist()), tags))
+
+    # A place tagged both amenity and shop keeps both, so either selector finds it
+    kinds, kind_ids, names = [], {}, bytearray()
+    records = []
+    for osm_id, (lat, lon), tags in pois:
+        kind = tuple(f"{k}={tags[k]}" for k in keys if k in tags)
+        if not kind:
+            continue
+        if kind not in kind_ids:
+            kind_ids[kind] = len(kinds)
+            kinds.append(list(kind))
+        label = tags.get("name", "").encode("utf-8")[:0xFFFF]
+        records.append((round(lat * E7), round(lon * E7), osm_id, len(names), len(label), kind_ids[kind]))
+        names += label
+    if len(kinds) > 0xFFFF:
+        raise ValueError(f"{source} has {len(kinds)} distinct POI kind sets; packs hold at most 65535")
+    poi = np.array(records, dtype=POI_DTYPE)
+    cells = _cell_key(np.floor(poi["lat"] / E7 / CELL_DEG), np.floor(poi["lon"] / E7 / CELL_DEG))
+    order = np.argsort(cells, kind="stable")
+
+    sections = {"poi": poi[order], "poi_cell": cells[order], "poi_names": np.frombuffer(bytes(names), dtype=np.uint8)}
+    sections.update((f"graph.{key}", array) for key, array in graph.arrays().items())
+    lats = np.concatenate([graph.lat, poi["lat"] / E7])
+    lons = np.concatenate([graph.lon, poi["lon"] / E7])
+    header = {
+        "format": FORMAT_VERSION,
+        "name": name or os.path.basename(source).split(".")[0],
+        "version": version or datetime.date.today().strftime("%Y%m%d"),
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "source": os.path.basename(source),
+        "bbox": [float(lats.min()), float(lons.min()), float(lats.max()), float(lons.max())] if len(lats) else None,
+        "oneway": oneway,
+        "cell_deg": CELL_DEG,
+        "kinds": kinds,
+        "counts": {"pois": len(poi), "nodes": len(graph), "arcs": len(graph.indices)},
+    }
+    write_pack(path, header, sections)
+    return header
+
+
+# Header (JSON, with the offset, dtype and shape of every section) followed by
+# the raw little-endian arrays at ALIGN-byte boundaries; written to a temporary
+# file and renamed so a pack in use is never seen half written
+def write_pack(path, header, sections):
+    sections = {key: np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<")) for key, array in sections.items()}
+    layout, offset = {}, 0
+    for key, array in sections.items():
+        layout[key] = [offset, dtype_to_descr(array.dtype), list(array.shape)]
+        offset = _align(offset + array.nbytes)
+    blob = json.dumps(dict(header, sections=layout)).encode("utf-8")
+    start = _align(len(MAGIC) + 4 + len(blob))
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(blob)) + blob)
+        for key, array in sections.items():
+            f.seek(start + layout[key][0])
+            f.write(array.tobytes())
+        f.truncate(start + offset)
+    os.replace(tmp, path)
+
+
+# ==================== READER ====================
+class RegionPack:
+    """A region pack opened with mmap.
+
+    Every section is a read-only NumPy view into the mapping, so opening
+    costs one header parse and pages are read on first touch and shared by
+    every process that opens the same file. POI records are sorted by grid
+    cell: a box query is one binary search per cell row.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mmap
+        if mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a region pack")
+        (size,) = struct.unpack_from("<I", mm, len(MAGIC))
+        self.header = json.loads(mm[len(MAGIC) + 4:len(MAGIC) + 4 + size])
+        if self.header.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{path} has pack format {self.header.get('format')}, expected {FORMAT_VERSION}")
+        start = _align(len(MAGIC) + 4 + size)
+        self.arrays = {}
+        for key, (offset, descr, shape) in self.header["sections"].items():
+            dtype = descr_to_dtype(descr if isinstance(descr, str) else [tuple(field) for field in descr])
+            count = math.prod(shape)
+            if count == 0:   # may sit at the very end of the file, where frombuffer refuses the offset
+                self.arrays[key] = np.empty(shape, dtype=dtype)
+                continue
+            self.arrays[key] = np.frombuffer(mm, dtype=dtype, count=count, offset=start + offset).reshape(shape)
+        self.name = self.header["name"]
+        self.version = self.header["version"]
+        self.bbox = self.header["bbox"]
+        self.kinds = self.header["kinds"]
+        self.cell_deg = self.header["cell_deg"]
+        self.poi = self.arrays["poi"]
+        self._cells = self.arrays["poi_cell"]
+        self._names = self.arrays["poi_names"]
+
+    def __len__(self):
+        return len(self.poi)
+
+    def __repr__(self):
+        return f"RegionPack({self.name!r}, version={self.version!r}, pois={len(self)}, nodes={len(self.graph)})"
+
+    @cached_property
+    def graph(self):
+        return RoadGraph.from_arrays({key[6:]: array for key, array in self.arrays.items() if key.startswith("graph.")})
+
+    def covers(self, lat, lon):
+        if self.bbox is None:
+            return False
+        south, west, north, east = self.bbox
+        return south <= lat <= north and west <= lon <= east
+
+    def contains_box(self, box):
+        return self.covers(box[0], box[1]) and self.covers(box[2], box[3])
+
+    def intersects_box(self, box):
+        if self.bbox is None:
+            return False
+        south, west, north, east = self.bbox
+        return box[0] <= north and box[2] >= south and box[1] <= east and box[3] >= west
+
+    # Whether each record matches any selector: the element type (from the
+    # sign of osm_id) and one of the record's categories must both match
+    def _matches(self, rec, selectors):
+        found = np.zeros(len(rec), dtype=bool)
+        for kind, key, op, value in parse_selectors(selectors):
+            mask = np.array([any(_category_matches(c, key, op, value) for c in categories)
+                             for categories in self.kinds], dtype=bool)
+            hit = mask[rec["kind"]]
+            if kind == "node":
+                hit &= rec["osm_id"] >= 0
+            elif kind == "way":
+                hit &= rec["osm_id"] < 0
+            found |= hit
+        return found
+
+    def rows_in_box(self, south, west, north, east, selectors=None):
+        """POI rows inside a (south, west, north, east) box matching `selectors`."""
+        cy0, cy1 = math.floor(south / self.cell_deg), math.floor(north / self.cell_deg)
+        cx0, cx1 = math.floor(west / self.cell_deg), math.floor(east / self.cell_deg)
+        cys = np.arange(cy0, cy1 + 1)
+        lo = np.searchsorted(self._cells, _cell_key(cys, cx0))
+        hi = np.searchsorted(self._cells, _cell_key(cys, cx1), side="right")
+        rows = np.concatenate([np.arange(a, b) for a, b in zip(lo.tolist(), hi.tolist())] or [np.empty(0, np.intp)])
+        rec = self.poi[rows]
+        lat, lon = rec["lat"] / E7, rec["lon"] / E7
+        keep = (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+        if selectors is not None:
+            keep &= self._matches(rec, selectors)
+        return rows[keep]
+
+    def within(self, lat, lon, radius, selectors=None):
+        """[(distance_m, row)] for places within `radius`, nearest first."""
+        dlat = radius / M_PER_DEG
+        dlon = radius / (M_PER_DEG * max(math.cos(math.radians(lat)), 1e-6))
+        rows = self.rows_in_box(lat - dlat, lon - dlon, lat + dlat, lon + dlon, selectors)
+        rec = self.poi[rows]
+        dist = haversine_np(lat, lon, rec["lat"] / E7, rec["lon"] / E7)
+        keep = dist <= radius
+        rows, dist = rows[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")
+        return [(float(dist[j]), int(rows[j])) for j in order]
+
+    def coords(self, row):
+        return int(self.poi["lat"][row]) / E7, int(self.poi["lon"][row]) / E7
+
+    def tags(self, row):
+        rec = self.poi[row]
+        tags = dict(kind.split("=", 1) for kind in self.kinds[int(rec["kind"])])
+        if rec["name_len"]:
+            start = int(rec["name"])
+            tags["name"] = self._names[start:start + int(rec["name_len"])].tobytes().decode("utf-8", "replace")
+        return tags
+
+    def element(self, row):
+        """The POI as an Overpass element, as PoiCache and PlaceIndex expect."""
+        osm_id = int(self.poi["osm_id"][row])
+        lat, lon = self.coords(row)
+        elem = {"type": "node" if osm_id >= 0 else "way", "id": abs(osm_id), "tags": self.tags(row)}
+        if osm_id >= 0:
+            elem.update(lat=lat, lon=lon)
+        else:
+            elem["center"] = {"lat": lat, "lon": lon}
+        return elem
+
+    def places(self, lat, lon, limit, radius, selectors=None):
+        """`name -> [lat, lon]` for the closest `limit` places, nearest first."""
+        result = {}
+        for _, row in self.within(lat, lon, radius, selectors):
+            if len(result) >= limit:
+                break
+            result.setdefault(element_name({"tags": self.tags(row)}), list(self.coords(row)))
+        return result
+
+    def fetch_boxes(self, selectors, bboxes):
+        """Drop-in for overpass.fetch_boxes answered from the pack."""
+        return list(self.stream_boxes(selectors, bboxes))
+
+    def stream_boxes(self, selectors, bboxes):
+        """Drop-in for overpass.stream_boxes: elements are built one at a time."""
+        for box in bboxes:
+            for row in self.rows_in_box(*box, selectors).tolist():
+                yield self.element(row)
+
+
+# Streaming Overpass stand-in for PoiCache: boxes inside the pack are answered
+# from it and the rest by `fallback`. If the fallback fails and every remaining
+# box overlaps the pack, the pack's partial data follows whatever the fallback
+# had already yielded rather than nothing (PoiCache drops the repeats).
+def pack_fetch(pack, fallback=overpass.stream_boxes):
+    def fetch(selectors, bboxes):
+        inside = [box for box in bboxes if pack.contains_box(box)]
+        outside = [box for box in bboxes if not pack.contains_box(box)]
+        yield from pack.stream_boxes(selectors, inside)
+        if outside:
+            try:
+                yield from fallback(selectors, outside)
+            except overpass.OverpassError:
+                if not all(pack.intersects_box(box) for box in outside):
+                    raise
+                yield from pack.stream_boxes(selectors, outside)
+    return fetch
+
+
+_default = None
+_default_loaded = False
+_default_lock = threading.Lock()
+
+
+# Region pack named by NAVIGATOR_PACK, opened once per process; None when unset
+def default_pack():
+    global _default, _default_loaded
+    with _default_lock:
+        if not _default_loaded:
+            path = os.environ.get("NAVIGATOR_PACK")
+            _default = RegionPack(path) if path and os.path.exists(path) else None
+            _default_loaded = True
+        return _default
@@ -0,0 +1,76 @@
+import threading
+from collections import OrderedDict
+
+from .tracing import count, span
+
+DEFAULT_MAXSIZE = 1024
+SNAP_DECIMALS = 4   # ~11 m grid; GPS fixes closer than that share a route
+
+
+# Endpoint snapped to the cache grid
+def snap(point, decimals=SNAP_DECIMALS):
+    return round(float(point[0]), decimals), round(float(point[1]), decimals)
+
+
+class RouteCache:
+    """Bounded LRU of language-independent routes keyed on grid-snapped endpoints.
+
+    Routes are computed from the snapped endpoints so every request that maps
+    to the same key gets an identical result; localized instructions are
+    rendered from the cached route by the caller.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, decimals=SNAP_DECIMALS):
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self.hits = 0
+        self.misses = 0
+        self._routes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._routes)
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, start, end, compute, namespace=""):
+        """Cached `compute(start, end)` for the snapped endpoints."""
+        start, end = snap(start, self.decimals), snap(end, self.decimals)
+        key = (namespace, start, end)
+        with self._lock:
+            route = self._routes.get(key)
+            if route is not None:
+                self._routes.move_to_end(key)
+                self.hits += 1
+                count("cache_hits", cache="route")
+                return route
+            self.misses += 1
+        count("cache_misses", cache="route")
+        with span("route.compute"):
+            route = compute(list(start), list(end))
+        with self._lock:
+            self._routes[key] = route
+            self._routes.move_to_end(key)
+            while len(self._routes) > self.maxsize:
+                self._routes.popitem(last=False)
+        return route
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+# Process-wide route cache shared by every Streamlit session
+def default_route_cache():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = RouteCache()
+        return _default
@@ -0,0 +1,437 @@
+import bz2
+import gzip
+import hashlib
+import heapq
+import json
+import math
+import os
+import threading
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from functools import cached_property
+
+import numpy as np
+
+from .geodesy import R, as_points, haversine, haversine_np, segment_lengths, bearings_along
+from .geometry import dp_importance, meters_per_pixel, PIXEL_TOLERANCE
+
+# Ways that are never walkable/drivable even though they carry a highway tag
+NON_ROUTABLE = {"proposed", "construction", "abandoned", "platform", "bus_stop", "elevator", "raceway", "corridor"}
+ONEWAY_FORWARD = {"yes", "true", "1"}
+GRAPH_ARRAYS = ("lat", "lon", "indptr", "indices", "weights", "degree", "rev_indptr", "rev_indices", "rev_weights")
+STRAIGHT_BAND = 20  # degrees; matches the "straight" band of get_direction_text
+# Maneuver kinds
+TURN = "turn"
+STOP = "stop"       # an intermediate arrival of a multi-stop tour (navigator.tour)
+
+# One step of a route: a turn between two bearings, or a stop at the named place
+# (no bearings), reached after `distance` meters
+Maneuver = namedtuple("Maneuver", "kind bearing_in bearing_out distance name", defaults=(None,))
+MAX_SNAP = 500      # meters from the nearest road node before giving up on the graph
+M_PER_DEG = math.pi * R / 180
+
+
+def _open(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+# Highway ways as (node_refs, tags) plus a node_id -> (lat, lon) map, from OSM XML.
+# Pass a list as `places` to also collect tagged nodes into it as (node_id, tags),
+# and one as `way_ids` to get the OSM id of each way, in the order of `ways`.
+def read_osm_xml(path, places=None, way_ids=None):
+    coords = {}
+    ways = []
+    with _open(path) as fh:
+        refs, tags = None, None
+        for event, elem in ET.iterparse(fh, events=("start", "end")):
+            if event == "start":
+                if elem.tag == "way":
+                    refs, tags = [], {}
+                    if way_ids is not None:
+                        way_ids.append(int(elem.get("id")))
+                continue
+            if elem.tag == "node":
+                node = int(elem.get("id"))
+                coords[node] = (float(elem.get("lat")), float(elem.get("lon")))
+                if places is not None and len(elem):
+                    places.append((node, {t.get("k"): t.get("v") for t in elem.iter("tag")}))
+                elem.clear()
+            elif elem.tag == "nd" and refs is not None:
+                refs.append(int(elem.get("ref")))
+            elif elem.tag == "tag" and tags is not None:
+                tags[elem.get("k")] = elem.get("v")
+            elif elem.tag == "way":
+                ways.append((refs, tags))
+                refs, tags = None, None
+                elem.clear()
+    return coords, ways
+
+
+# Same as read_osm_xml for Overpass JSON (`way["highway"]; (._;>;); out body;`)
+def read_overpass_json(path, places=None, way_ids=None):
+    with _open(path) as fh:
+        data = json.load(fh)
+    coords = {}
+    ways = []
+    for elem in data.get("elements", []):
+        if elem.get("type") == "node":
+            coords[elem["id"]] = (elem["lat"], elem["lon"])
+            if places is not None and elem.get("tags"):
+                places.append((elem["id"], elem["tags"]))
+        elif elem.get("type") == "way":
+            ways.append((elem.get("nodes", []), elem.get("tags", {})))
+            if way_ids is not None:
+                way_ids.append(elem["id"])
+    return coords, ways
+
+
+class Route:
+    """A routed path: vertex polyline, length and language-independent maneuvers.
+
+    Each maneuver is a Maneuver: a TURN with the bearings and leg distance
+    get_direction_text takes, or a STOP of a multi-stop tour with the place
+    name; `turn_indices[i]` is the path vertex where maneuver i happens.
+    """
+
+    def __init__(self, path, distance, maneuvers, turn_indices=None):
+        self.path = path
+        self.distance = distance
+        self.maneuvers = maneuvers
+        self.turn_indices = list(turn_indices) if turn_indices is not None else []
+        self._importance = None
+
+    def step_vertices(self, step):
+        """(last passed, next) path vertex for instruction `step`; the final
+        "arrived" step points at the destination."""
+        turns = [0] + self.turn_indices + [len(self.path) - 1]
+        step = max(0, min(step, len(turns) - 2))
+        return turns[step], turns[step + 1]
+
+    def simplified(self, zoom, end=None):
+        """Path (or its prefix up to vertex `end`) reduced to what is visible at
+        `zoom`. The Douglas-Peucker ranking is computed once per route, so
+        every zoom level after the first is a single mask."""
+        if self._importance is None:
+            self._importance = dp_importance(self.path)
+        end = len(self.path) - 1 if end is None else end
+        tolerance = PIXEL_TOLERANCE * meters_per_pixel(self.path[0][0], zoom)
+        keep = self._importance[:end + 1] > tolerance
+        keep[0] = keep[end] = True
+        return [point for point, k in zip(self.path, keep.tolist()) if k]
+
+    @cached_property
+    def key(self):
+        """Hashable identity for cache keys: a digest of the whole path, so routes
+        sharing their endpoints and vertex count still differ."""
+        return hashlib.blake2b(as_points(self.path).tobytes(), digest_size=16).hexdigest()
+
+
+class RoadGraph:
+    """Road network in CSR form: neighbours of node u are
+    indices[indptr[u]:indptr[u + 1]] with edge lengths in weights (meters).
+
+    A* uses the larger of a straight-line bound and an ALT bound (triangle
+    inequality against a few precomputed landmarks), both evaluated for the
+    whole graph with NumPy once per query so the search loop only does list
+    lookups.
+    """
+
+    def __init__(self, lat, lon, indptr, indices, weights, landmarks=8):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.num_landmarks = landmarks
+        self._from_landmark = None
+        self._to_landmark = None
+        n = len(self.lat)
+        # Distinct neighbours per node, ignoring direction; >= 3 means a junction
+        src = np.repeat(np.arange(n, dtype=np.int64), np.diff(self.indptr))
+        pairs = np.unique(np.minimum(src, self.indices) * n + np.maximum(src, self.indices))
+        self.degree = np.bincount(pairs // n, minlength=n) + np.bincount(pairs % n, minlength=n)
+        # Reverse CSR (incoming arcs) for distances *to* a node
+        order = np.argsort(self.indices, kind="stable")
+        self.rev_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=n), out=self.rev_indptr[1:])
+        self.rev_indices = src[order].astype(np.int32)
+        self.rev_weights = self.weights[order]
+        self._plane()
+
+    def _plane(self):
+        # Equirectangular plane for the straight-line bound; scaling x by the
+        # cosine of the highest |lat| keeps it below the haversine edge weights.
+        cos_lat = math.cos(math.radians(float(np.abs(self.lat).max()))) if len(self.lat) else 1.0
+        self._x = self.lon * M_PER_DEG * cos_lat * 0.999
+        self._y = self.lat * M_PER_DEG * 0.999
+
+    # Plain lists are much faster than NumPy scalars inside the search loop;
+    # built on first search so loading a graph stays cheap
+    @cached_property
+    def _fwd(self):
+        return self.indptr.tolist(), self.indices.tolist(), self.weights.tolist()
+
+    @cached_property
+    def _rev(self):
+        return self.rev_indptr.tolist(), self.rev_indices.tolist(), self.rev_weights.tolist()
+
+    def __len__(self):
+        return len(self.lat)
+
+    def arrays(self):
+        """Every flat array the graph needs, derived ones and landmark tables
+        (float32) included; from_arrays rebuilds the graph from them as is."""
+        arrays = {name: getattr(self, name) for name in GRAPH_ARRAYS}
+        if self._from_landmark is not None:
+            arrays["from_landmark"] = self._from_landmark.astype(np.float32)
+            arrays["to_landmark"] = self._to_landmark.astype(np.float32)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Graph over the arrays of `arrays()` without copying or recomputing
+        them, so read-only memory-mapped arrays load in constant time."""
+        graph = cls.__new__(cls)
+        for name in GRAPH_ARRAYS:
+            setattr(graph, name, arrays[name])
+        graph._from_landmark = arrays.get("from_landmark")
+        graph._to_landmark = arrays.get("to_landmark")
+        graph.num_landmarks = len(graph._from_landmark) if graph._from_landmark is not None else 8
+        graph._plane()
+        return graph
+
+    @classmethod
+    def from_ways(cls, coords, ways, oneway=False):
+        """Build from (node_refs, tags) ways; `oneway` honours oneway tags (driving)."""
+        index = {}
+        src, dst = [], []
+        for refs, tags in ways:
+            highway = tags.get("highway")
+            if not highway or highway in NON_ROUTABLE or tags.get("area") == "yes":
+                continue
+            direction = tags.get("oneway", "no")
+            if tags.get("junction") == "roundabout" and direction == "no":
+                direction = "yes"
+            for a, b in zip(refs, refs[1:]):
+                if a not in coords or b not in coords or a == b:
+                    continue
+                ia = index.setdefault(a, len(index))
+                ib = index.setdefault(b, len(index))
+                if oneway and direction in ONEWAY_FORWARD:
+                    src.append(ia)
+                    dst.append(ib)
+                elif oneway and direction == "-1":
+                    src.append(ib)
+                    dst.append(ia)
+                else:
+                    src += (ia, ib)
+                    dst += (ib, ia)
+        pts = np.array([coords[node] for node in index], dtype=np.float64).reshape(-1, 2)
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int32)
+        weights = haversine_np(pts[src, 0], pts[src, 1], pts[dst, 0], pts[dst, 1])
+        order = np.argsort(src, kind="stable")
+        indptr = np.zeros(len(pts) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=len(pts)), out=indptr[1:])
+        return cls(pts[:, 0], pts[:, 1], indptr, dst[order], weights[order])
+
+    @classmethod
+    def from_file(cls, path, oneway=False):
+        """Load an OSM XML (.osm[.gz|.bz2]) or Overpass JSON (.json[.gz]) extract."""
+        reader = read_overpass_json if ".json" in os.path.basename(path) else read_osm_xml
+        return cls.from_ways(*reader(path), oneway=oneway)
+
+    def nearest_node(self, lat, lon):
+        dy = self.lat - lat
+        dx = (self.lon - lon) * math.cos(math.radians(lat))
+        return int(np.argmin(dx * dx + dy * dy))
+
+    def shortest_distances(self, source, reverse=False, limit=math.inf):
+        """One-to-all Dijkstra: meters from `source` to every node (to it when
+        `reverse`), inf where unreachable or beyond `limit`."""
+        indptr, indices, weights = self._rev if reverse else self._fwd
+        dist = [math.inf] * len(indptr[:-1])
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        pop, push = heapq.heappop, heapq.heappush
+        while heap:
+            du, u = pop(heap)
+            if du > dist[u]:
+                continue
+            if du > limit:
+                dist[u] = math.inf
+                continue
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                nd = du + weights[e]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    push(heap, (nd, v))
+        dist = np.array(dist)
+        dist[dist > limit] = math.inf
+        return dist
+
+    def one_to_many(self, source, targets, limit=math.inf):
+        """Dijkstra from `source` that stops once every node in `targets` is
+        settled; meters to each target in order, inf where unreachable."""
+        indptr, indices, weights = self._fwd
+        remaining = set(targets)
+        dist = {source: 0.0}
+        heap = [(0.0, source)]
+        pop, push = heapq.heappop, heapq.heappush
+        while heap and remaining:
+            du, u = pop(heap)
+            if du > dist[u]:
+                continue
+            if du > limit:
+                break
+            remaining.discard(u)
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                nd = du + weights[e]
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    push(heap, (nd, v))
+        return np.array([dist[t] if t not in remaining and t in dist else math.inf for t in targets])
+
+    def prepare_landmarks(self):
+        """Pick landmarks by farthest-point selection and store distances from/to them."""
+        n = len(self)
+        if self._from_landmark is not None or n == 0 or not self.num_landmarks:
+            return
+        from_lm, to_lm = [], []
+        # Start from the node farthest from the centroid, then keep adding the
+        # node farthest (in road distance) from every landmark chosen so far.
+        spread = np.hypot(self._x - self._x.mean(), self._y - self._y.mean())
+        landmark = int(np.argmax(spread))
+        nearest_lm = np.full(n, math.inf)
+        for _ in range(min(self.num_landmarks, n)):
+            d_from = self.shortest_distances(landmark)
+            from_lm.append(d_from)
+            to_lm.append(self.shortest_distances(landmark, reverse=True))
+            nearest_lm = np.minimum(nearest_lm, d_from)
+            reachable = np.where(np.isfinite(nearest_lm), nearest_lm, -1.0)
+            landmark = int(np.argmax(reachable))
+        self._from_landmark = np.array(from_lm)
+        self._to_landmark = np.array(to_lm)
+
+    def heuristic(self, target):
+        """Lower bound of the road distance from every node to `target`."""
+        h = np.hypot(self._x - self._x[target], self._y - self._y[target])
+        if self._from_landmark is not None:
+            with np.errstate(invalid="ignore"):
+                # d(v, t) >= d(L, t) - d(L, v)  and  d(v, t) >= d(v, L) - d(t, L)
+                alt = np.maximum(
+                    (self._from_landmark[:, target, None] - self._from_landmark).max(axis=0),
+                    (self._to_landmark - self._to_landmark[:, target, None]).max(axis=0),
+                )
+            h = np.fmax(h, alt)
+        return h
+
+    def astar(self, source, target):
+        """Shortest node path from source to target, or None if unreachable."""
+        self.prepare_landmarks()
+        indptr, indices, weights = self._fwd
+        h = self.heuristic(target).tolist()
+        n = len(h)
+        inf = math.inf
+        dist = [inf] * n
+        parent = [-1] * n
+        closed = bytearray(n)
+        dist[source] = 0.0
+        heap = [(h[source], source)]
+        pop, push = heapq.heappop, heapq.heappush
+        while heap:
+            _, u = pop(heap)
+            if u == target:
+                path = []
+                while u != -1:
+                    path.append(u)
+                    u = parent[u]
+                return path[::-1]
+            if closed[u]:
+                continue
+            closed[u] = 1
+            du = dist[u]
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                nd = du + weights[e]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    parent[v] = u
+                    push(heap, (nd + h[v], v))
+        return None
+
+    def route(self, start, end, max_snap=MAX_SNAP):
+        """Route between two [lat, lon] points snapped to the nearest graph nodes.
+
+        Returns None when either endpoint is more than `max_snap` meters from
+        the network (outside the loaded extract) or no path exists.
+        """
+        s, t = self.nearest_node(*start), self.nearest_node(*end)
+        if (haversine(*start, self.lat[s], self.lon[s]) > max_snap
+                or haversine(*end, self.lat[t], self.lon[t]) > max_snap):
+            return None
+        nodes = self.astar(s, t)
+        if nodes is None:
+            return None
+        points = [list(start)] + [[float(self.lat[n]), float(self.lon[n])] for n in nodes] + [list(end)]
+        # Junction flag per vertex (the snapped endpoints never are)
+        flags = [False] + [bool(self.degree[n] >= 3) for n in nodes] + [False]
+        path, junction = [], []
+        for point, flag in zip(points, flags):
+            if path and point == path[-1]:
+                junction[-1] = junction[-1] or flag
+                continue
+            path.append(point)
+            junction.append(flag)
+        if len(path) < 2:
+            return Route(path, 0.0, [], [])
+        seg_len, seg_bearing = segment_lengths(path), bearings_along(path)
+        # Announce only real turns at junctions; bends along a single road are followed silently
+        steps, turns = [], []
+        leg = 0.0
+        for i in range(1, len(path) - 1):
+            leg += seg_len[i - 1]
+            diff = (seg_bearing[i] - seg_bearing[i - 1] + 360) % 360
+            if junction[i] and STRAIGHT_BAND <= diff <= 360 - STRAIGHT_BAND:
+                steps.append(Maneuver(TURN, float(seg_bearing[i - 1]), float(seg_bearing[i]), leg))
+                turns.append(i)
+                leg = 0.0
+        return Route(path, float(seg_len.sum()), steps, turns)
+
+
+_default = None
+_default_loaded = False
+_default_lock = threading.Lock()
+
+
+# Road graph of the region pack named by NAVIGATOR_PACK (memory-mapped, no parsing),
+# else of the extract named by NAVIGATOR_ROADS; loaded once per process
+def default_graph():
+    global _default, _default_loaded
+    with _default_lock:
+        if not _default_loaded:
+            from .region_pack import default_pack
+            pack = default_pack()
+            path = os.environ.get("NAVIGATOR_ROADS")
+            if pack is not None:
+                _default = pack.graph
+            elif path and os.path.exists(path):
+                _default = RoadGraph.from_file(path)
+                _default.prepare_landmarks()
+            _default_loaded = True
+        return _default
+
+
+# Real road route when a road extract is configured, else None
+def plan_route(start, end, graph=None):
+    if graph is None:
+        graph = default_graph()
+    if graph is None or not len(graph):
+        return None
+    return graph.route(start, end)
@@ -0,0 +1,150 @@
+import math
+
+import numpy as np
+
+from .geodesy import haversine_np
+from .overpass import element_coords
+
+DEFAULT_CELL = 250          # grid cell edge in meters
+M_PER_DEG = 111320.0
+KIND_TAGS = ('amenity', 'shop', 'tourism', 'office', 'highway')
+
+
+# Display name for an Overpass element (same precedence as the search UIs)
+def element_name(elem):
+    tags = elem.get('tags', {})
+    return tags.get('name') or tags.get('amenity') or tags.get('shop') or tags.get('highway') or 'Place'
+
+
+# Category values of an element, e.g. {"pharmacy"} or {"supermarket"}
+def element_kinds(elem):
+    tags = elem.get('tags', {})
+    return {tags[t] for t in KIND_TAGS if t in tags}
+
+
+class PlaceIndex:
+    """Incremental uniform-grid index over fetched places.
+
+    Coordinates live in growable NumPy arrays and each grid cell keeps the row
+    numbers of its points, so new Overpass results are appended without
+    rebuilding. Radius and k-nearest queries only measure points in nearby
+    cells.
+    """
+
+    def __init__(self, cell_size=DEFAULT_CELL):
+        self.cell_deg = cell_size / M_PER_DEG
+        self._lat = np.empty(64)
+        self._lon = np.empty(64)
+        self._n = 0
+        self.names = []
+        self.tags = []
+        self._keys = {}
+        self._cells = {}
+        self._by_kind = {}
+
+    def __len__(self):
+        return self._n
+
+    def _cell(self, lat, lon):
+        return int(lat // self.cell_deg), int(lon // self.cell_deg)
+
+    def add(self, key, name, lat, lon, tags=None):
+        """Insert one place; returns False if `key` is already indexed."""
+        if key in self._keys:
+            return False
+        if self._n == len(self._lat):
+            self._lat = np.resize(self._lat, 2 * self._n)
+            self._lon = np.resize(self._lon, 2 * self._n)
+        i = self._n
+        self._lat[i], self._lon[i] = lat, lon
+        self._n += 1
+        self._keys[key] = i
+        self.names.append(name)
+        self.tags.append(tags or {})
+        self._cells.setdefault(self._cell(lat, lon), []).append(i)
+        for kind in element_kinds({'tags': tags or {}}):
+            self._by_kind.setdefault(kind, []).append(i)
+        return True
+
+    def add_elements(self, elements):
+        """Index raw Overpass elements; returns how many were new."""
+        added = 0
+        for elem in elements:
+            coords = element_coords(elem)
+            if coords and self.add((elem.get('type'), elem.get('id')), element_name(elem), *coords, elem.get('tags')):
+                added += 1
+        return added
+
+    def coords(self, i):
+        return float(self._lat[i]), float(self._lon[i])
+
+    def _measure(self, lat, lon, rows):
+        rows = np.asarray(rows, dtype=np.intp)
+        return rows, haversine_np(lat, lon, self._lat[rows], self._lon[rows])
+
+    def _ring(self, cy, cx, r):
+        if r == 0:
+            return self._cells.get((cy, cx), [])
+        rows = []
+        for dy in range(-r, r + 1):
+            step = 1 if abs(dy) == r else 2 * r
+            for dx in range(-r, r + 1, step):
+                rows.extend(self._cells.get((cy + dy, cx + dx), ()))
+        return rows
+
+    def within(self, lat, lon, radius, kind=None):
+        """[(distance_m, row)] for places within `radius`, nearest first."""
+        if kind is not None:
+            rows, dist = self._measure(lat, lon, self._by_kind.get(kind, []))
+        else:
+            reach = math.ceil(radius / (M_PER_DEG * max(math.cos(math.radians(lat)), 1e-6)) / self.cell_deg)
+            cy, cx = self._cell(lat, lon)
+            candidates = []
+            for dy in range(-reach, reach + 1):
+                for dx in range(-reach, reach + 1):
+                    candidates.extend(self._cells.get((cy + dy, cx + dx), ()))
+            rows, dist = self._measure(lat, lon, candidates)
+        keep = dist <= radius
+        rows, dist = rows[keep], dist[keep]
+        order = np.argsort(dist, kind='stable')
+        return [(float(dist[j]), int(rows[j])) for j in order]
+
+    def nearest(self, lat, lon, k, kind=None):
+        """[(distance_m, row)] for the k closest places, nearest first."""
+        if k <= 0 or not self._n:
+            return []
+        if kind is not None:
+            rows, dist = self._measure(lat, lon, self._by_kind.get(kind, []))
+        else:
+            # Expand square rings of cells until the k-th best distance is closer
+            # than anything an unvisited ring could contain; fall back to a full
+            # scan once the rings outgrow the populated cells.
+            cy, cx = self._cell(lat, lon)
+            ring_m = self.cell_deg * M_PER_DEG * max(math.cos(math.radians(lat)), 1e-6)
+            candidates = []
+            r = 0
+            while True:
+                if (2 * r + 1) ** 2 > 4 * len(self._cells):
+                    rows, dist = self._measure(lat, lon, range(self._n))
+                    break
+                candidates.extend(self._ring(cy, cx, r))
+                if len(candidates) >= k:
+                    rows, dist = self._measure(lat, lon, candidates)
+                    if np.partition(dist, k - 1)[k - 1] <= r * ring_m:
+                        break
+                r += 1
+        if len(rows) > k:
+            part = np.argpartition(dist, k - 1)[:k]
+            rows, dist = rows[part], dist[part]
+        order = np.argsort(dist, kind='stable')
+        return [(float(dist[j]), int(rows[j])) for j in order]
+
+    def places(self, lat, lon, limit, radius=None):
+        """`name -> [lat, lon]` for the closest `limit` places, nearest first."""
+        hits = self.within(lat, lon, radius) if radius is not None else self.nearest(lat, lon, limit * 4)
+        result = {}
+        for _, i in hits:
+            if len(result) >= limit:
+                break
+            result.setdefault(self.names[i], list(self.coords(i)))
+        return result
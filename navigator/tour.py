@@ -0,0 +1,137 @@
+import itertools
+import random
+import time
+
+import numpy as np
+
+from .routing import STOP, Maneuver, Route
+
+TIME_BUDGET = 0.25  # seconds; 50 stops reach a local optimum in a few ms, the rest goes to kicks
+
+
+# ==================== ORDERING ====================
+def nearest_neighbour(matrix, start=0):
+    n = len(matrix)
+    tour, seen = [start], {start}
+    while len(tour) < n:
+        row = matrix[tour[-1]]
+        nxt = min((j for j in range(n) if j not in seen), key=row.__getitem__)
+        tour.append(nxt)
+        seen.add(nxt)
+    return tour
+
+
+def path_cost(matrix, tour):
+    return float(sum(matrix[a][b] for a, b in zip(tour, tour[1:])))
+
+
+def _two_opt(m, tour, deadline):
+    # Open path, start fixed. Reversing tour[i..j] costs rev(i..j) instead of
+    # fwd(i..j); prefix sums over both directions make every move O(1), so
+    # asymmetric (one-way) matrices are handled exactly.
+    n = len(tour)
+    fwd, back = [0.0] * n, [0.0] * n
+    for k in range(1, n):
+        fwd[k] = fwd[k - 1] + m[tour[k - 1]][tour[k]]
+        back[k] = back[k - 1] + m[tour[k]][tour[k - 1]]
+    for i in range(1, n - 1):
+        a, ti = tour[i - 1], tour[i]
+        for j in range(i + 1, n):
+            tj = tour[j]
+            old = m[a][ti] + fwd[j] - fwd[i]
+            new = m[a][tj] + back[j] - back[i]
+            if j < n - 1:
+                b = tour[j + 1]
+                old += m[tj][b]
+                new += m[ti][b]
+            if new < old - 1e-9:
+                tour[i:j + 1] = tour[i:j + 1][::-1]
+                return True
+        if time.perf_counter() > deadline:
+            return False
+    return False
+
+
+def _or_opt(m, tour, deadline):
+    # Move a run of 1-3 stops (kept in order) to the best other gap
+    n = len(tour)
+    for length in (1, 2, 3):
+        for i in range(1, n - length + 1):
+            s0, se = tour[i], tour[i + length - 1]
+            p = tour[i - 1]
+            q = tour[i + length] if i + length < n else None
+            removal = m[p][s0] + (m[se][q] - m[p][q] if q is not None else 0.0)
+            rest = tour[:i] + tour[i + length:]
+            for k in range(len(rest)):
+                if k == i - 1:
+                    continue   # same gap it came from
+                u = rest[k]
+                v = rest[k + 1] if k + 1 < len(rest) else None
+                insertion = m[u][s0] + (m[se][v] - m[u][v] if v is not None else 0.0)
+                if insertion < removal - 1e-9:
+                    tour[:] = rest[:k + 1] + tour[i:i + length] + rest[k + 1:]
+                    return True
+            if time.perf_counter() > deadline:
+                return False
+    return False
+
+
+def _local_search(m, tour, deadline):
+    while time.perf_counter() < deadline:
+        if _two_opt(m, tour, deadline):
+            continue
+        if not _or_opt(m, tour, deadline):
+            break
+
+
+# Double-bridge kick: reconnect three cut segments in another order (start stays
+# first). The last cut may fall after the end so the open path's tail moves too.
+def _kick(tour, rng):
+    a, b, c = sorted(rng.sample(range(1, len(tour) + 1), 3))
+    return tour[:a] + tour[b:c] + tour[a:b] + tour[c:]
+
+
+def plan_tour(matrix, start=0, time_budget=TIME_BUDGET, seed=0):
+    """Visiting order for an open tour from `start` over every row of `matrix`.
+
+    Nearest neighbour construction, then 2-opt and Or-opt first-improvement
+    moves to a local optimum; whatever is left of `time_budget` seconds goes
+    to iterated local search (double-bridge kick, search again, keep if
+    shorter). Returns (order, cost) with order[0] == start.
+    """
+    # Unreachable pairs (inf in network matrices) become a large finite penalty
+    m = np.nan_to_num(np.asarray(matrix, dtype=np.float64), posinf=1e12).tolist()
+    if len(m) <= 4:   # at most 6 orders: just try them all
+        rest = [i for i in range(len(m)) if i != start]
+        order = min(([start, *p] for p in itertools.permutations(rest)), key=lambda o: path_cost(m, o))
+        return order, path_cost(m, order)
+    deadline = time.perf_counter() + time_budget
+    best = nearest_neighbour(m, start)
+    _local_search(m, best, deadline)
+    best_cost = path_cost(m, best)
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        candidate = _kick(best, rng)
+        _local_search(m, candidate, deadline)
+        cost = path_cost(m, candidate)
+        if cost < best_cost - 1e-9:
+            best, best_cost = candidate, cost
+    return best, best_cost
+
+
+# ==================== COMBINED ROUTE ====================
+def tour_route(legs, stop_names):
+    """One Route through consecutive legs. Every leg but the last ends with a
+    STOP maneuver naming the place at its final vertex, so trackers,
+    the map and the step list treat each intermediate arrival like a turn."""
+    path, maneuvers, turns = [], [], []
+    for n, (leg, name) in enumerate(zip(legs, stop_names)):
+        offset = max(len(path) - 1, 0)
+        path.extend(leg.path if not path else leg.path[1:])
+        maneuvers.extend(leg.maneuvers)
+        turns.extend(offset + i for i in leg.turn_indices)
+        if n < len(legs) - 1:
+            travelled = sum(m.distance for m in leg.maneuvers)
+            maneuvers.append(Maneuver(STOP, None, None, max(leg.distance - travelled, 0.0), name))
+            turns.append(len(path) - 1)
+    return Route(path, float(sum(leg.distance for leg in legs)), maneuvers, turns)
@@ -0,0 +1,190 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+
+# Latency histogram bounds in seconds (Prometheus `le` labels)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_RUN_SPANS = 2000   # per run; a runaway loop cannot grow a trace without bound
+TRACE_FILE = os.environ.get("NAVIGATOR_TRACE_FILE")       # JSON lines, one finished run per line
+METRICS_FILE = os.environ.get("NAVIGATOR_METRICS_FILE")   # Prometheus text, rewritten per run
+
+_enabled = os.environ.get("NAVIGATOR_TRACING", "") not in ("", "0")
+_run = contextvars.ContextVar("navigator_trace", default=None)
+_perf = time.perf_counter
+
+
+class Trace:
+    """Spans and counters of one script run. Spans are (name, start_s,
+    duration_s) relative to the run start, appended as they finish."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.time()
+        self.t0 = _perf()
+        self.duration = None
+        self.spans = []
+        self.counters = {}
+
+    def to_json(self):
+        return json.dumps({
+            "run": self.name, "ts": round(self.started, 3),
+            "duration_ms": round(1000 * (self.duration if self.duration is not None else _perf() - self.t0), 3),
+            "spans": [{"name": n, "start_ms": round(1000 * s, 3), "ms": round(1000 * d, 3)} for n, s, d in self.spans],
+            "counters": {_label_text(name, labels): value for (name, labels), value in self.counters.items()},
+        }, ensure_ascii=False)
+
+
+class Metrics:
+    """Process-wide aggregates over every traced run: a latency histogram
+    per span name and labelled counters."""
+
+    def __init__(self):
+        self.histograms = {}   # name -> [count, sum, per-bucket counts]
+        self.counters = {}     # (name, labels) -> value
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = [0, 0.0, [0] * len(BUCKETS)]
+            hist[0] += 1
+            hist[1] += seconds
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    hist[2][i] += 1
+                    break
+
+    def add(self, key, value):
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def summary(self):
+        """[(name, count, mean_ms, total_ms)] for every span name, slowest total first."""
+        with self._lock:
+            rows = [(name, h[0], 1000 * h[1] / h[0], 1000 * h[1]) for name, h in self.histograms.items()]
+        return sorted(rows, key=lambda row: -row[3])
+
+    def prometheus_text(self, prefix="navigator"):
+        """Everything in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            histograms = {name: (h[0], h[1], list(h[2])) for name, h in self.histograms.items()}
+            counters = dict(self.counters)
+        if histograms:
+            metric = f"{prefix}_span_seconds"
+            lines += [f"# HELP {metric} Wall time of instrumented stages.", f"# TYPE {metric} histogram"]
+            for name, (count, total, buckets) in sorted(histograms.items()):
+                cumulative = 0
+                for bound, n in zip(BUCKETS, buckets):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{span="{name}",le="+Inf"}} {count}')
+                lines.append(f'{metric}_sum{{span="{name}"}} {total:.6f}')
+                lines.append(f'{metric}_count{{span="{name}"}} {count}')
+        for name in sorted({name for name, _ in counters}):
+            metric = f"{prefix}_{name}_total"
+            lines += [f"# TYPE {metric} counter"]
+            lines += [f"{_label_text(metric, labels)} {value}" for (n, labels), value in sorted(counters.items()) if n == name]
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def _label_text(name, labels):
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def enable(flag=True):
+    """Trace every run in the process (NAVIGATOR_TRACING=1 does the same at startup)."""
+    global _enabled
+    _enabled = flag
+
+
+class span:
+    """Time a stage: `with span("route"):` or `@span("route")`.
+
+    Recorded into the current run's trace and the process histograms when
+    a run is being traced (start_run) or tracing is enabled process-wide;
+    otherwise entering costs one context-variable lookup.
+    """
+
+    __slots__ = ("name", "trace", "t0")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.trace = _run.get()
+        self.t0 = _perf() if self.trace is not None or _enabled else None
+        return self
+
+    def __exit__(self, *exc):
+        if self.t0 is not None:
+            end = _perf()
+            metrics.observe(self.name, end - self.t0)
+            trace = self.trace
+            if trace is not None and len(trace.spans) < MAX_RUN_SPANS:
+                trace.spans.append((self.name, self.t0 - trace.t0, end - self.t0))
+        return False
+
+    def __call__(self, fn):
+        name = self.name
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+# Add to a counter, e.g. count("network_bytes", 5120, service="overpass")
+def count(name, value=1, **labels):
+    trace = _run.get()
+    if trace is None and not _enabled:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    metrics.add(key, value)
+    if trace is not None:
+        trace.counters[key] = trace.counters.get(key, 0) + value
+
+
+# Begin tracing a script run in this context (thread); returns the Trace, or
+# None when neither `enabled` nor process-wide tracing is on. A run cut short
+# before finish_run (st.rerun, st.stop, an exception) is finished here.
+def start_run(name, enabled=False):
+    if _run.get() is not None:
+        finish_run()
+    trace = Trace(name) if enabled or _enabled else None
+    _run.set(trace)
+    return trace
+
+
+# Close the current run; appends it to NAVIGATOR_TRACE_FILE and rewrites
+# NAVIGATOR_METRICS_FILE when those are set
+def finish_run():
+    trace = _run.get()
+    _run.set(None)
+    if trace is None:
+        return None
+    trace.duration = _perf() - trace.t0
+    metrics.observe("run", trace.duration)
+    if TRACE_FILE:
+        with open(TRACE_FILE, "a", encoding="utf-8") as f:
+            f.write(trace.to_json() + "\n")
+    if METRICS_FILE:
+        tmp = f"{METRICS_FILE}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(metrics.prometheus_text())
+        os.replace(tmp, METRICS_FILE)
+    return trace
+
+
+def current_run():
+    return _run.get()
@@ -0,0 +1,82 @@
+import math
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+import numpy as np
+
+from .geometry import M_PER_DEG, project
+
+OFF_ROUTE = 30      # meters from the route before a fix counts as off route
+OFF_ROUTE_FIXES = 3 # consecutive off-route fixes before asking for a reroute
+ARRIVE = 15         # meters before the destination that count as arrived
+TURN_PASSED = 5     # meters past a turn before moving to the next instruction
+LOOK_BACK = 30      # meters behind the last match searched (GPS jitter, U-turns)
+LOOK_AHEAD = 250    # meters ahead searched; generous for one fix per second at driving speed
+MAX_WINDOW = 512    # hard cap on segments tested per fix
+
+# One processed fix: snapped [lat, lon], meters along the route, distance from it,
+# current instruction index and the off-route / arrival decisions
+TrackState = namedtuple("TrackState", "position along offset step off_route arrived")
+
+
+class RouteTracker:
+    """Map-matches a stream of position fixes onto one Route.
+
+    Each fix is only compared with the segments in a window around the last
+    match, found by bisecting the cumulative distance along the path, so the
+    cost per fix is O(log n) for the lookup plus a bounded window, whatever
+    the route length. Progress only moves forward; a fix that stays too far
+    from the window for a few fixes in a row flags the route for a reroute.
+    """
+
+    def __init__(self, route, off_route=OFF_ROUTE, off_route_fixes=OFF_ROUTE_FIXES, arrive=ARRIVE):
+        self.route = route
+        self.off_route_distance = off_route
+        self.off_route_fixes = off_route_fixes
+        self.arrive = arrive
+        self.lat0 = route.path[0][0]
+        self.kx = M_PER_DEG * math.cos(math.radians(self.lat0))
+        xy = project(route.path, self.lat0)
+        if len(xy) < 2:
+            xy = np.vstack([xy, xy])
+        self.ax, self.ay = xy[:-1, 0], xy[:-1, 1]
+        self.dx, self.dy = np.diff(xy[:, 0]), np.diff(xy[:, 1])
+        seg_len2 = self.dx * self.dx + self.dy * self.dy
+        self.inv_len2 = np.divide(1.0, seg_len2, out=np.zeros_like(seg_len2), where=seg_len2 > 0)
+        cum = np.concatenate([[0.0], np.cumsum(np.sqrt(seg_len2))])
+        self.cum = cum
+        self.cum_list = cum.tolist()
+        self.length = float(cum[-1])
+        self.turn_passed = [self.cum_list[i] + TURN_PASSED for i in route.turn_indices]
+        self.along = 0.0
+        self.step = 0
+        self.misses = 0
+        self.arrived = False
+
+    def update(self, lat, lon, accuracy=None):
+        """Process one fix; `accuracy` (meters) widens the off-route tolerance."""
+        x, y = lon * self.kx, lat * M_PER_DEG
+        lo = max(0, bisect_right(self.cum_list, self.along - LOOK_BACK) - 1)
+        hi = min(len(self.ax), bisect_left(self.cum_list, self.along + LOOK_AHEAD, lo), lo + MAX_WINDOW)
+        hi = max(hi, lo + 1)
+        ax, ay, dx, dy = self.ax[lo:hi], self.ay[lo:hi], self.dx[lo:hi], self.dy[lo:hi]
+        t = np.clip(((x - ax) * dx + (y - ay) * dy) * self.inv_len2[lo:hi], 0.0, 1.0)
+        px, py = ax + t * dx, ay + t * dy
+        d2 = (px - x) ** 2 + (py - y) ** 2
+        k = int(np.argmin(d2))
+        offset = math.sqrt(float(d2[k]))
+        seg = lo + k
+        along = self.cum_list[seg] + float(t[k]) * (self.cum_list[seg + 1] - self.cum_list[seg])
+
+        tolerance = self.off_route_distance + min(accuracy or 0.0, 2 * self.off_route_distance)
+        if offset > tolerance:
+            self.misses += 1
+        else:
+            self.misses = 0
+            self.along = max(self.along, along)
+            self.step = max(self.step, bisect_left(self.turn_passed, self.along))
+            if self.length - self.along <= self.arrive:
+                self.arrived = True
+        position = [float(py[k]) / M_PER_DEG, float(px[k]) / self.kx]
+        step = len(self.route.maneuvers) + 1 if self.arrived else self.step
+        return TrackState(position, self.along, offset, step, self.misses >= self.off_route_fixes, self.arrived)
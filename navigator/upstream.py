@@ -0,0 +1,241 @@
+# Process-wide layer between the Streamlit sessions and the upstream services
+# (Overpass mirrors, ip-api.com). Every session shares one token bucket per
+# host, so the deployment as a whole stays under the per-IP limits; callers
+# queue by priority when the bucket is empty (a user waiting on a search goes
+# before background prefetch). Identical lookups are answered once and shared.
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+
+from .tracing import count
+
+# Priority levels, most urgent first
+INTERACTIVE = 0   # a user is waiting on the answer
+PREFETCH = 1      # background warming
+
+# Requests per second and burst per upstream host; a rate of 0 disables the limit
+OVERPASS_RATE = float(os.environ.get("NAVIGATOR_OVERPASS_RATE", "1.0"))
+OVERPASS_BURST = int(os.environ.get("NAVIGATOR_OVERPASS_BURST", "4"))
+IP_API_URL = "http://ip-api.com/json/"
+IP_API_RATE = 0.75   # ip-api.com free tier: 45 requests per minute
+IP_LOCATION_TTL = 3600
+
+
+class Ticket:
+    """Priority of one unit of work. It can be raised while the work is
+    queued, e.g. when a user starts waiting on a prefetch."""
+
+    __slots__ = ("level", "_waiters")
+
+    def __init__(self, level=INTERACTIVE):
+        self.level = level
+        self._waiters = []   # (limiter, waiter) pairs currently queued
+
+    def boost(self, level):
+        if level < self.level:
+            self.level = level
+            for limiter, waiter in list(self._waiters):
+                limiter._requeue(waiter)
+
+
+_ticket = contextvars.ContextVar("navigator_priority", default=None)
+
+
+def current_ticket():
+    ticket = _ticket.get()
+    return ticket if ticket is not None else Ticket()
+
+
+@contextmanager
+def priority(level):
+    """Run the block's upstream calls at `level` (INTERACTIVE or PREFETCH)."""
+    token = _ticket.set(Ticket(level))
+    try:
+        yield
+    finally:
+        _ticket.reset(token)
+
+
+# Context that runs work under `ticket`: a copy of the caller's, or with
+# inherit=False an empty one (e.g. background work outside any tracing run)
+def context_with(ticket, inherit=True):
+    ctx = contextvars.copy_context() if inherit else contextvars.Context()
+    ctx.run(_ticket.set, ticket)
+    return ctx
+
+
+class _Waiter:
+    __slots__ = ("ticket", "done")
+
+    def __init__(self, ticket):
+        self.ticket = ticket
+        self.done = False
+
+
+class RateLimiter:
+    """Token bucket shared by every caller of one upstream host.
+
+    acquire() takes a token, waiting when the bucket is empty; waiters are
+    served strictly by (priority, arrival) from a heap. A ticket boosted while
+    waiting is pushed again at its new level and its old entry skipped.
+    """
+
+    def __init__(self, rate, burst=1, clock=time.monotonic):
+        self.rate = rate
+        self.burst = max(int(burst), 1)
+        self.clock = clock
+        self.tokens = float(self.burst)
+        self.updated = clock()
+        self.paused_until = 0.0
+        self.waited = 0        # acquisitions that had to queue
+        self._heap = []        # (level, seq, waiter)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # First live waiter; entries of finished waiters and superseded levels are dropped
+    def _head(self):
+        heap = self._heap
+        while heap and (heap[0][2].done or heap[0][0] != heap[0][2].ticket.level):
+            heapq.heappop(heap)
+        return heap[0][2] if heap else None
+
+    def available(self):
+        """True when a call would go out right away."""
+        if not self.rate:
+            return True
+        with self._cond:
+            now = self.clock()
+            self._refill(now)
+            return now >= self.paused_until and self.tokens >= 1 and self._head() is None
+
+    def acquire(self, ticket=None, timeout=None):
+        """Take a token; False if none came within `timeout` seconds."""
+        if not self.rate:
+            return True
+        ticket = ticket or current_ticket()
+        waiter = _Waiter(ticket)
+        deadline = None if timeout is None else self.clock() + timeout
+        with self._cond:
+            heapq.heappush(self._heap, (ticket.level, next(self._seq), waiter))
+            ticket._waiters.append((self, waiter))
+            queued = False
+            try:
+                while True:
+                    now = self.clock()
+                    self._refill(now)
+                    if self._head() is waiter and now >= self.paused_until and self.tokens >= 1:
+                        self.tokens -= 1
+                        return True
+                    if deadline is not None and now >= deadline:
+                        return False
+                    queued = True
+                    wait = max(self.paused_until - now, (1 - self.tokens) / self.rate, 0.001)
+                    if deadline is not None:
+                        wait = min(wait, deadline - now)
+                    self._cond.wait(wait)
+            finally:
+                waiter.done = True
+                ticket._waiters.remove((self, waiter))
+                self.waited += queued
+                self._cond.notify_all()
+
+    def pause(self, seconds):
+        """Stop all calls for `seconds`, e.g. after the host answered 429."""
+        with self._cond:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+            self.tokens = 0.0
+
+    def _requeue(self, waiter):
+        with self._cond:
+            if not waiter.done:
+                heapq.heappush(self._heap, (waiter.ticket.level, next(self._seq), waiter))
+                self._cond.notify_all()
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+# The process-wide limiter for the host of `url`
+def limiter_for(url, rate=OVERPASS_RATE, burst=OVERPASS_BURST):
+    host = urlparse(url).netloc or url
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = RateLimiter(rate, burst)
+        return limiter
+
+
+class SharedResults:
+    """Cross-session TTL cache with single flight: concurrent calls for a key
+    that is not cached wait for one computation instead of each making it."""
+
+    def __init__(self, ttl, maxsize=256, clock=time.monotonic):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._values = {}    # key -> (expires, value)
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self.hits += 1
+                return entry[1]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+        try:
+            value = compute()
+        except BaseException as exc:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(exc)
+            raise
+        with self._lock:
+            if len(self._values) >= self.maxsize:
+                self._values.clear()
+            self._values[key] = (self.clock() + self.ttl, value)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+        return value
+
+
+_ip_results = SharedResults(IP_LOCATION_TTL)
+
+
+# Approximate location of this server's public IP (the apps' fallback when the
+# browser gives no GPS fix); one lookup per hour for the whole process.
+# Raises requests.RequestException, or TimeoutError when the rate limit queue is full.
+def ip_location(timeout=10):
+    def lookup():
+        if not limiter_for(IP_API_URL, IP_API_RATE, 5).acquire(timeout=timeout):
+            raise TimeoutError("ip-api.com rate limit: no slot within the timeout")
+        resp = requests.get(IP_API_URL, timeout=timeout)
+        count("network_bytes", len(resp.content), service="ip-api")
+        resp.raise_for_status()
+        return resp.json()
+    return _ip_results.get("ip", lookup)
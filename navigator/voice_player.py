@@ -0,0 +1,36 @@
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+_FRONTEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "voice_player")
+_voice_player = components.declare_component("voice_player", path=_FRONTEND)
+
+
+# Queue `text` for the session's voice player. `once` (any hashable, e.g. a
+# step) announces a prompt a single time however often the script reruns;
+# the spoken `once` keys are forgotten when a different `route` (e.g.
+# Route.key) is passed.
+def announce(text, lang_code, once=None, route=None, key="voice_player"):
+    state = st.session_state.setdefault(key + "_queue", {"id": 0, "prompt": None, "route": None, "spoken": set()})
+    if route is not None and route != state["route"]:
+        state["route"] = route
+        state["spoken"].clear()
+    if once is not None:
+        if once in state["spoken"]:
+            return
+        state["spoken"].add(once)
+    state["id"] += 1
+    state["prompt"] = {"id": state["id"], "text": text, "lang": lang_code}
+
+
+# The one persistent speech player: renders a hidden component that keeps its
+# iframe across reruns and speaks each announced prompt once, queued in the
+# browser. Render it once per run after every announce() call, inside a
+# container created at a fixed place (st.empty() at the top of the page) so
+# the iframe is never remounted. `upcoming` (text, lang_code) prompts are
+# prepared ahead so they start without a voice lookup.
+def voice_player(upcoming=(), rate=1.0, key="voice_player"):
+    state = st.session_state.get(key + "_queue") or {"prompt": None}
+    _voice_player(prompt=state["prompt"], upcoming=[{"text": t, "lang": lang} for t, lang in upcoming],
+                  rate=rate, key=key, default=None)
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+# Never reach a public mirror or the user's cache from the tests
+os.environ["OVERPASS_URL"] = "http://127.0.0.1:9/api/interpreter"
+os.environ.pop("NAVIGATOR_TRACING", None)
+
+from tools.mock_overpass import serve_in_background  # noqa: E402
+
+LOCATION = (15.8285, 78.0371)
+BOX = (15.82, 78.03, 15.84, 78.05)
+
+
+@pytest.fixture
+def mock_overpass():
+    """Factory for local Overpass stand-ins: mock_overpass(latency=.., fail_every=..)."""
+    servers = []
+
+    def start(**options):
+        server = serve_in_background(**options)
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
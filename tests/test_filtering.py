@@ -0,0 +1,14 @@
+import pytest
+
+from navigator.filtering import DEFAULT_ACCURACY, MIN_ACCURACY, KalmanFilter
+
+
+@pytest.mark.parametrize("reported, sigma", [
+    (None, DEFAULT_ACCURACY),   # no accuracy reported (GPX tracks)
+    (0, MIN_ACCURACY),          # a reported 0 is optimistic, not missing
+    (1.0, MIN_ACCURACY),
+    (25.0, 25.0),
+])
+def test_first_fix_uncertainty(reported, sigma):
+    fix = {"latitude": 17.385, "longitude": 78.4867, "accuracy": reported, "timestamp": 0}
+    assert KalmanFilter().update(fix).accuracy == pytest.approx(sigma)
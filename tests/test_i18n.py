@@ -0,0 +1,42 @@
+import pickle
+
+import pytest
+
+from navigator.i18n import CATALOG, get_locale
+
+EN, HI, TE = CATALOG["en-US"], CATALOG["hi-IN"], CATALOG["te-IN"]
+
+
+# (value, visible decimals) -> CLDR cardinal category
+@pytest.mark.parametrize("locale, forms", [
+    (EN, {(0, 0): "other", (1, 0): "one", (1.0, 1): "other", (1.5, 1): "other", (2, 0): "other"}),
+    (HI, {(0, 0): "one", (0.5, 1): "one", (1, 0): "one", (1.0, 1): "one", (1.5, 1): "other", (2, 0): "other"}),
+    (TE, {(0, 0): "other", (1, 0): "one", (1.0, 1): "one", (1.5, 1): "other", (2, 0): "other"}),
+])
+def test_plural_forms_follow_cldr(locale, forms):
+    assert {key: locale.plural(*key) for key in forms} == forms
+
+
+def test_distances_use_the_plural_unit():
+    assert [EN.distance(m) for m in (1000, 1200, 200)] == ["1 kilometer", "1.2 kilometers", "200 meters"]
+    assert [TE.distance(m) for m in (1000, 1200)] == ["1 కిలోమీటరు", "1.2 కిలోమీటర్లు"]
+    assert HI.distance(1000) == "1 किलोमीटर"
+
+
+@pytest.mark.parametrize("locale, expected", [
+    (EN, ["999", "1,234", "123,456", "1,234,567", "-12,345,678.5"]),
+    (HI, ["999", "1,234", "1,23,456", "12,34,567", "-1,23,45,678.5"]),
+    (TE, ["999", "1,234", "1,23,456", "12,34,567", "-1,23,45,678.5"]),
+])
+def test_digit_grouping(locale, expected):
+    numbers = [locale.number(n) for n in (999, 1234, 123456, 1234567)] + [locale.number(-12345678.5, 1)]
+    assert numbers == expected
+
+
+def test_long_distances_are_grouped():
+    assert EN.distance(123_456_000) == "123,456 kilometers"
+    assert HI.distance(123_456_000) == "1,23,456 किलोमीटर"
+
+
+def test_locales_pickle_as_the_catalog_entry():
+    assert all(pickle.loads(pickle.dumps(locale)) is get_locale(code) for code, locale in CATALOG.items())
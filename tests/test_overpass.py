@@ -0,0 +1,166 @@
+import threading
+import time
+
+import pytest
+
+from conftest import BOX
+from navigator import overpass
+from navigator.navigation import SEARCH_SELECTORS
+from navigator.overpass import (
+    CircuitBreaker, OverpassBadResponse, OverpassClient, OverpassQueryError, OverpassRateLimited, OverpassTimeout,
+    OverpassUnavailable,
+)
+
+QL = overpass.build_query(SEARCH_SELECTORS, [BOX])
+
+
+def client_for(*servers, **options):
+    options.setdefault("rate", 0)
+    options.setdefault("backoff", 0.01)
+    return OverpassClient(endpoints=[s.url if hasattr(s, "url") else s for s in servers], **options)
+
+
+def test_query_returns_elements(mock_overpass):
+    server = mock_overpass()
+    elements = client_for(server).query(QL)["elements"]
+    assert elements and all(e["type"] == "node" for e in elements)
+    assert server.requests == 1
+
+
+def test_slow_mirror_is_hedged_on_the_next(mock_overpass):
+    slow, fast = mock_overpass(latency=2.0), mock_overpass()
+    client = client_for(slow, fast, hedge_after=0.2)
+    t0 = time.perf_counter()
+    elements = client.query(QL)["elements"]
+    assert time.perf_counter() - t0 < 1.5
+    assert elements
+    assert (slow.requests, fast.requests) == (1, 1)
+
+
+def test_identical_concurrent_queries_share_one_request(mock_overpass):
+    server = mock_overpass(latency=0.3)
+    client = client_for(server)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.query(QL))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert server.requests == 1
+    assert client.coalesced == 7
+    assert all(r is results[0] for r in results)
+
+
+def test_rate_limited_request_backs_off_and_retries(mock_overpass):
+    server = mock_overpass(fail_first=1)
+    client = client_for(server, backoff=0.2)
+    t0 = time.perf_counter()
+    assert client.query(QL)["elements"]
+    assert time.perf_counter() - t0 >= 0.1   # backoff * jitter of at least 0.5
+    assert server.requests == 2
+    assert client.throttled == 1
+
+
+def test_fail_every_is_absorbed_by_retries(mock_overpass):
+    server = mock_overpass(fail_every=2)
+    client = client_for(server)
+    for i in range(4):
+        assert client.query(overpass.build_query(SEARCH_SELECTORS, [BOX], timeout=10 + i))["elements"]
+    assert server.requests == 7
+
+
+def test_retries_are_bounded(mock_overpass):
+    server = mock_overpass(fail_every=1)
+    with pytest.raises(OverpassRateLimited):
+        client_for(server, retries=2).query(QL)
+    assert server.requests == 3
+
+
+def test_breaker_opens_then_half_opens_then_closes(mock_overpass):
+    server = mock_overpass(fail_first=2, fail_with="504")
+    client = client_for(server, retries=0, breaker_threshold=2, breaker_reset=0.3)
+    breaker = client.breakers[server.url]
+    for _ in range(2):
+        with pytest.raises(OverpassUnavailable, match="HTTP 504"):
+            client.query(QL)
+    assert breaker.state == "open"
+    with pytest.raises(OverpassUnavailable, match="circuit open"):
+        client.query(QL)
+    assert server.requests == 2   # an open breaker sends nothing
+    time.sleep(0.35)
+    assert breaker.state == "half-open"
+    assert client.query(QL)["elements"]
+    assert breaker.state == "closed"
+
+
+def test_failed_trial_reopens_the_breaker():
+    now = [0.0]
+    breaker = CircuitBreaker(threshold=1, reset_after=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert not breaker.allow()
+    now[0] = 10
+    assert breaker.allow()
+    assert not breaker.allow()   # one trial at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+    now[0] = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+@pytest.mark.parametrize("fail_with, error, retryable", [
+    ("429", OverpassRateLimited, True),
+    ("504", OverpassUnavailable, True),
+    ("remark", OverpassBadResponse, True),
+    ("garbage", OverpassBadResponse, True),
+    ("400", OverpassQueryError, False),
+])
+def test_failures_raise_typed_errors(mock_overpass, fail_with, error, retryable):
+    server = mock_overpass(fail_every=1, fail_with=fail_with)
+    with pytest.raises(error) as info:
+        client_for(server, retries=1).query(QL)
+    assert info.value.retryable is retryable
+    assert info.value.endpoint == server.url
+    assert server.requests == (2 if retryable else 1)
+
+
+def test_timeout_raises_typed_error(mock_overpass):
+    server = mock_overpass(latency=1.0)
+    with pytest.raises(OverpassTimeout):
+        client_for(server, timeout=0.2, retries=0, hedge_after=5).query(QL)
+
+
+def test_unreachable_mirror_raises_typed_error():
+    with pytest.raises(OverpassUnavailable, match="unreachable"):
+        client_for("http://127.0.0.1:9/api/interpreter", retries=0).query(QL)
+
+
+def test_unreachable_mirror_fails_over(mock_overpass):
+    server = mock_overpass()
+    client = client_for("http://127.0.0.1:9/api/interpreter", server, retries=0)
+    assert client.query(QL)["elements"]
+    assert server.requests == 1
+
+
+def test_stream_yields_the_query_elements(mock_overpass):
+    server = mock_overpass()
+    client = client_for(server)
+    streamed = list(client.stream(QL, keep=overpass.slim_element))
+    assert streamed == client.query(QL, keep=overpass.slim_element)["elements"]
+
+
+def test_stream_raises_after_a_cut_short_answer(mock_overpass):
+    server = mock_overpass(fail_every=1, fail_with="remark")
+    streamed = []
+    with pytest.raises(OverpassBadResponse):
+        for elem in client_for(server, retries=0).stream(QL):
+            streamed.append(elem)
+    assert streamed   # the half that arrived before the remark
+
+
+def test_neighbouring_boxes_are_merged():
+    grid = [(s, w, s + 1, w + 1) for s in range(3) for w in range(4)]
+    assert overpass.merge_boxes(grid) == [(0, 0, 3, 4)]
+    apart = [(0, 0, 1, 1), (0, 2, 1, 3)]
+    assert sorted(overpass.merge_boxes(apart)) == apart
@@ -0,0 +1,213 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import pytest
+
+from conftest import LOCATION, ROOT
+from navigator import overpass
+from navigator.geodesy import haversine
+from navigator.navigation import SEARCH_SELECTORS
+from navigator.poi_cache import PoiCache, k_nearest, tiles_covering
+from navigator.region_pack import RegionPack, build_pack, pack_fetch
+
+
+@pytest.fixture
+def offline(mock_overpass):
+    """PoiCache on the local stand-in with a hand-driven clock; `boxes` logs
+    the tile boxes of every fetch."""
+    server = mock_overpass()
+    client = overpass.OverpassClient(endpoints=(server.url,), rate=0)
+    boxes = []
+    now = [0.0]
+
+    def fetch(selectors, bboxes):
+        boxes.append(len(bboxes))
+        return overpass.fetch_boxes(selectors, bboxes, client)
+
+    def make(**options):
+        return PoiCache(":memory:", fetch=fetch, clock=lambda: now[0], **options)
+    return make, server, boxes, now
+
+
+def test_warm_query_is_served_from_tiles(offline):
+    make, server, boxes, _ = offline
+    cache = make()
+    cold = cache.query(*LOCATION, 600, SEARCH_SELECTORS)
+    warm = cache.query(*LOCATION, 600, SEARCH_SELECTORS)
+    assert cold and sorted(e["id"] for e in warm) == sorted(e["id"] for e in cold)
+    assert server.requests == 1
+    assert boxes == [len(tiles_covering(*LOCATION, 600))]
+    assert cache.hit_ratio == 0.5
+    assert cache.stats()["tiles"] == boxes[0]
+
+
+def test_results_are_in_range_and_unique(offline):
+    make = offline[0]
+    elements = make().query(*LOCATION, 2000, SEARCH_SELECTORS)
+    assert len({e["id"] for e in elements}) == len(elements)
+    assert all(haversine(*LOCATION, e["lat"], e["lon"]) <= 2000 for e in elements)
+
+
+def test_moving_fetches_only_the_missing_tiles(offline):
+    make, server, boxes, _ = offline
+    cache = make()
+    cache.query(*LOCATION, 600, SEARCH_SELECTORS)
+    moved = (LOCATION[0], LOCATION[1] + 0.012)
+    new = set(tiles_covering(*moved, 600)) - set(tiles_covering(*LOCATION, 600))
+    assert new
+    cache.query(*moved, 600, SEARCH_SELECTORS)
+    assert boxes[1] == len(new)
+    assert server.requests == 2
+
+
+def test_expired_tiles_are_fetched_again(offline):
+    make, server, _, now = offline
+    cache = make(ttl=60)
+    cache.query(*LOCATION, 600, SEARCH_SELECTORS)
+    now[0] = 30
+    assert not cache.missing_tiles(*LOCATION, 600, SEARCH_SELECTORS)
+    now[0] = 61
+    assert cache.missing_tiles(*LOCATION, 600, SEARCH_SELECTORS)
+    cache.query(*LOCATION, 600, SEARCH_SELECTORS)
+    assert server.requests == 2
+    cache.purge_expired()
+    assert len(cache) == len(tiles_covering(*LOCATION, 600))
+
+
+def test_least_recently_used_tiles_are_evicted(offline):
+    make, _, _, now = offline
+    cache = make(max_tiles=2)
+    layer = "layer"
+    for i, tile in enumerate([(1, 1), (1, 2), (1, 3)]):
+        now[0] = i
+        if tile == (1, 3):
+            cache.get_tile(layer, 1, 1)   # touch the oldest tile
+        cache.put_tile(layer, *tile, [{"type": "node", "id": i}])
+    assert len(cache) == 2
+    assert cache.get_tile(layer, 1, 2) is None
+    assert cache.get_tile(layer, 1, 1) == [{"type": "node", "id": 0}]
+
+
+def test_offline_read_skips_missing_tiles(offline):
+    make, server, _, _ = offline
+    cache = make()
+    assert cache.query(*LOCATION, 600, SEARCH_SELECTORS, network=False) == []
+    assert server.requests == 0
+    assert cache.misses == 0
+
+
+def test_nearest_is_the_closest_prefix(offline):
+    make = offline[0]
+    cache = make()
+    everything = cache.query(*LOCATION, 2000, SEARCH_SELECTORS)
+    nearest = cache.nearest(*LOCATION, 2000, SEARCH_SELECTORS, 10)
+    distance = [haversine(*LOCATION, e["lat"], e["lon"]) for e in nearest]
+    assert len(nearest) == 10 and distance == sorted(distance)
+    assert distance[-1] <= sorted(haversine(*LOCATION, e["lat"], e["lon"]) for e in everything)[9]
+
+
+@pytest.fixture
+def streamed(mock_overpass):
+    def make(**server_options):
+        server = mock_overpass(**server_options)
+        client = overpass.OverpassClient(endpoints=(server.url,), rate=0, retries=0)
+        return PoiCache(":memory:", fetch=lambda selectors, bboxes: overpass.stream_boxes(selectors, bboxes, client))
+    return make
+
+
+def test_streamed_fetch_stores_the_same_tiles(offline, streamed):
+    make = offline[0]
+    listed, cache = make(), streamed()
+    nearest = cache.nearest(*LOCATION, 2000, SEARCH_SELECTORS, 10)
+    assert nearest == listed.nearest(*LOCATION, 2000, SEARCH_SELECTORS, 10)
+    assert not cache.missing_tiles(*LOCATION, 2000, SEARCH_SELECTORS)
+    assert cache.nearest(*LOCATION, 2000, SEARCH_SELECTORS, 10, network=False) == nearest
+    assert cache._db.execute("SELECT COUNT(*) FROM staged").fetchone()[0] == 0
+
+
+def test_failed_fetch_stores_nothing(streamed):
+    cache = streamed(fail_every=1, fail_with="remark")
+    with pytest.raises(overpass.OverpassBadResponse):
+        cache.nearest(*LOCATION, 600, SEARCH_SELECTORS, 10)
+    assert len(cache) == 0
+    assert cache._db.execute("SELECT COUNT(*) FROM staged").fetchone()[0] == 0
+
+
+def test_fill_caches_the_area(offline):
+    make, server, _, _ = offline
+    cache = make()
+    assert cache.fill(*LOCATION, 600, SEARCH_SELECTORS) is None
+    assert not cache.missing_tiles(*LOCATION, 600, SEARCH_SELECTORS)
+    assert cache.query(*LOCATION, 600, SEARCH_SELECTORS, network=False)
+    assert server.requests == 1
+
+
+def test_k_nearest_keeps_each_element_once():
+    def hit(distance, i):
+        return distance, {"type": "node", "id": i}
+    hits = [hit(5, 1), hit(1, 2), hit(1, 2), hit(3, 3), hit(3, 4), hit(0, 5)]
+    assert [e["id"] for e in k_nearest(hits, 3)] == [5, 2, 3]
+
+
+# The stand-in in its own process, so its allocations are not traced
+@pytest.fixture
+def mock_process():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "tools", "mock_overpass.py"), "--port", str(port)],
+                            stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    yield f"http://127.0.0.1:{port}/api/interpreter"
+    proc.terminate()
+    proc.wait()
+
+
+# A pack of 100 x 100 restaurants ~220 m apart around LOCATION and one road
+@pytest.fixture(scope="module")
+def grid_pack(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("pack")
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<osm version="0.6">']
+    for i in range(100):
+        for j in range(100):
+            lat, lon = LOCATION[0] + (i - 50) * 0.002, LOCATION[1] + (j - 50) * 0.002
+            lines.append(f'<node id="{i * 100 + j + 1}" lat="{lat:.7f}" lon="{lon:.7f}">'
+                         f'<tag k="amenity" v="restaurant"/><tag k="name" v="Restaurant {i * 100 + j}"/></node>')
+    lines += ['<way id="1"><nd ref="1"/><nd ref="2"/><tag k="highway" v="residential"/></way>', '</osm>']
+    (tmp / "grid.osm").write_text("\n".join(lines), encoding="utf-8")
+    build_pack(str(tmp / "grid.osm"), str(tmp / "grid.navpack"))
+    return RegionPack(str(tmp / "grid.navpack"))
+
+
+def offline_fallback(selectors, bboxes):
+    raise overpass.OverpassUnavailable("offline")
+
+
+# Fetched elements stream through SQLite and a bounded heap, so 9x the area
+# must not cost anywhere near 36x the memory, from Overpass or from a pack
+@pytest.mark.parametrize("source", ["overpass", "pack"])
+def test_nearest_memory_does_not_grow_with_the_area(request, source):
+    if source == "overpass":
+        client = overpass.OverpassClient(endpoints=(request.getfixturevalue("mock_process"),), rate=0)
+
+        def fetch(selectors, bboxes):
+            return overpass.stream_boxes(selectors, bboxes, client)
+    else:
+        fetch = pack_fetch(request.getfixturevalue("grid_pack"), fallback=offline_fallback)
+    peaks = []
+    for radius in (3000, 9000):
+        cache = PoiCache(":memory:", fetch=fetch)
+        tracemalloc.start()
+        assert len(cache.nearest(*LOCATION, radius, SEARCH_SELECTORS, 30)) == 30
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    assert peaks[1] < 2 * peaks[0], peaks
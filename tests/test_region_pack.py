@@ -0,0 +1,77 @@
+import pytest
+
+from navigator.region_pack import RegionPack, build_pack
+
+BOX = (15.827, 78.035, 15.830, 78.038)
+
+# Two short roads, a cafe node, a bakery that also serves as a cafe and a
+# school building (way 4242)
+EXTRACT = """<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+  <node id="1" lat="15.8280" lon="78.0360"/>
+  <node id="2" lat="15.8290" lon="78.0360"/>
+  <node id="3" lat="15.8290" lon="78.0375"/>
+  <node id="10" lat="15.8285" lon="78.0365">
+    <tag k="amenity" v="cafe"/>
+    <tag k="name" v="Corner Cafe"/>
+  </node>
+  <node id="11" lat="15.8287" lon="78.0368">
+    <tag k="amenity" v="cafe"/>
+    <tag k="shop" v="bakery"/>
+    <tag k="name" v="Daily Bread"/>
+  </node>
+  <node id="20" lat="15.8282" lon="78.0370"/>
+  <node id="21" lat="15.8282" lon="78.0372"/>
+  <node id="22" lat="15.8284" lon="78.0372"/>
+  <way id="100">
+    <nd ref="1"/><nd ref="2"/>
+    <tag k="highway" v="residential"/>
+  </way>
+  <way id="101">
+    <nd ref="2"/><nd ref="3"/>
+    <tag k="highway" v="residential"/>
+  </way>
+  <way id="4242">
+    <nd ref="20"/><nd ref="21"/><nd ref="22"/><nd ref="20"/>
+    <tag k="amenity" v="school"/>
+    <tag k="name" v="Town School"/>
+  </way>
+</osm>
+"""
+
+
+@pytest.fixture
+def pack(tmp_path):
+    source = tmp_path / "town.osm"
+    source.write_text(EXTRACT, encoding="utf-8")
+    build_pack(str(source), str(tmp_path / "town.navpack"))
+    return RegionPack(str(tmp_path / "town.navpack"))
+
+
+def elements(pack):
+    return {(e["type"], e["id"]): e for e in (pack.element(row) for row in range(len(pack)))}
+
+
+def test_osm_ids_survive_the_round_trip(pack):
+    found = elements(pack)
+    assert set(found) == {("node", 10), ("node", 11), ("way", 4242)}
+    school = found[("way", 4242)]
+    assert school["tags"] == {"amenity": "school", "name": "Town School"}
+    assert school["center"]["lat"] == pytest.approx(15.82825)   # mean of the ring, closing node included
+    assert found[("node", 10)]["tags"]["name"] == "Corner Cafe"
+
+
+def ids(pack, *selectors):
+    return sorted((e["type"], e["id"]) for e in pack.fetch_boxes(selectors, [BOX]))
+
+
+def test_selectors_check_the_element_type(pack):
+    assert ids(pack, 'node["amenity"]') == [("node", 10), ("node", 11)]
+    assert ids(pack, 'way["amenity"]') == [("way", 4242)]
+    assert ids(pack, 'nwr["amenity"="school"]') == [("way", 4242)]
+
+
+def test_every_category_of_a_place_is_kept(pack):
+    assert ids(pack, 'node["shop"="bakery"]') == [("node", 11)]
+    assert ids(pack, 'node["amenity"~"cafe|bank"]') == [("node", 10), ("node", 11)]
+    assert elements(pack)[("node", 11)]["tags"] == {"amenity": "cafe", "shop": "bakery", "name": "Daily Bread"}
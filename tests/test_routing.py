@@ -0,0 +1,89 @@
+import itertools
+import math
+import random
+
+import numpy as np
+import pytest
+
+from navigator.geodesy import haversine
+from navigator.routing import STOP, TURN, Maneuver, RoadGraph, Route
+from navigator.tour import plan_tour, tour_route
+
+ROAD = {"highway": "residential"}
+
+
+# Roads of an n x n block grid (about 110 m apart) with about a fifth of the
+# block sides missing; node i * n + j sits at row i, column j
+def grid_graph(n=6, seed=0):
+    rng = random.Random(seed)
+    coords = {i * n + j: (15.82 + i * 0.001, 78.03 + j * 0.001) for i in range(n) for j in range(n)}
+    ways = [([i * n + j, (i + di) * n + j + dj], ROAD)
+            for i in range(n) for j in range(n) for di, dj in ((0, 1), (1, 0))
+            if i + di < n and j + dj < n and rng.random() > 0.2]
+    return RoadGraph.from_ways(coords, ways)
+
+
+def path_length(graph, nodes):
+    edges = {}
+    for u in range(len(graph)):
+        for e in range(graph.indptr[u], graph.indptr[u + 1]):
+            edges[u, int(graph.indices[e])] = graph.weights[e]
+    return sum(edges[u, v] for u, v in zip(nodes, nodes[1:]))
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_astar_matches_dijkstra(seed):
+    graph = grid_graph(seed=seed)
+    for source in range(0, len(graph), 5):
+        dist = graph.shortest_distances(source)
+        for target in range(len(graph)):
+            nodes = graph.astar(source, target)
+            if math.isinf(dist[target]):
+                assert nodes is None
+            else:
+                assert (nodes[0], nodes[-1]) == (source, target)
+                assert path_length(graph, nodes) == pytest.approx(dist[target])
+
+
+def test_route_turns_at_junctions():
+    # East along a street, then north up a side street; the corner is a
+    # junction because the street carries on east
+    coords = {j: (15.82, 78.03 + j * 0.001) for j in range(6)}
+    coords.update({10 + i: (15.82 + i * 0.001, 78.034) for i in range(1, 5)})
+    graph = RoadGraph.from_ways(coords, [(list(range(6)), ROAD), ([4, 11, 12, 13, 14], ROAD)])
+    route = graph.route(coords[0], coords[14])
+    assert [m.kind for m in route.maneuvers] == [TURN]
+    turn = route.maneuvers[0]
+    assert turn.bearing_in == pytest.approx(90, abs=1) and turn.bearing_out == pytest.approx(0, abs=1)
+    assert turn.distance == pytest.approx(haversine(*coords[0], *coords[4]))
+    assert route.path[route.turn_indices[0]] == list(coords[4])
+
+
+def test_tour_stops_between_legs():
+    first = Route([[15.82, 78.03], [15.82, 78.031], [15.821, 78.031]], 218.0,
+                  [Maneuver(TURN, 90.0, 0.0, 107.0)], [1])
+    second = Route([[15.821, 78.031], [15.822, 78.031]], 111.0, [])
+    route = tour_route([first, second], ["Pharmacy", "Bakery"])
+    assert [m.kind for m in route.maneuvers] == [TURN, STOP]
+    assert route.maneuvers[1].name == "Pharmacy"
+    assert route.maneuvers[1].distance == pytest.approx(111.0)
+    assert route.path[route.turn_indices[1]] == [15.821, 78.031]
+    assert route.distance == pytest.approx(329.0)
+
+
+def test_small_tours_are_optimal():
+    pts = np.random.default_rng(0).random((5, 2))
+    matrix = np.hypot(*(pts[:, None] - pts[None]).transpose(2, 0, 1))
+    order, cost = plan_tour(matrix)
+    assert order[0] == 0 and sorted(order) == list(range(5))
+    best = min(sum(matrix[a, b] for a, b in zip(o, o[1:]))
+               for o in ([0, *p] for p in itertools.permutations(range(1, 5))))
+    assert cost == pytest.approx(best)
+
+
+def test_route_key_covers_the_whole_path():
+    start, end = (15.8285, 78.0371), (15.8300, 78.0390)
+    east = Route([start, (15.8285, 78.0390), end], 250.0, [])
+    north = Route([start, (15.8300, 78.0371), end], 250.0, [])
+    assert east.key != north.key
+    assert east.key == Route([list(p) for p in east.path], 250.0, []).key
@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+
+from conftest import BOX
+from navigator import overpass
+from navigator.navigation import SEARCH_SELECTORS
+from navigator.upstream import INTERACTIVE, PREFETCH, RateLimiter, SharedResults, Ticket, current_ticket, priority
+
+QL = overpass.build_query(SEARCH_SELECTORS, [BOX])
+
+
+def test_burst_then_rate():
+    limiter = RateLimiter(rate=20, burst=3)
+    t0 = time.perf_counter()
+    for _ in range(5):
+        assert limiter.acquire()
+    # 3 from the burst, then 2 at 20/s
+    assert 0.08 <= time.perf_counter() - t0 < 0.5
+    assert limiter.waited == 2
+
+
+def test_zero_rate_is_unlimited():
+    limiter = RateLimiter(rate=0)
+    assert all(limiter.acquire(timeout=0) for _ in range(100))
+    assert limiter.available()
+
+
+def test_acquire_times_out():
+    limiter = RateLimiter(rate=1, burst=1)
+    assert limiter.acquire()
+    assert not limiter.available()
+    assert not limiter.acquire(timeout=0.05)
+
+
+def test_pause_holds_every_caller():
+    limiter = RateLimiter(rate=100, burst=5)
+    limiter.pause(0.2)
+    assert not limiter.acquire(timeout=0.1)
+    assert limiter.acquire(timeout=0.5)
+
+
+def test_waiters_are_served_by_priority_and_boosts():
+    limiter = RateLimiter(rate=10, burst=1)
+    assert limiter.acquire()   # empty the bucket so everyone below queues
+    order = []
+    late = Ticket(PREFETCH)
+
+    def wait(name, ticket):
+        limiter.acquire(ticket)
+        order.append(name)
+
+    threads = []
+    for name, ticket in [("p1", Ticket(PREFETCH)), ("p2", Ticket(PREFETCH)), ("p3", late),
+                         ("i1", Ticket(INTERACTIVE))]:
+        threads.append(threading.Thread(target=wait, args=(name, ticket)))
+        threads[-1].start()
+        time.sleep(0.01)
+    late.boost(INTERACTIVE)   # a user started waiting on p3
+    for t in threads:
+        t.join()
+    assert order == ["i1", "p3", "p1", "p2"]
+
+
+def test_priority_sets_the_ticket():
+    assert current_ticket().level == INTERACTIVE
+    with priority(PREFETCH):
+        assert current_ticket().level == PREFETCH
+    assert current_ticket().level == INTERACTIVE
+
+
+def test_shared_results_compute_once():
+    shared = SharedResults(ttl=60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"lat": 1.0}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(shared.get("ip", compute))) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and len(results) == 10
+    assert shared.get("ip", compute) == {"lat": 1.0}
+    assert (shared.misses, shared.coalesced + shared.hits) == (1, 10)
+
+
+def test_shared_results_do_not_cache_errors():
+    shared = SharedResults(ttl=60)
+
+    def fail():
+        raise TimeoutError
+
+    with pytest.raises(TimeoutError):
+        shared.get("ip", fail)
+    assert shared.get("ip", lambda: 1) == 1
+
+
+def test_client_waits_for_its_limiter(mock_overpass):
+    server = mock_overpass()
+    client = overpass.OverpassClient(endpoints=(server.url,), rate=10, burst=1)
+    t0 = time.perf_counter()
+    for i in range(3):
+        client.query(overpass.build_query(SEARCH_SELECTORS, [BOX], timeout=10 + i))
+    assert time.perf_counter() - t0 >= 0.15
+    assert server.requests == 3
+
+
+def test_mirror_429_pauses_the_limiter(mock_overpass, monkeypatch):
+    monkeypatch.setattr(overpass, "RETRY_AFTER", 0.3)
+    server = mock_overpass(fail_first=1)
+    client = overpass.OverpassClient(endpoints=(server.url,), rate=100, burst=5, backoff=0.01)
+    limiter = client.limiters[server.url]
+    t0 = time.perf_counter()
+    assert client.query(QL)["elements"]
+    # The mock's 429 carries no Retry-After, so the client waits the default
+    assert limiter.paused_until > 0
+    assert time.perf_counter() - t0 >= overpass.RETRY_AFTER * 0.9
+    assert client.throttled == 1
+
+
+# A half-open trial that never got a request slot must not leave the mirror
+# disabled for good once the limiter recovers
+def test_local_rate_limit_releases_a_half_open_trial(mock_overpass):
+    server = mock_overpass()
+    client = overpass.OverpassClient(endpoints=(server.url,), rate=100, burst=1, timeout=0.2, retries=0,
+                                     breaker_threshold=1, breaker_reset=0.1)
+    breaker = client.breakers[server.url]
+    breaker.record_failure()
+    time.sleep(0.15)
+    assert breaker.state == "half-open"
+    client.limiters[server.url].pause(0.4)
+    with pytest.raises(overpass.OverpassRateLimited, match="local rate limit"):
+        client.query(QL)
+    assert server.requests == 0
+    time.sleep(0.3)
+    assert client.query(QL)["elements"]
+    assert breaker.state == "closed"
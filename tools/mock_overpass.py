@@ -0,0 +1,163 @@
+"""Local Overpass stand-in for offline runs.
+
+Serves deterministic synthetic POIs for the bbox queries built by
+navigator.overpass, e.g.
+
+    python tools/mock_overpass.py --port 8765 --latency 0.5
+    OVERPASS_URL=http://127.0.0.1:8765/api/interpreter streamlit run voice.py
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BBOX_RE = re.compile(r"\((-?[\d.]+),(-?[\d.]+),(-?[\d.]+),(-?[\d.]+)\)")
+KINDS = ("restaurant", "cafe", "pharmacy", "bank", "hospital", "school", "fuel", "post_office")
+GRID = 0.002  # one synthetic POI per ~200 m grid cell
+# Injected failures: an HTTP status, a result cut short by a runtime-error
+# remark (Overpass hit its time limit), or a body broken off mid-JSON
+FAILURES = ("429", "400", "504", "remark", "garbage")
+REMARK = 'runtime error: Query timed out in "query" at line 1 after 25 seconds.'
+# Tags a typical mapped POI carries besides its name and category (--rich)
+RICH_TAGS = {
+    "addr:street": "Station Road", "addr:housenumber": "12-3-45", "addr:city": "Kurnool", "addr:postcode": "518001",
+    "opening_hours": "Mo-Sa 09:00-21:00; Su 10:00-14:00", "phone": "+91 8518 123456",
+    "website": "https://example.org/places/kurnool", "wheelchair": "limited", "check_date": "2024-05-01",
+    "source": "survey",
+}
+
+
+# Synthetic nodes on a fixed lat/lon grid inside a bounding box
+def synthetic_elements(south, west, north, east, rich=False):
+    elements = []
+    i0, i1 = int(south // GRID), int(north // GRID)
+    j0, j1 = int(west // GRID), int(east // GRID)
+    for i in range(i0, i1 + 1):
+        for j in range(j0, j1 + 1):
+            lat, lon = (i + 0.5) * GRID, (j + 0.5) * GRID
+            if south <= lat <= north and west <= lon <= east:
+                node_id = (i & 0xFFFFF) << 20 | (j & 0xFFFFF)
+                kind = KINDS[(i * 31 + j) % len(KINDS)]
+                tags = {"amenity": kind, "name": f"{kind.title()} {node_id % 10000}"}
+                if rich:
+                    tags.update(RICH_TAGS, **{"name:en": tags["name"], "name:te": tags["name"]})
+                elements.append({"type": "node", "id": node_id, "lat": lat, "lon": lon, "tags": tags})
+    return elements
+
+
+class MockOverpass(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, fail_every=0, rich=False, rate_limit=0.0, fail_first=0,
+                 fail_with="429"):
+        super().__init__(address, Handler)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.fail_first = fail_first
+        self.fail_with = fail_with
+        self.rich = rich
+        self.rate_limit = rate_limit   # requests/second before answering 429, like a public mirror
+        self.tokens = 2.0
+        self.updated = time.monotonic()
+        self.requests = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    # Token bucket (burst 2) of the per-IP limit
+    def allow(self):
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        self.tokens = min(2.0, self.tokens + (now - self.updated) * self.rate_limit)
+        self.updated = now
+        if self.tokens < 1:
+            self.throttled += 1
+            return False
+        self.tokens -= 1
+        return True
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/interpreter"
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query).get("data", [""])[0]
+        self.respond(query)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")
+        self.respond(parse_qs(body).get("data", [body])[0])
+
+    def respond(self, query):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            count = server.requests
+            allowed = server.allow()
+        if not allowed:
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if server.latency:
+            time.sleep(server.latency)
+        seen = set()
+        elements = []
+        for box in BBOX_RE.findall(query):
+            for elem in synthetic_elements(*map(float, box), rich=server.rich):
+                if elem["id"] not in seen:
+                    seen.add(elem["id"])
+                    elements.append(elem)
+        result = {"version": 0.6, "elements": elements}
+        if count <= server.fail_first or (server.fail_every and count % server.fail_every == 0):
+            if server.fail_with == "remark":
+                result = {"version": 0.6, "elements": elements[:len(elements) // 2], "remark": REMARK}
+            elif server.fail_with == "garbage":
+                body = json.dumps(result).encode("utf-8")
+                return self.send_body(body[:len(body) // 2])
+            else:
+                return self.send_error(int(server.fail_with))
+        self.send_body(json.dumps(result).encode("utf-8"))
+
+    def send_body(self, body):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+# Start a mock server on a background thread; returns the server (call .shutdown() to stop)
+def serve_in_background(port=0, latency=0.0, fail_every=0, rich=False, rate_limit=0.0, fail_first=0,
+                        fail_with="429"):
+    server = MockOverpass(("127.0.0.1", port), latency=latency, fail_every=fail_every, rich=rich,
+                          rate_limit=rate_limit, fail_first=fail_first, fail_with=fail_with)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--fail-every", type=int, default=0, help="fail every Nth request")
+    parser.add_argument("--fail-first", type=int, default=0, help="fail the first N requests")
+    parser.add_argument("--fail-with", choices=FAILURES, default="429", help="how failed requests are answered")
+    parser.add_argument("--rich", action="store_true", help="give every POI the tag load of a typical mapped place")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="requests/second allowed before answering 429 with Retry-After (0: no limit)")
+    args = parser.parse_args()
+    server = MockOverpass(("127.0.0.1", args.port), latency=args.latency, fail_every=args.fail_every, rich=args.rich,
+                          rate_limit=args.rate_limit, fail_first=args.fail_first, fail_with=args.fail_with)
+    print(f"Mock Overpass on {server.url}")
+    server.serve_forever()
@@ -1,11 +1,24 @@
 import streamlit as st
-import folium
 from streamlit_folium import st_folium
 import math
-import requests
+from navigator.mapview import base_map, live_layer, map_center
+from navigator import navigation
+from navigator.navigation import fetch_nearby_places
+from navigator.i18n import CATALOG
+from navigator.overpass import OverpassError
+from navigator.perf_panel import perf_panel
+from navigator.poi_cache import default_cache
+from navigator.prefetch import default_prefetcher
+from navigator.region_pack import default_pack
+from navigator.route_cache import default_route_cache
+from navigator.spatial_index import PlaceIndex
+from navigator.tracing import finish_run, span, start_run
+from navigator.voice_player import announce, voice_player
 
 # Page config
 st.set_page_config(page_title="Smart Multi-Language Navigator", layout="wide", page_icon="🧭")
+# Per-run tracing while the sidebar performance panel is open (or NAVIGATOR_TRACING=1)
+trace = start_run("voice.py", enabled=st.session_state.get("perf_panel", False))
 
 # Custom CSS - Clean Dark Theme
 st.markdown("""
@@ -17,164 +30,44 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Language Dictionary with Accurate Translations
-LANGUAGES = {
-    "🇺🇸 English": {
-        "lang_code": "en-US",
-        "straight": "Go straight ahead",
-        "right": "Turn right",
-        "sharp_right": "Turn sharply right",
-        "left": "Turn left",
-        "sharp_left": "Turn sharply left",
-        "done": "You have arrived at your destination!",
-        "meters": "meters"
-    },
-    "🇮🇳 Hindi": {
-        "lang_code": "hi-IN",
-        "straight": "सीधे चलें",
-        "right": "दाएँ मुड़ें",
-        "sharp_right": "तेज दाएँ मुड़ें",
-        "left": "बाएँ मुड़ें",
-        "sharp_left": "तेज बाएँ मुड़ें",
-        "done": "आप अपने गंतव्य पर पहुँच गए हैं!",
-        "meters": "मीटर"
-    },
-    "🇮🇳 Telugu": {
-        "lang_code": "te-IN",
-        "straight": "నేరుగా వెళ్లండి",
-        "right": "కుడి వైపు తిరగండి",
-        "sharp_right": "తీవ్రంగా కుడి మలుపు",
-        "left": "ఎడమ వైపు తిరగండి",
-        "sharp_left": "తీవ్రంగా ఎడమ మలుపు",
-        "done": "మీరు మీ గమ్యానికి చేరుకున్నారు!",
-        "meters": "మీటర్లు"
-    }
-}
+# Language catalog, compiled once per process in navigator.i18n and shared by every session
+LANGUAGES = {locale.label: locale for locale in CATALOG.values()}
+
+# The voice app searches wider than 1.py: any amenity, shop or office
+VOICE_SELECTORS = ('node["amenity"]', 'node["shop"]', 'node["office"]')
 
 # Initialize session state
 if 'user_location' not in st.session_state: st.session_state.user_location = None
 if 'nearby_places' not in st.session_state: st.session_state.nearby_places = {}
+if 'place_index' not in st.session_state: st.session_state.place_index = PlaceIndex()
 if 'destination' not in st.session_state: st.session_state.destination = None
 if 'route_steps' not in st.session_state: st.session_state.route_steps = []
+if 'route' not in st.session_state: st.session_state.route = None
 if 'current_step_index' not in st.session_state: st.session_state.current_step_index = 0
-if 'selected_language' not in st.session_state: st.session_state.selected_language = "🇺🇸 English"
-
-# Haversine distance
-def haversine(lat1, lon1, lat2, lon2):
-    R = 6371000
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lon2 - lon1)
-    a = math.sin(delta_phi / 2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
+if 'map_view' not in st.session_state: st.session_state.map_view = None
+if 'selected_language' not in st.session_state: st.session_state.selected_language = CATALOG["en-US"].label
 
-# Calculate bearing
-def get_bearing(lat1, lon1, lat2, lon2):
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-    dlon = lon2 - lon1
-    y = math.sin(dlon) * math.cos(lat2)
-    x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(dlon)
-    bearing = math.degrees(math.atan2(y, x))
-    return (bearing + 360) % 360
-
-# Determine turn direction
-def get_direction_text(lang, bearing_prev, bearing_next, distance):
-    diff = (bearing_next - bearing_prev + 360) % 360
-    lang_dict = LANGUAGES[lang]
-    
-    if diff < 20 or diff > 340:
-        direction = lang_dict["straight"]
-    elif 20 <= diff < 80:
-        direction = lang_dict["right"]
-    elif 80 <= diff < 160:
-        direction = lang_dict["sharp_right"]
-    elif 200 <= diff < 340:
-        direction = lang_dict["sharp_left"]
-    elif 160 <= diff <= 200:
-        direction = lang_dict["left"]
-    else:
-        direction = lang_dict["straight"]
-    
-    return f"{direction} ({int(distance)} {lang_dict['meters']})"
+# Walking-scale routes for step-by-step voice guidance: arrived within 15 m and,
+# without a road network, a simulated maneuver every 25 m (4 to 10 of them)
+def voice_wiggle(i):
+    offset = 0.00008 * math.sin(i * 1.8)
+    return offset, offset * 0.6
 
-# Fetch nearby places
-def fetch_nearby_places(lat, lon, radius=600):
-    overpass_url = "https://overpass-api.de/api/interpreter"
-    query = f"""
-    [out:json][timeout:25];
-    (
-      node["amenity"](around:{radius},{lat},{lon});
-      node["shop"](around:{radius},{lat},{lon});
-      node["office"](around:{radius},{lat},{lon});
-    );
-    out center;
-    """
-    try:
-        response = requests.get(overpass_url, params={'data': query}, timeout=10)
-        data = response.json()
-        places = {}
-        for elem in data.get('elements', []):
-            tags = elem.get('tags', {})
-            name = tags.get('name', tags.get('amenity', tags.get('shop', 'Place')))
-            lat_c = elem.get('lat') or elem.get('center', {}).get('lat')
-            lon_c = elem.get('lon') or elem.get('center', {}).get('lon')
-            if lat_c and lon_c:
-                places[name] = [float(lat_c), float(lon_c)]
-        return dict(list(places.items())[:12]) if places else {"No places found": [lat+0.001, lon+0.001]}
-    except:
-        return {"Sample Place": [lat+0.001, lon+0.001]}
+def build_route(start, end):
+    return navigation.build_route(start, end, arrive_within=15, min_steps=4, max_steps=10, spacing=25,
+                                  offset=voice_wiggle)
 
-# Generate simulated route steps
-def generate_route_steps(start, end, lang):
-    steps = []
-    total_dist = haversine(*start, *end)
-    if total_dist < 15:
-        return [LANGUAGES[lang]["done"]]
-    
-    num_steps = max(4, min(10, int(total_dist // 25)))
-    waypoints = [start]
-    
-    for i in range(1, num_steps):
-        ratio = i / num_steps
-        offset = 0.00008 * math.sin(i * 1.8)
-        lat = start[0] + ratio * (end[0] - start[0]) + offset
-        lon = start[1] + ratio * (end[1] - start[1]) + offset * 0.6
-        waypoints.append([lat, lon])
-    waypoints.append(end)
-    
-    prev_bearing = get_bearing(*waypoints[0], *waypoints[1])
-    for i in range(1, len(waypoints)-1):
-        curr_bearing = get_bearing(*waypoints[i], *waypoints[i+1])
-        dist = haversine(*waypoints[i-1], *waypoints[i])
-        step = get_direction_text(lang, prev_bearing, curr_bearing, dist)
-        steps.append(step)
-        prev_bearing = curr_bearing
-    
-    steps.append(LANGUAGES[lang]["done"])
-    return steps
+# Localized instructions for a route in the given language
+@span("render_steps")
+def render_route_steps(route, lang):
+    return navigation.render_route_steps(route, LANGUAGES[lang])
 
-# Fixed: Speak FULL sentence in chosen language
-def speak_full_instruction(text, lang_code):
-    # Escape special characters properly
-    escaped_text = text.replace('\\', '\\\\').replace('"', '\\"').replace("'", "\\'")
-    js = f"""
-    <script>
-    if ('speechSynthesis' in window) {{
-        window.speechSynthesis.cancel();  // Clear any previous speech
-        const utterance = new SpeechSynthesisUtterance("{escaped_text}");
-        utterance.lang = '{lang_code}';
-        utterance.rate = 0.95;
-        utterance.pitch = 1.0;
-        utterance.volume = 1.0;
-        window.speechSynthesis.speak(utterance);
-    }}
-    </script>
-    """
-    st.components.v1.html(js, height=0)
+MAP_ZOOM = 18
 
 # Header
 st.markdown('<h1 class="main-header">🧭 Smart Multi-Language Navigator</h1>', unsafe_allow_html=True)
+# Fixed slot for the voice player, filled at the end of each run, so its iframe is never remounted
+voice_slot = st.empty()
 
 # Language Selection
 st.markdown("### 🌐 Choose Language")
@@ -188,6 +81,10 @@ for i, lang_name in enumerate(langs):
 
 st.markdown(f"**Selected:** {st.session_state.selected_language}")
 
+# Re-render the active route in the selected language (the route itself is cached)
+if st.session_state.route:
+    st.session_state.route_steps = render_route_steps(st.session_state.route, st.session_state.selected_language)
+
 # Main Layout - Everything on ONE PAGE
 col_left, col_right = st.columns([1, 1.2], gap="large")
 
@@ -208,20 +105,37 @@ with col_left:
     st.subheader("🎯 Find Nearby Places")
     
     if st.session_state.user_location:
+        # Prefetch POI tiles around the user and ahead along the route without blocking
+        default_prefetcher().warm_around(*st.session_state.user_location, 600, VOICE_SELECTORS)
+        if st.session_state.route:
+            default_prefetcher().warm_route(st.session_state.route.path, 600, VOICE_SELECTORS)
+
         if st.button("🔍 Search Nearby Places"):
             with st.spinner("Searching..."):
-                places = fetch_nearby_places(*st.session_state.user_location)
-                st.session_state.nearby_places = places
-                st.rerun()
+                try:
+                    rows = fetch_nearby_places(*st.session_state.user_location, radius=600, limit=12,
+                                               selectors=VOICE_SELECTORS, index=st.session_state.place_index)
+                    places = {name: [lat, lon] for name, lat, lon, _ in rows}
+                except OverpassError as e:
+                    st.error(f"Could not fetch nearby places: {e}")
+                else:
+                    st.session_state.nearby_places = places
+                    if places:
+                        st.rerun()
+                    st.info("No places found nearby.")
         
         if st.session_state.nearby_places:
+            pack = default_pack()
+            offline = f" · offline pack {pack.name} ({pack.version})" if pack and pack.covers(*st.session_state.user_location) else ""
+            st.caption(f"POI tile cache hit ratio: {default_cache().hit_ratio:.0%}{offline}")
             selected = st.selectbox("Select Destination", [""] + list(st.session_state.nearby_places.keys()))
             if selected and st.button("🚀 Start Navigation"):
                 coords = st.session_state.nearby_places[selected]
                 st.session_state.destination = {"name": selected, "coords": coords}
-                st.session_state.route_steps = generate_route_steps(
-                    st.session_state.user_location, coords, st.session_state.selected_language
+                st.session_state.route = default_route_cache().get(
+                    st.session_state.user_location, coords, build_route, namespace="voice"
                 )
+                st.session_state.route_steps = render_route_steps(st.session_state.route, st.session_state.selected_language)
                 st.session_state.current_step_index = 0
                 st.success(f"Route to {selected} ready!")
     # st.markdown('</div>', unsafe_allow_html=True)
@@ -237,8 +151,8 @@ with col_left:
         col_s1, col_s2 = st.columns(2)
         with col_s1:
             if st.button("🔊 Speak Full Instruction"):
-                lang_code = LANGUAGES[st.session_state.selected_language]["lang_code"]
-                speak_full_instruction(current, lang_code)  # Now speaks the entire sentence!
+                lang_code = LANGUAGES[st.session_state.selected_language].code
+                announce(current, lang_code)  # full sentence, spoken by the session's voice player
         with col_s2:
             if st.button("➡️ Next Step"):
                 st.session_state.current_step_index += 1
@@ -247,6 +161,7 @@ with col_left:
         if st.button("🔄 Reset Route"):
             st.session_state.current_step_index = 0
             st.session_state.destination = None
+            st.session_state.route = None
             st.session_state.route_steps = []
             st.rerun()
         
@@ -260,26 +175,18 @@ with col_right:
     st.subheader("🗺️ Map View")
     
     if st.session_state.user_location:
-        m = folium.Map(location=st.session_state.user_location, zoom_start=18)
-        folium.Marker(
-            st.session_state.user_location,
-            popup="You are here",
-            icon=folium.Icon(color="green", icon="user", prefix="fa")
-        ).add_to(m)
-        
-        if st.session_state.destination:
-            dest_coords = st.session_state.destination["coords"]
-            folium.Marker(
-                dest_coords,
-                popup=st.session_state.destination["name"],
-                icon=folium.Icon(color="red", icon="flag", prefix="fa")
-            ).add_to(m)
-            folium.PolyLine(
-                [st.session_state.user_location, dest_coords],
-                color="#00D4FF", weight=8, opacity=0.8
-            ).add_to(m)
-        
-        st_folium(m, width=700, height=500)
+        destination = st.session_state.destination
+        route = st.session_state.route
+        dest = destination["coords"] if destination else None
+        center = map_center(st.session_state, (tuple(dest) if dest else None, route.key if route else None),
+                            st.session_state.user_location)
+        # Base map is only (re)loaded when the view changes; each rerun just swaps the live layer
+        with span("map.build"):
+            nav_map = base_map(center, MAP_ZOOM, dest, destination["name"] if destination else None, route)
+            live = live_layer(st.session_state.user_location, MAP_ZOOM, route, st.session_state.current_step_index)
+        with span("map.st_folium"):
+            st_folium(nav_map, key="nav_map", width=700, height=500, returned_objects=[],
+                      feature_group_to_add=live)
     else:
         st.info("Set your location to view the map")
     
@@ -287,7 +194,15 @@ with col_right:
 
 # Final status
 if st.session_state.current_step_index >= len(st.session_state.route_steps) and st.session_state.route_steps:
-    st.success("🎉 " + LANGUAGES[st.session_state.selected_language]["done"])
+    st.success("🎉 " + LANGUAGES[st.session_state.selected_language]["arrived"])
+
+# Speak what this run announced; the next instruction is prepared ahead
+step = st.session_state.current_step_index
+lang_code = LANGUAGES[st.session_state.selected_language].code
+with voice_slot:
+    voice_player(upcoming=[(text, lang_code) for text in st.session_state.route_steps[step + 1:step + 2]], rate=0.95)
 
 st.caption("Multi-language step-by-step navigation • Full sentence spoken in chosen language • Works indoors & outdoors")
+perf_panel(trace)
+finish_run()
 